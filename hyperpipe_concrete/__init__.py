@@ -1 +1,15 @@
-from .graph_builder import build_graph
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+__all__ = ['build_graph']
+
+if TYPE_CHECKING:
+    from .graph_builder import build_graph
+
+
+def __getattr__(name):
+    # Deferred so ``import hyperpipe_concrete`` does not load the pipeline
+    if name == 'build_graph':
+        from .graph_builder import build_graph
+        globals()[name] = build_graph
+        return build_graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
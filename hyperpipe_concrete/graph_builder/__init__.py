@@ -1 +1,28 @@
-from .__main__ import build_graph, get_default_config
\ No newline at end of file
+from typing import TYPE_CHECKING
+import importlib
+
+# PEP 562 lazy exports: importing the package stays cheap, and the pipeline
+# modules (with neo4j, rapidfuzz and the LLM stack) load on first access
+_LAZY_EXPORTS = {
+    'build_graph': '.__main__',
+    'get_default_config': '.__main__',
+    'build_graph_sharded': '.sharding',
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+if TYPE_CHECKING:
+    from .__main__ import build_graph, get_default_config
+    from .sharding import build_graph_sharded
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
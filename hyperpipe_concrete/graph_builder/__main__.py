@@ -1,19 +1,47 @@
-from typing import List
+from typing import Iterator, List, Optional
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import logging
+import os
+import sys
+import time
 
 from hyperpipe_core import AsyncBatchPipeline, Pipeline,PipelineRunner
 
-from .extraction import AsyncEntityExtractor, AsyncRelationExtractor 
-from .merging import EntityTextMerger, RelationTextMerger, TripletEntityMerger
-from .exporting import Neo4jExporter
+from .extraction import (
+    AsyncEntityExtractor,
+    AsyncRelationExtractor,
+    AsyncJointExtractor,
+    PackedEntityExtractor,
+    PackedRelationExtractor,
+    PackedJointExtractor,
+)
+from .merging import EntityTextMerger, RelationTextMerger, TripletEntityMerger, EntityResolver
+from .exporting import Neo4jExporter, AdaptiveBatchSizer
 from .cleaning import EntityCleaner, TripletCleaner
-from .embedding import TripletEmbedder
-from .matching import Neo4jEntityMatcher
+from .embedding import TripletEmbedder, EmbeddingMicroBatcher
+from .matching import Neo4jEntityMatcher, Neo4jExactMatcher, LabelPartitioner, LocalVectorIndex
+from .extraction.hedging import HedgePolicy
+from .extraction.scheduler import LLMScheduler
+from .extraction.routing import ModelCascade
+from .streaming import ChunkStream, StreamedExtractionStep
+from .dedup import NearDuplicateDetector, DuplicateReuseStep, replay_duplicates
+from .progress import ProgressReporter, ProgressStep, MeteredLLM
+from .sharding import ShardChunk, ShardTracker, build_graph_sharded, load_factory
+from .metrics import PipelineMetrics
+from .tracing import Tracer, BatchSpanStep
+from .database import as_async_graph
 from .models import GraphBuilderResult
+from .utils.packing import pack_chunks, estimate_tokens
 from hyperpipe_core.logger import set_logger
 
 def get_default_config():
     return {
         'batch_size': 6,
+        'extraction_mode': 'two_stage',
         'pipeline': {
             'entity_cleaner': {
                 'remove_punctuation': True,
@@ -32,20 +60,132 @@ def get_default_config():
             'triplet_entity_merger': {
                 'similarity_threshold': 0.9
             },
+            'entity_resolver': {
+                'enabled': False,
+                'similarity_threshold': 0.95,
+                'top_k': 10,
+                'embedding_field': 'embedding',
+                'block_by_label': True,
+            },
+            'neo4j_graph': {
+                'uri': None,
+                'user': None,
+                'password': None,
+                'database': None,
+                'max_connection_pool_size': 50,
+                'max_transaction_retry_time': 30.0,
+                'max_concurrent_reads': 32,
+                'max_concurrent_writes': 4,
+                'query_timeout': None,
+            },
+            'triplet_embedder': {
+                'entity_name_weight': 0.6,
+                'entity_label_weight': 0.4,
+                'normalize': False,
+                'truncate_dimension': None,
+            },
             'neo4j_matcher': {
                 'similarity_threshold': 0.85,
                 'vector_index_name': 'embedded_entities_index',
                 'embedding_dimension': 1536,
             },
+            'neo4j_exact_matcher': {
+                'enabled': True,
+                'lookup_batch_size': 500,
+                'fulltext_index_name': None,
+                'fuzzy_threshold': 0.9,
+                'create_indexes': True,
+            },
+            'vector_partitioning': {
+                'enabled': True,
+                'groups': {},
+                'similarity_function': 'cosine',
+                'await_index_timeout': 30.0,
+                'global_fallback': True,
+            },
             'neo4j_exporter': {
                 'batch_size': 100,
                 'embedded_label': 'Embedded',
+                'persist_embeddings': ['embedding', 'name_embedding', 'label_embedding'],
+                'persist_relation_embeddings': False,
+                'vector_property_type': 'float32',
+                'dead_letter_path': None,
+                'bisect_failures': True,
+            },
+            'export_batch_sizing': {
+                'enabled': True,
+                'target_seconds': 1.0,
+                'initial_bytes': 1_000_000,
+                'min_bytes': 10_000,
+                'max_bytes': 32_000_000,
+                'max_rows': 10_000,
+            },
+            'local_vector_index': {
+                'enabled': False,
+                'quantization': 'int8',
+                'truncate_dimension': None,
+                'rescore': True,
+                'oversample': 4,
             },
             'entity_extractor': {
+                'model': None,
                 'temperature': 0.1,
+                'call_timeout': 30.0,
             },
             'relation_extractor': {
+                'model': None,
                 'temperature': 0.1,
+                'call_timeout': 30.0,
+            },
+            'joint_extractor': {
+                'model': None,
+                'temperature': 0.1,
+                'call_timeout': 30.0,
+            },
+            'model_cascade': {
+                'enabled': False,
+                'models': ['gpt-4o-mini', 'gpt-4o'],
+                'min_items': 1,
+                'max_rejected_fraction': 0.5,
+                'escalate_on_salvage': True,
+                'cheap_retries': 1,
+            },
+            'chunk_packer': {
+                'enabled': False,
+                'max_tokens': 3000,
+                'max_chunks': 8,
+            },
+            'llm_hedging': {
+                'enabled': False,
+                'latency_percentile': 95.0,
+                'budget': 0.1,
+                'min_samples': 20,
+                'min_delay': 0.5,
+            },
+            'embedding_batcher': {
+                'enabled': True,
+                'max_batch_size': 256,
+                'max_batch_tokens': 8000,
+                'max_wait': 0.02,
+                'max_concurrency': 4,
+            },
+            'chunk_dedup': {
+                'enabled': False,
+                'threshold': 1.0,
+                'num_perm': 128,
+                'shingle_size': 5,
+            },
+            'llm_scheduler': {
+                'enabled': True,
+                'max_in_flight': 16,
+                'streaming': False,
+                'max_buffered_chunks': 64,
+            },
+            'tracer': {
+                'enabled': False,
+                'trace_memory': False,
+                'export_path': None,
+                'format': 'chrome',
             }
         }
     }
@@ -60,87 +200,330 @@ def merge_config(user_config: dict = None) -> dict:
         if key == 'pipeline' and isinstance(value, dict):
             merged['pipeline'] = {**default_config['pipeline'], **value}
             for component_key, component_config in value.items():
-                if component_key in merged['pipeline'] and isinstance(component_config, dict):
-                    merged['pipeline'][component_key] = {**merged['pipeline'][component_key], **component_config}
+                if component_key in default_config['pipeline'] and isinstance(component_config, dict):
+                    merged['pipeline'][component_key] = {**default_config['pipeline'][component_key], **component_config}
         else:
             merged[key] = value
     return merged
 
+def create_partitioner(pipeline_config: dict):
+    partitioning_config = dict(pipeline_config['vector_partitioning'])
+    partitioning_config.pop('global_fallback', None)
+    if not partitioning_config.pop('enabled', False):
+        return None
+    return LabelPartitioner(
+        embedded_label=pipeline_config['neo4j_exporter']['embedded_label'],
+        embedding_dimension=pipeline_config['neo4j_matcher']['embedding_dimension'],
+        **partitioning_config,
+    )
+
+def create_batch_sizer(pipeline_config: dict):
+    sizing_config = dict(pipeline_config['export_batch_sizing'])
+    return AdaptiveBatchSizer(**sizing_config) if sizing_config.pop('enabled', False) else None
+
+def record_graph_stats(result: GraphBuilderResult, before: dict, after: dict) -> None:
+    for operation, stats in after.items():
+        for key in ('calls', 'errors', 'retries', 'total_time', 'wait_time'):
+            result.metrics.increment(f"graph.{operation}.{key}", stats[key] - before[operation][key])
+
+def record_dedup_savings(result: GraphBuilderResult, qtracker, duplicate_of: dict) -> None:
+    """Counts skipped chunks and the LLM work their originals took, which is
+    what extracting the duplicates would have cost."""
+    by_chunk = result.metrics.llm_by_chunk()
+    result.metrics.increment('dedup.chunks_skipped', len(duplicate_of))
+    for original in duplicate_of.values():
+        totals = by_chunk.get(qtracker.chunks[original].uid, {})
+        result.metrics.increment('dedup.llm_calls_saved', totals.get('calls', 0.0))
+        result.metrics.increment('dedup.tokens_saved', totals.get('prompt_tokens', 0.0) + totals.get('completion_tokens', 0.0))
+        result.metrics.increment('dedup.cost_saved', totals.get('cost', 0.0))
+
+def create_graph_steps(pipeline_config: dict, neo4j_graph, embedder) -> list:
+    """Steps that run after local merging: graph lookups, embedding, vector
+    matching and export, in pipeline order."""
+    relation_text_merger = RelationTextMerger(**pipeline_config['relation_text_merger'])
+    batcher_config = dict(pipeline_config['embedding_batcher'])
+    if batcher_config.pop('enabled', False) and not isinstance(embedder, EmbeddingMicroBatcher):
+        embedder = EmbeddingMicroBatcher(embedder, **batcher_config)
+    triplet_embedder = TripletEmbedder(embedder=embedder, **pipeline_config['triplet_embedder'])
+    resolver_config = dict(pipeline_config['entity_resolver'])
+    entity_resolver = EntityResolver(**resolver_config) if resolver_config.pop('enabled', False) else None
+    
+    partitioner = create_partitioner(pipeline_config)
+    partition_by_label = partitioner is not None
+    global_fallback = pipeline_config['vector_partitioning'].get('global_fallback', True)
+
+    local_index_config = dict(pipeline_config['local_vector_index'])
+    local_index = LocalVectorIndex(**local_index_config) if local_index_config.pop('enabled', False) else None
+
+    neo4j_matcher = Neo4jEntityMatcher(
+        neo4j_graph=neo4j_graph,
+        partitioner=partitioner,
+        local_index=local_index,
+        partition_by_label=partition_by_label,
+        global_fallback=global_fallback,
+        **pipeline_config['neo4j_matcher']
+    )
+    exact_matcher_config = dict(pipeline_config['neo4j_exact_matcher'])
+    neo4j_exact_matcher = Neo4jExactMatcher(
+        neo4j_graph=neo4j_graph,
+        embedded_label=pipeline_config['neo4j_exporter']['embedded_label'],
+        local_index=local_index,
+        partitioner=partitioner,
+        **exact_matcher_config,
+    ) if exact_matcher_config.pop('enabled', False) else None
+    neo4j_exporter = Neo4jExporter(
+        neo4j_graph=neo4j_graph, 
+        partitioner=partitioner,
+        batch_sizer=create_batch_sizer(pipeline_config),
+        partition_by_label=partition_by_label,
+        **pipeline_config['neo4j_exporter']
+    )
+    return [
+        step for step in [
+            neo4j_exact_matcher,
+            triplet_embedder,
+            entity_resolver,
+            relation_text_merger,
+            neo4j_matcher,
+            neo4j_exporter,
+        ] if step is not None
+    ]
+
 async def build_graph(qtracker,
                 neo4j_graph,
                 llm,
                 embedder,
                 config: dict = None,
-                logger = None):
+                logger = None,
+                stages: str = "all",
+                progress: ProgressReporter = None):
+    """Builds the graph for ``qtracker``. With ``stages="extract"`` only
+    extraction, cleaning and local merging run, and no graph is needed."""
     
     config = merge_config(config)
+    if config['extraction_mode'] not in ('two_stage', 'joint'):
+        raise ValueError(f"Unknown extraction_mode: {config['extraction_mode']}")
+    if stages not in ('all', 'extract'):
+        raise ValueError(f"Unknown stages: {stages}")
 
     num_chunks = len(qtracker.chunks)
     pipeline_config = config['pipeline']
     
+    owns_graph = neo4j_graph is None and stages == 'all'
+    graph_steps = []
+    if stages == 'all':
+        neo4j_graph = as_async_graph(neo4j_graph, **pipeline_config['neo4j_graph'])
+        graph_steps = create_graph_steps(pipeline_config, neo4j_graph, embedder)
+
     entity_cleaner = EntityCleaner(**pipeline_config['entity_cleaner'])
     triplet_cleaner = TripletCleaner(**pipeline_config['triplet_cleaner'])
     
     entity_text_merger = EntityTextMerger(**pipeline_config['entity_text_merger'])
-    relation_text_merger = RelationTextMerger(**pipeline_config['relation_text_merger'])
-    triplet_embedder = TripletEmbedder(embedder=embedder)
     triplet_entity_merger = TripletEntityMerger(**pipeline_config['triplet_entity_merger'])
-    
-    neo4j_matcher = Neo4jEntityMatcher(
-        neo4j_graph=neo4j_graph,
-        **pipeline_config['neo4j_matcher']
-    )
-    neo4j_exporter = Neo4jExporter(
-        neo4j_graph=neo4j_graph, 
-        **pipeline_config['neo4j_exporter']
-    )
+
+    hedging_config = dict(pipeline_config['llm_hedging'])
+    hedge_policy = HedgePolicy(**hedging_config) if hedging_config.pop('enabled', False) else None
+
+    cascade_config = dict(pipeline_config['model_cascade'])
+    cascade = ModelCascade(**cascade_config) if cascade_config.pop('enabled', False) else None
+
+    scheduler_config = pipeline_config['llm_scheduler']
+    llm_scheduler = LLMScheduler(scheduler_config['max_in_flight']) if scheduler_config.get('enabled') else None
+    # Streaming runs relation extraction per chunk, before entities are
+    # merged across the batch, so prompts lack the merged alternatives
+    streaming = llm_scheduler is not None and scheduler_config.get('streaming', False)
+
+    # Duplicates of earlier chunks are not extracted; they reuse the results
+    # of the chunk they duplicate, filtered by their own text when they are
+    # only near-identical
+    dedup_config = dict(pipeline_config['chunk_dedup'])
+    duplicate_of = {}
+    near_texts = {}
+    if dedup_config.pop('enabled', False) and num_chunks > 1:
+        detector = NearDuplicateDetector(**dedup_config)
+        for position, (original, similarity) in detector.find_duplicates([chunk.text for chunk in qtracker.chunks]).items():
+            duplicate_of[position] = original
+            if similarity < 1.0:
+                near_texts[qtracker.chunks[position].uid] = qtracker.chunks[position].text
+    duplicates_by_chunk = {}
+    for position, original in sorted(duplicate_of.items()):
+        duplicates_by_chunk.setdefault(original, []).append(position)
+    extract_indices = [i for i in range(num_chunks) if i not in duplicate_of]
+
+    def duplicates_of(chunk_indices: List[int]) -> dict:
+        return {
+            qtracker.chunks[i].uid: [qtracker.chunks[d].uid for d in duplicates_by_chunk[i]]
+            for i in chunk_indices if i in duplicates_by_chunk
+        }
+
+    tracer_config = pipeline_config['tracer']
+    tracer = Tracer(trace_memory=tracer_config['trace_memory']) if tracer_config.get('enabled') else None
+
+    def traced(step, chunk_indices: List[int] = None):
+        if tracer is None:
+            return step
+        chunk_ids = [qtracker.chunks[i].uid for i in chunk_indices] if chunk_indices else None
+        return tracer.instrument(step, chunk_ids=chunk_ids)
 
     def create_entity_pipeline(chunk_idx: int) -> AsyncBatchPipeline:
         extractor = AsyncEntityExtractor(
             llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            cascade=cascade,
             **pipeline_config['entity_extractor'],
         )
         extractor.iteration = chunk_idx
-        return AsyncBatchPipeline([extractor, entity_cleaner],name=f"Entity {chunk_idx}")
+        return AsyncBatchPipeline([traced(extractor, [chunk_idx]), traced(entity_cleaner)],name=f"Entity {chunk_idx}")
     
     def create_relation_pipeline(chunk_idx: int) -> AsyncBatchPipeline:
         extractor = AsyncRelationExtractor(
             llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            cascade=cascade,
             **pipeline_config['relation_extractor'],
         )
         extractor.iteration = chunk_idx
-        return AsyncBatchPipeline([extractor, triplet_cleaner],name=f"Relation{chunk_idx}")
-    
-    steps_entity_extractor = [create_entity_pipeline(i) for i in range(num_chunks)]
-    steps_relation_extractor = [create_relation_pipeline(i) for i in range(num_chunks)]
+        return AsyncBatchPipeline([traced(extractor, [chunk_idx]), traced(triplet_cleaner)],name=f"Relation{chunk_idx}")
 
-    def create_batch_pipeline(entity_pipes: List, relation_pipes: List) -> Pipeline:
+    def create_packed_entity_pipeline(chunk_indices: List[int]) -> AsyncBatchPipeline:
+        extractor = PackedEntityExtractor(
+            llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            chunk_indices=chunk_indices,
+            **pipeline_config['entity_extractor'],
+        )
+        return AsyncBatchPipeline([traced(extractor, chunk_indices), traced(entity_cleaner)], name=f"Entity {chunk_indices[0]}-{chunk_indices[-1]}")
+
+    def create_packed_relation_pipeline(chunk_indices: List[int]) -> AsyncBatchPipeline:
+        extractor = PackedRelationExtractor(
+            llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            chunk_indices=chunk_indices,
+            **pipeline_config['relation_extractor'],
+        )
+        return AsyncBatchPipeline([traced(extractor, chunk_indices), traced(triplet_cleaner)], name=f"Relation{chunk_indices[0]}-{chunk_indices[-1]}")
+
+    def create_joint_pipeline(chunk_idx: int) -> AsyncBatchPipeline:
+        extractor = AsyncJointExtractor(
+            llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            cascade=cascade,
+            **pipeline_config['joint_extractor'],
+        )
+        extractor.iteration = chunk_idx
+        return AsyncBatchPipeline([traced(extractor, [chunk_idx]), traced(entity_cleaner), traced(triplet_cleaner)], name=f"Joint {chunk_idx}")
+
+    def create_packed_joint_pipeline(chunk_indices: List[int]) -> AsyncBatchPipeline:
+        extractor = PackedJointExtractor(
+            llm=llm,
+            hedge_policy=hedge_policy,
+            scheduler=llm_scheduler,
+            chunk_indices=chunk_indices,
+            **pipeline_config['joint_extractor'],
+        )
+        return AsyncBatchPipeline([traced(extractor, chunk_indices), traced(entity_cleaner), traced(triplet_cleaner)], name=f"Joint {chunk_indices[0]}-{chunk_indices[-1]}")
+
+    def create_packs(batch_indices: List[int]) -> List[List[int]]:
+        packer_config = pipeline_config['chunk_packer']
+        batch_chunks = [qtracker.chunks[i] for i in batch_indices]
+        packs = pack_chunks(
+            batch_chunks,
+            max_tokens=packer_config['max_tokens'],
+            max_chunks=packer_config['max_chunks'],
+        )
+        return [[batch_indices[position] for position in pack] for pack in packs]
+
+    def create_unit_pipeline(unit: List[int]) -> Pipeline:
+        packing = pipeline_config['chunk_packer'].get('enabled')
+        group = unit if packing else unit[0]
+        if config['extraction_mode'] == 'joint':
+            create_joint = create_packed_joint_pipeline if packing else create_joint_pipeline
+            return Pipeline([create_joint(group)])
+        create_entity = create_packed_entity_pipeline if packing else create_entity_pipeline
+        create_relation = create_packed_relation_pipeline if packing else create_relation_pipeline
+        return Pipeline([create_entity(group), create_relation(group)])
+
+    async def run_unit(unit: List[int]) -> GraphBuilderResult:
+        unit_runner = PipelineRunner(create_unit_pipeline(unit), result_class=GraphBuilderResult)
+        unit_runner.map_transform([set_logger(logger)])
+        unit_result = await unit_runner.arun(qtracker)
+        entities, triplets = replay_duplicates(unit_result, duplicates_of(unit), near_texts)
+        unit_result.entity_extraction.extend(entities)
+        unit_result.relation_extraction.extend(triplets)
+        unit_result.metrics.increment('dedup.entities_reused', len(entities))
+        unit_result.metrics.increment('dedup.triplets_reused', len(triplets))
+        return unit_result
+
+    chunk_stream = None
+    if streaming:
+        units = create_packs(extract_indices) if pipeline_config['chunk_packer'].get('enabled') else [[i] for i in extract_indices]
+        chunk_stream = ChunkStream(
+            units,
+            run_unit,
+            unit_sizes=[sum(estimate_tokens(qtracker.chunks[i].text) for i in unit) for unit in units],
+            max_buffered_chunks=scheduler_config['max_buffered_chunks'],
+        )
+
+    def record_batch_chunks(units: List[List[int]]) -> None:
+        if tracer is not None:
+            tracer.add_batch_chunks([qtracker.chunks[i].uid for unit in units for i in unit])
+
+    def create_batch_pipeline(batch_number: int, batch_indices: List[int]) -> Pipeline:
+        packing = pipeline_config['chunk_packer'].get('enabled')
+        groups = create_packs(batch_indices) if packing else batch_indices
+
+        if chunk_stream is not None:
+            # Batches take whichever chunks finish next instead of a fixed
+            # index range; relation extraction already ran per chunk
+            extraction_components = [
+                StreamedExtractionStep(chunk_stream, len(batch_indices), on_taken=record_batch_chunks),
+                traced(entity_text_merger),
+            ]
+        elif config['extraction_mode'] == 'joint':
+            create_joint = create_packed_joint_pipeline if packing else create_joint_pipeline
+            extraction_components = [
+                AsyncBatchPipeline(
+                    [create_joint(group) for group in groups], name="Joint"
+                ),
+                DuplicateReuseStep(duplicates_of(batch_indices), near_texts),
+                traced(entity_text_merger),
+            ]
+        else:
+            create_entity = create_packed_entity_pipeline if packing else create_entity_pipeline
+            create_relation = create_packed_relation_pipeline if packing else create_relation_pipeline
+            extraction_components = [
+                AsyncBatchPipeline(
+                    [create_entity(group) for group in groups], name="Entity"
+                ),
+                traced(entity_text_merger),
+                AsyncBatchPipeline(
+                    [create_relation(group) for group in groups], name="Relation"
+                ),
+                DuplicateReuseStep(duplicates_of(batch_indices), near_texts),
+            ]
         
-        components = [
-            AsyncBatchPipeline(
-                entity_pipes, name="Entity"
-            ),
-            entity_text_merger,
-            AsyncBatchPipeline(
-                relation_pipes, name="Relation"
-            ),
-            triplet_entity_merger,
-            triplet_embedder,
-            relation_text_merger,
-            neo4j_matcher,
-            neo4j_exporter,
+        components = extraction_components + [
+            traced(step) for step in [triplet_entity_merger, *graph_steps]
         ]
+
+        if tracer is not None:
+            # Streamed batches learn their chunks when they take them
+            batch_chunk_ids = [] if chunk_stream is not None else [qtracker.chunks[i].uid for i in batch_indices]
+            components.insert(0, BatchSpanStep(tracer, batch_number, batch_chunk_ids))
+        if progress is not None:
+            num_batch_chunks = len(batch_indices) + sum(len(duplicates_by_chunk.get(i, ())) for i in batch_indices)
+            components.append(ProgressStep(progress, num_batch_chunks))
         
         return Pipeline(components)
     
     pipelines = []
-    for batch_start in range(0, num_chunks, config['batch_size']):
-        batch_end = min(batch_start + config['batch_size'], num_chunks)
-        
-        entity_batch = steps_entity_extractor[batch_start:batch_end]
-        relation_batch = steps_relation_extractor[batch_start:batch_end]
-        
-        batch_pipeline = create_batch_pipeline(entity_batch, relation_batch)
+    for batch_number, batch_start in enumerate(range(0, len(extract_indices), config['batch_size'])):
+        batch_pipeline = create_batch_pipeline(batch_number, extract_indices[batch_start:batch_start + config['batch_size']])
         pipelines.append(batch_pipeline)
     
     final_pipeline = Pipeline([Pipeline(pipelines, name="GraphBuilder")])
@@ -149,6 +532,262 @@ async def build_graph(qtracker,
     runner = PipelineRunner(final_pipeline, result_class=GraphBuilderResult) 
     
     runner.map_transform([set_logger(logger)])
-    return await runner.arun(qtracker)
 
+    graph_stats_before = neo4j_graph.stats() if graph_steps else None
+    if tracer is not None:
+        tracer.start()
+    try:
+        result = await runner.arun(qtracker)
+        if graph_stats_before is not None:
+            record_graph_stats(result, graph_stats_before, neo4j_graph.stats())
+        if llm_scheduler is not None:
+            result.metrics.increment('llm.scheduler.peak_in_flight', llm_scheduler.peak_in_flight)
+            result.metrics.increment('llm.scheduler.queued', llm_scheduler.queued)
+            result.metrics.increment('llm.scheduler.wait_time', llm_scheduler.wait_time)
+        if duplicate_of:
+            record_dedup_savings(result, qtracker, duplicate_of)
+    finally:
+        if chunk_stream is not None:
+            await chunk_stream.close()
+        if tracer is not None:
+            tracer.finish()
+        if owns_graph:
+            await neo4j_graph.close()
+
+    if tracer is None:
+        return result
+    result.metrics.spans.extend(tracer.spans)
+    if tracer_config.get('export_path'):
+        tracer.export(tracer_config['export_path'], tracer_config['format'])
+    return result
+
+
+
+
+def iter_jsonl_chunks(path: str, text_field: str = 'text', id_field: str = 'uid') -> Iterator[ShardChunk]:
+    """Yields chunks from a JSONL corpus (``-`` reads stdin). Lines without
+    ``id_field`` get ``<file>:<line>`` ids; lines without text are skipped."""
+    source = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    name = 'stdin' if path == '-' else os.path.basename(path)
+    try:
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get(text_field)
+            if not text:
+                continue
+            uid = record.get(id_field) or record.get('id') or f"{name}:{line_number}"
+            yield ShardChunk(uid=str(uid), text=text)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+def count_jsonl_lines(path: str) -> Optional[int]:
+    if path == '-':
+        return None
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+def _deep_update(target: dict, source: dict) -> dict:
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_update(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+def load_config_files(paths: List[str]) -> dict:
+    config = {}
+    for path in paths or []:
+        with open(path, encoding='utf-8') as f:
+            if path.endswith(('.yaml', '.yml')):
+                import yaml
+                loaded = yaml.safe_load(f) or {}
+            else:
+                loaded = json.load(f)
+        _deep_update(config, loaded)
+    return config
+
+def apply_overrides(config: dict, overrides: List[str]) -> dict:
+    """Applies ``dotted.key=value`` overrides; values are parsed as JSON
+    when possible, e.g. ``pipeline.llm_scheduler.max_in_flight=32``."""
+    for override in overrides or []:
+        key, _, raw = override.partition('=')
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = raw
+        *parents, leaf = key.split('.')
+        node = config
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = value
+    return config
+
+def render_profile(metrics: PipelineMetrics) -> str:
+    stages = metrics.stage_times()
+    total_busy = sum(stage['busy_time'] for stage in stages.values()) or 1.0
+    lines = [f"{'stage':<32} {'calls':>7} {'busy s':>9} {'share':>7} {'max s':>8} {'items':>9} {'errors':>7}"]
+    for name, stage in sorted(stages.items(), key=lambda item: -item[1]['busy_time']):
+        lines.append(
+            f"{name[:32]:<32} {stage['calls']:>7} {stage['busy_time']:>9.2f} "
+            f"{100 * stage['busy_time'] / total_busy:>6.1f}% {stage['max']:>8.2f} "
+            f"{stage['output_items']:>9} {stage['errors']:>7}"
+        )
+    llm = metrics.summary()['llm']['total']
+    lines.append(
+        f"llm: {llm['calls']} calls, {llm['total_tokens']} tokens, "
+        f"p50 {llm['latency']['p50']:.2f}s, p99 {llm['latency']['p99']:.2f}s, queued {llm['queue_time']:.1f}s"
+    )
+    return "\n".join(lines)
+
+def create_backends(args, pipeline_config: dict, reporter: ProgressReporter):
+    """Returns ``(llm, llm_factory, embedder, graph)`` for the CLI flags."""
+    if args.standins:
+        from .standins import FakeLLM, FakeEmbedder
+        llm_factory = functools.partial(FakeLLM, latency=args.llm_latency, seed=args.seed)
+        embedder = FakeEmbedder(dimension=pipeline_config['neo4j_matcher']['embedding_dimension'], seed=args.seed)
+    else:
+        llm_factory = args.llm
+        embedder = load_factory(args.embedder)()
+    if args.graph == 'standin':
+        from .standins import FakeGraph
+        graph = FakeGraph(seed=args.seed)
+    else:
+        graph = as_async_graph(None, **pipeline_config['neo4j_graph'])
+    llm = MeteredLLM(load_factory(llm_factory)(), reporter)
+    return llm, llm_factory, embedder, graph
+
+async def run_cli(args) -> dict:
+    config = apply_overrides(load_config_files(args.config), args.set)
+    if args.batch_size:
+        config['batch_size'] = args.batch_size
+    pipeline_overrides = {}
+    if args.max_in_flight:
+        pipeline_overrides['llm_scheduler'] = {'max_in_flight': args.max_in_flight}
+    if args.max_concurrent_writes:
+        pipeline_overrides['neo4j_graph'] = {'max_concurrent_writes': args.max_concurrent_writes}
+    if args.profile is not None:
+        pipeline_overrides['tracer'] = {'enabled': True}
+    # The CLI always keeps rows that fail to export, so they can be replayed
+    dead_letter_path = (args.dead_letter
+                        or config.get('pipeline', {}).get('neo4j_exporter', {}).get('dead_letter_path')
+                        or time.strftime('dead_letters-%Y%m%d-%H%M%S.jsonl'))
+    pipeline_overrides['neo4j_exporter'] = {'dead_letter_path': dead_letter_path}
+    _deep_update(config.setdefault('pipeline', {}), pipeline_overrides)
+    pipeline_config = merge_config(config)['pipeline']
+
+    total = args.total if args.total is not None else count_jsonl_lines(args.input)
+    totals = PipelineMetrics()
+    with ProgressReporter(total_chunks=total, refresh_interval=args.refresh) as reporter:
+        llm, llm_factory, embedder, graph = create_backends(args, pipeline_config, reporter)
+        try:
+            window_number = 0
+            chunks = iter_jsonl_chunks(args.input, text_field=args.text_field, id_field=args.id_field)
+            while True:
+                window = list(itertools.islice(chunks, args.window))
+                if not window:
+                    break
+                tracker = ShardTracker(window)
+                if args.shards:
+                    result = await build_graph_sharded(
+                        tracker, graph, llm_factory, embedder, config=config,
+                        num_shards=args.shards, max_workers=args.workers,
+                        work_dir=os.path.join(args.work_dir, f"window-{window_number:05d}"),
+                    )
+                    reporter.window_done(result, chunks=len(window), count_tokens=True,
+                                        triplets=int(result.metrics.counters.get('reduce.triplets', 0)))
+                else:
+                    result = await build_graph(tracker, graph, llm, embedder, config=config, progress=reporter)
+                    reporter.window_done(result)
+                totals.merge(result.metrics)
+                window_number += 1
+        finally:
+            close = getattr(graph, 'close', None)
+            if close is not None and asyncio.iscoroutinefunction(close):
+                await close()
+
+    summary = {
+        **reporter.summary(),
+        'dead_letters': totals.counters.get('export.dead_letters', 0),
+        'dead_letter_path': dead_letter_path,
+        'export': totals.export_batch_summary(),
+    }
+    if args.profile is not None:
+        if args.profile != '-':
+            with open(args.profile, 'w', encoding='utf-8') as f:
+                json.dump({'stages': totals.stage_times(), 'llm': totals.summary()['llm']}, f, indent=2)
+        print(render_profile(totals), file=sys.stderr)
+    return summary
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m hyperpipe_concrete.graph_builder',
+        description='Stream a JSONL corpus into the knowledge graph',
+    )
+    parser.add_argument('input', help="JSONL corpus, one chunk per line ('-' for stdin)")
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', default='uid')
+    parser.add_argument('--config', action='append', help='JSON or YAML config file; repeat to layer files')
+    parser.add_argument('--set', action='append', metavar='KEY=VALUE', help='config override, e.g. pipeline.neo4j_exporter.batch_size=200')
+
+    backends = parser.add_argument_group('backends')
+    backends.add_argument('--llm', help='module:callable returning the LLM client')
+    backends.add_argument('--embedder', help='module:callable returning the embedder')
+    backends.add_argument('--graph', choices=['neo4j', 'standin'], help='neo4j uses NEO4J_* or pipeline.neo4j_graph (default: standin with --standins, neo4j otherwise)')
+    backends.add_argument('--standins', action='store_true', help='offline LLM, embedder and graph stand-ins; pass --graph neo4j to keep a real graph')
+    backends.add_argument('--llm-latency', type=float, default=0.05, help='stand-in LLM latency in seconds')
+    backends.add_argument('--seed', type=int, default=0)
+
+    concurrency = parser.add_argument_group('concurrency')
+    concurrency.add_argument('--batch-size', type=int, help='chunks per merge batch')
+    concurrency.add_argument('--max-in-flight', type=int, help='concurrent LLM calls')
+    concurrency.add_argument('--max-concurrent-writes', type=int, help='concurrent graph write transactions')
+    concurrency.add_argument('--window', type=int, default=1000, help='chunks read per build_graph call')
+    concurrency.add_argument('--shards', type=int, help='extract in this many worker processes')
+    concurrency.add_argument('--workers', type=int, help='max worker processes (default: CPU count)')
+    concurrency.add_argument('--work-dir', default='graph_builder_shards')
+
+    exporting = parser.add_argument_group('exporting')
+    exporting.add_argument('--dead-letter', metavar='PATH',
+                           help='JSONL file for triplets that fail to export '
+                                '(default: pipeline.neo4j_exporter.dead_letter_path, else dead_letters-<start time>.jsonl)')
+
+    reporting = parser.add_argument_group('reporting')
+    reporting.add_argument('--total', type=int, help='number of chunks, for the ETA on stdin input')
+    reporting.add_argument('--refresh', type=float, default=5.0, help='seconds between plain progress lines')
+    reporting.add_argument('--profile', nargs='?', const='-', help='print a stage timing report; with a path, also write it as JSON')
+    reporting.add_argument('--output', help='write the run summary to this JSON file')
+    reporting.add_argument('-v', '--verbose', action='store_true')
+
+    args = parser.parse_args(argv)
+    if not args.standins and not (args.llm and args.embedder):
+        parser.error('--llm and --embedder are required unless --standins is given')
+    if args.graph is None:
+        args.graph = 'standin' if args.standins else 'neo4j'
+    if any(path.endswith(('.yaml', '.yml')) for path in args.config or []):
+        try:
+            import yaml  # noqa: F401
+        except ImportError:
+            parser.error('YAML configs need PyYAML (pip install pyyaml); JSON configs work without it')
+    return args
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    summary = asyncio.run(run_cli(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    print(json.dumps(summary, indent=2))
+    return 0
 
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,7 @@
+from .corpus import SyntheticChunk, SyntheticCorpus, make_corpus
+
+__all__ = [
+    'SyntheticChunk',
+    'SyntheticCorpus',
+    'make_corpus'
+]
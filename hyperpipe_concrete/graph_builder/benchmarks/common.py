@@ -0,0 +1,13 @@
+from typing import Optional
+import subprocess
+
+
+def git_revision() -> Optional[str]:
+    """Short hash of the checked-out commit, recorded in benchmark reports."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
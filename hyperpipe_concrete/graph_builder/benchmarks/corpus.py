@@ -0,0 +1,62 @@
+from typing import List
+from dataclasses import dataclass, field
+import random
+
+
+SYLLABLES = ["ka", "lo", "mir", "ten", "sa", "vo", "ri", "dan", "bel", "tor", "ni", "ga", "quel", "mon", "pe", "zu"]
+RELATION_PHRASES = [
+    "works at", "acquired", "is located in", "supplies", "partners with",
+    "founded", "invests in", "competes with", "manufactures", "owns",
+]
+
+
+@dataclass
+class SyntheticChunk:
+    uid: str
+    text: str
+
+
+@dataclass
+class SyntheticCorpus:
+    """Minimal stand-in for a qTracker: ``build_graph`` only reads ``chunks``."""
+    chunks: List[SyntheticChunk] = field(default_factory=list)
+
+
+def make_entity_names(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = [
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+            for _ in range(rng.randint(1, 2))
+        ]
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def make_corpus(num_chunks: int = 100,
+                sentences_per_chunk: int = 4,
+                vocabulary_size: int = 200,
+                duplicate_rate: float = 0.0,
+                seed: int = 0) -> SyntheticCorpus:
+    """Builds chunks of ``"<Entity> <relation phrase> <Entity>."`` sentences.
+
+    ``duplicate_rate`` is the fraction of chunks that repeat the text of an
+    earlier chunk, mimicking boilerplate shared across documents.
+    """
+    rng = random.Random(seed)
+    names = make_entity_names(vocabulary_size, seed)
+    chunks = []
+
+    for index in range(num_chunks):
+        if chunks and rng.random() < duplicate_rate:
+            text = rng.choice(chunks).text
+        else:
+            sentences = []
+            for _ in range(sentences_per_chunk):
+                head, tail = rng.sample(names, 2)
+                sentences.append(f"{head} {rng.choice(RELATION_PHRASES)} {tail}.")
+            text = " ".join(sentences)
+        chunks.append(SyntheticChunk(uid=f"chunk-{index:06d}", text=text))
+
+    return SyntheticCorpus(chunks=chunks)
@@ -0,0 +1,250 @@
+"""Scaling microbenchmarks for the CPU-bound pipeline stages.
+
+Each stage runs on synthetic entities/triplets at increasing sizes; a power
+law ``t = c * n^k`` is fitted to the timings and the run fails when ``k``
+exceeds the stage's limit.
+
+    python -m hyperpipe_concrete.graph_builder.benchmarks.cpu_scaling \
+        --sizes 1000 10000 100000 --output scaling.json
+"""
+from typing import Callable, Dict, Any, List, Optional
+from dataclasses import dataclass
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import random
+import sys
+import time
+import zlib
+
+from .common import git_revision
+from .corpus import make_entity_names, RELATION_PHRASES
+from ..models import Entity, EntityMetadata, Relationship, Triplet, TripletMetadata, GraphBuilderResult
+from ..standins import FakeEmbedder, FakeGraph
+
+
+ENTITY_LABELS = ["person", "company", "location", "product", "organization", "event"]
+NEAR_LINEAR = 1.3
+# Fuzzy name matching compares each new distinct name with the ones seen
+# before, so with distinct names growing with n it is quadratic. Repeated
+# names must take the exact-name shortcut, which is checked separately on a
+# fixed vocabulary against NEAR_LINEAR.
+QUADRATIC = 2.2
+FIXED_VOCABULARY = 200
+
+
+@dataclass
+class Stage:
+    name: str
+    setup: Callable[[int, random.Random], Any]
+    run: Callable[[Any], Any]
+    max_exponent: float = NEAR_LINEAR
+
+
+def _run_step(step, data):
+    result = step.execute(data)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    return result
+
+
+def _make_entities(n: int, rng: random.Random, mentions_per_entity: int = 10, embedding_dimension: int = 0,
+                   unique_names: int = None) -> List[Entity]:
+    unique_names = unique_names or max(n // mentions_per_entity, 1)
+    names = make_entity_names(unique_names, seed=rng.randint(0, 10**6))
+    entities = []
+    for _ in range(n):
+        name = rng.choice(names)
+        embedding = [rng.random() for _ in range(embedding_dimension)] if embedding_dimension else None
+        entities.append(Entity(
+            name=name,
+            label=ENTITY_LABELS[zlib.crc32(name.encode()) % len(ENTITY_LABELS)],
+            summary=f"{name} summary",
+            metadata=EntityMetadata(context=f"Context mentioning {name}.", start_index=0, chunk_id=f"chunk-{rng.randint(0, n // 4)}"),
+            embedding=embedding,
+        ))
+    return entities
+
+
+def _make_triplets(n: int, rng: random.Random, embedding_dimension: int = 0, unique_names: int = None) -> List[Triplet]:
+    heads = _make_entities(n, rng, embedding_dimension=embedding_dimension, unique_names=unique_names)
+    tails = _make_entities(n, rng, embedding_dimension=embedding_dimension, unique_names=unique_names)
+    relations = [phrase.replace(" ", "_") for phrase in RELATION_PHRASES]
+    triplets = []
+    for head, tail in zip(heads, tails):
+        relation_name = rng.choice(relations)
+        triplets.append(Triplet(
+            head=head,
+            relation=Relationship(
+                name=relation_name,
+                label=relation_name,
+                embedding=[rng.random() for _ in range(embedding_dimension)] if embedding_dimension else None,
+            ),
+            tail=tail,
+            metadata=TripletMetadata(context=f"{head.name} {relation_name} {tail.name}.", start_position=0, end_position=10),
+        ))
+    return triplets
+
+
+def _entity_result(n, rng):
+    return GraphBuilderResult(entity_extraction=_make_entities(n, rng))
+
+
+def _triplet_result(n, rng):
+    return GraphBuilderResult(relation_extraction=_make_triplets(n, rng))
+
+
+def _merge_result(n, rng):
+    return GraphBuilderResult(entity_extraction=_make_entities(n, rng), relation_extraction=_make_triplets(n, rng))
+
+
+def _repeated_entity_result(n, rng):
+    return GraphBuilderResult(entity_extraction=_make_entities(n, rng, unique_names=FIXED_VOCABULARY))
+
+
+def _repeated_merge_result(n, rng):
+    return GraphBuilderResult(
+        entity_extraction=_make_entities(n, rng, unique_names=FIXED_VOCABULARY),
+        relation_extraction=_make_triplets(n, rng, unique_names=FIXED_VOCABULARY),
+    )
+
+
+def default_stages() -> List[Stage]:
+    from ..cleaning import EntityCleaner, TripletCleaner
+    from ..merging import EntityTextMerger, RelationTextMerger, TripletEntityMerger
+    from ..embedding import TripletEmbedder
+    from ..exporting import Neo4jExporter
+
+    return [
+        Stage("entity_cleaner", _entity_result, lambda data: _run_step(EntityCleaner(), data)),
+        Stage("triplet_cleaner", _triplet_result, lambda data: _run_step(TripletCleaner(), data)),
+        Stage("entity_text_merger", _repeated_entity_result, lambda data: _run_step(EntityTextMerger(name_similarity_threshold=0.9), data)),
+        Stage("entity_text_merger_fuzzy", _entity_result, lambda data: _run_step(EntityTextMerger(name_similarity_threshold=0.9), data), QUADRATIC),
+        Stage("relation_text_merger", _triplet_result, lambda data: _run_step(RelationTextMerger(), data)),
+        Stage("triplet_entity_merger", _repeated_merge_result, lambda data: _run_step(TripletEntityMerger(), data)),
+        Stage("triplet_entity_merger_fuzzy", _merge_result, lambda data: _run_step(TripletEntityMerger(), data), QUADRATIC),
+        Stage("triplet_embedder", _triplet_result, lambda data: _run_step(TripletEmbedder(embedder=FakeEmbedder(dimension=8)), data)),
+        Stage(
+            "neo4j_exporter",
+            lambda n, rng: GraphBuilderResult(relation_extraction=_make_triplets(n, rng, embedding_dimension=8)),
+            lambda data: _run_step(Neo4jExporter(neo4j_graph=FakeGraph()), data),
+        ),
+    ]
+
+
+def fit_exponent(timings: Dict[int, float], min_seconds: float = 1e-3) -> Optional[float]:
+    """Least-squares slope of log(time) over log(size)."""
+    points = [(math.log(size), math.log(seconds)) for size, seconds in timings.items() if seconds >= min_seconds]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def measure_stage(stage: Stage, sizes: List[int], repeats: int = 1, max_seconds: float = 120.0, seed: int = 0) -> Dict[str, Any]:
+    timings = {}
+    skipped = []
+
+    for index, size in enumerate(sorted(sizes)):
+        if timings:
+            last_size = max(timings)
+            exponent = max(fit_exponent(timings) or 1.0, 1.0)
+            projected = timings[last_size] * (size / last_size) ** exponent
+            if projected > max_seconds:
+                skipped.append(size)
+                continue
+
+        best = None
+        for repeat in range(repeats):
+            rng = random.Random(seed + index * 1000 + repeat)
+            data = stage.setup(size, rng)
+            start = time.perf_counter()
+            stage.run(data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[size] = best
+
+    exponent = fit_exponent(timings)
+    return {
+        "timings": {str(size): seconds for size, seconds in timings.items()},
+        "skipped_sizes": skipped,
+        "exponent": exponent,
+        "max_exponent": stage.max_exponent,
+        "passed": exponent is None or exponent <= stage.max_exponent,
+    }
+
+
+def run_scaling(sizes: List[int] = (1000, 10000, 100000),
+                stages: List[str] = None,
+                repeats: int = 1,
+                max_seconds: float = 120.0,
+                seed: int = 0) -> Dict[str, Any]:
+    selected = [stage for stage in default_stages() if not stages or stage.name in stages]
+    return {
+        "revision": git_revision(),
+        "sizes": list(sizes),
+        "stages": {
+            stage.name: measure_stage(stage, list(sizes), repeats=repeats, max_seconds=max_seconds, seed=seed)
+            for stage in selected
+        },
+    }
+
+
+def compare_timings(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Ratio current/baseline per stage and size measured in both reports."""
+    ratios = {}
+    for name, stage in current["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        ratios[name] = {
+            size: seconds / old["timings"][size]
+            for size, seconds in stage["timings"].items()
+            if old["timings"].get(size)
+        }
+    return ratios
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="CPU-stage scaling microbenchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--stages", nargs="+", help="Only run these stages")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=120.0,
+                        help="Skip sizes whose projected time exceeds this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write raw timings to this JSON file")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_scaling(args.sizes, args.stages, args.repeats, args.max_seconds, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = []
+    for name, stage in report["stages"].items():
+        exponent = "n/a" if stage["exponent"] is None else f"{stage['exponent']:.2f}"
+        status = "ok" if stage["passed"] else "FAIL"
+        timings = ", ".join(f"{size}: {seconds:.3f}s" for size, seconds in stage["timings"].items())
+        skipped = f" (skipped {stage['skipped_sizes']})" if stage["skipped_sizes"] else ""
+        print(f"{status:4} {name:24} k={exponent:5} limit={stage['max_exponent']} [{timings}]{skipped}")
+        if not stage["passed"]:
+            failed.append(name)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(json.dumps(compare_timings(json.load(f), report), indent=2))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
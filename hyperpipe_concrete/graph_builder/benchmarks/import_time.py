@@ -0,0 +1,113 @@
+"""Cold import-time budget.
+
+Each target is imported in fresh interpreters with ``-X importtime``; the
+run fails when the median cumulative import time exceeds the target's
+budget, or when a module that must stay lazy was loaded.
+
+    python -m hyperpipe_concrete.graph_builder.benchmarks.import_time \
+        --repeats 5 --output import_time.json
+"""
+from typing import Dict, Any, List, Tuple
+from dataclasses import dataclass
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .common import git_revision
+
+
+# Only loaded when a cleaner checks an entity or a graph is connected
+HEAVY_OPTIONAL = ('dateparser', 'price_parser', 'neo4j', 'tiktoken')
+
+
+@dataclass
+class Target:
+    module: str
+    budget_ms: float
+    forbidden: Tuple[str, ...]
+
+
+TARGETS = [
+    Target('hyperpipe_concrete.graph_builder', 150.0,
+           HEAVY_OPTIONAL + ('rapidfuzz', 'numpy', 'pydantic', 'hyperpipe_core')),
+    Target('hyperpipe_concrete.graph_builder.sharding', 800.0, HEAVY_OPTIONAL + ('rapidfuzz',)),
+    Target('hyperpipe_concrete.graph_builder.__main__', 1000.0, HEAVY_OPTIONAL),
+]
+
+PROBE = "import {module}, json, sys; print(json.dumps(sorted(sys.modules)))"
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """Returns the cumulative import time of ``module`` in ms, the self time
+    per top-level package and the modules loaded, from a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module)],
+        capture_output=True, text=True, env=os.environ.copy(), check=True,
+    )
+    total_us = 0
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0.0) + int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+    return total_us / 1000, packages, json.loads(completed.stdout)
+
+
+def run_target(target: Target, repeats: int) -> Dict[str, Any]:
+    totals = []
+    packages: Dict[str, float] = {}
+    loaded: List[str] = []
+    for _ in range(repeats):
+        total, packages, loaded = measure_import(target.module)
+        totals.append(total)
+    median = statistics.median(totals)
+    leaked = sorted(name for name in target.forbidden if name in loaded)
+    return {
+        'module': target.module,
+        'median_ms': median,
+        'min_ms': min(totals),
+        'budget_ms': target.budget_ms,
+        'modules_loaded': len(loaded),
+        'heaviest': dict(sorted(packages.items(), key=lambda item: -item[1])[:8]),
+        'leaked': leaked,
+        'ok': median <= target.budget_ms and not leaked,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold import-time budget")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='multiply every budget, for slow CI machines')
+    parser.add_argument('--output', help='write the results as JSON')
+    args = parser.parse_args(argv)
+
+    results = []
+    for target in TARGETS:
+        budgeted = Target(target.module, target.budget_ms * args.budget_scale, target.forbidden)
+        result = run_target(budgeted, args.repeats)
+        results.append(result)
+        status = 'ok' if result['ok'] else 'FAIL'
+        print(f"{status:4} {result['module']:<45} {result['median_ms']:8.1f} ms "
+              f"(budget {result['budget_ms']:.0f} ms, {result['modules_loaded']} modules)")
+        if result['leaked']:
+            print(f"     loaded eagerly: {', '.join(result['leaked'])}")
+        heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in result['heaviest'].items())
+        print(f"     heaviest (self ms): {heaviest}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'revision': git_revision(), 'python': sys.version, 'targets': results}, f, indent=2)
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
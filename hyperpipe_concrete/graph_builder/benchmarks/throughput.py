@@ -0,0 +1,232 @@
+"""End-to-end throughput benchmark for ``build_graph`` on offline stand-ins.
+
+    python -m hyperpipe_concrete.graph_builder.benchmarks.throughput \
+        --chunks 200 --llm-latency 0.2 --output bench.json --compare baseline.json
+"""
+from typing import Dict, Any
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+
+from .common import git_revision
+from .corpus import make_corpus
+from ..standins import FakeLLM, FakeEmbedder, FakeGraph, ReplayLLM
+
+
+def _rate(count: float, seconds: float) -> float:
+    return count / seconds if seconds > 0 else 0.0
+
+
+async def run_benchmark(num_chunks: int = 100,
+                        sentences_per_chunk: int = 4,
+                        vocabulary_size: int = 200,
+                        duplicate_rate: float = 0.0,
+                        llm_latency: float = 0.05,
+                        llm_jitter: float = 0.05,
+                        llm_failure_rate: float = 0.0,
+                        llm_malformed_rate: float = 0.0,
+                        embedder_latency: float = 0.005,
+                        embedding_dimension: int = 64,
+                        graph_latency: float = 0.002,
+                        replay_path: str = None,
+                        config: Dict[str, Any] = None,
+                        trace_memory: bool = True,
+                        trace_path: str = None,
+                        trace_format: str = "chrome",
+                        seed: int = 0) -> Dict[str, Any]:
+    from ..__main__ import build_graph
+
+    corpus = make_corpus(
+        num_chunks=num_chunks,
+        sentences_per_chunk=sentences_per_chunk,
+        vocabulary_size=vocabulary_size,
+        duplicate_rate=duplicate_rate,
+        seed=seed,
+    )
+    fake_llm = FakeLLM(
+        latency=llm_latency,
+        jitter=llm_jitter,
+        failure_rate=llm_failure_rate,
+        malformed_rate=llm_malformed_rate,
+        seed=seed,
+    )
+    config = dict(config or {})
+    config["pipeline"] = {
+        **config.get("pipeline", {}),
+        "tracer": {
+            **config.get("pipeline", {}).get("tracer", {}),
+            "enabled": True,
+            "export_path": trace_path,
+            "format": trace_format,
+        },
+    }
+
+    llm = ReplayLLM(replay_path, fallback=fake_llm) if replay_path else fake_llm
+    embedder = FakeEmbedder(dimension=embedding_dimension, latency=embedder_latency, seed=seed)
+    graph = FakeGraph(read_latency=graph_latency, write_latency=graph_latency, seed=seed)
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = await build_graph(corpus, graph, llm, embedder, config=config)
+    wall_time = time.perf_counter() - start
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    metrics = result.metrics.summary()
+    num_triplets = len(result.relation_extraction)
+    num_entities = len(result.entity_extraction)
+
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {
+            "num_chunks": num_chunks,
+            "sentences_per_chunk": sentences_per_chunk,
+            "vocabulary_size": vocabulary_size,
+            "duplicate_rate": duplicate_rate,
+            "llm_latency": llm_latency,
+            "llm_jitter": llm_jitter,
+            "llm_failure_rate": llm_failure_rate,
+            "llm_malformed_rate": llm_malformed_rate,
+            "embedder_latency": embedder_latency,
+            "graph_latency": graph_latency,
+            "replay_path": replay_path,
+            "config": config,
+            "seed": seed,
+        },
+        "wall_time": wall_time,
+        "throughput": {
+            "chunks_per_s": _rate(num_chunks, wall_time),
+            "triplets_per_s": _rate(num_triplets, wall_time),
+            "entities_per_s": _rate(num_entities, wall_time),
+        },
+        "output": {
+            "entities": num_entities,
+            "triplets": num_triplets,
+        },
+        "stages": {
+            "llm": {
+                step: {
+                    "busy_time": summary["latency"]["total"],
+                    "calls": summary["calls"],
+                    "p50_latency": summary["latency"]["p50"],
+                    "p99_latency": summary["latency"]["p99"],
+                    "prompt_tokens": summary["prompt_tokens"],
+                }
+                for step, summary in metrics["llm"]["by_step"].items()
+            },
+            "steps": metrics["stages"],
+            "embedding": {"busy_time": embedder.busy_time},
+            "graph_read": {"busy_time": graph.read_time},
+            "graph_write": {"busy_time": graph.write_time},
+        },
+        "calls": {
+            "llm": fake_llm.stats(),
+            "replay": llm.stats() if replay_path else None,
+            "embedder": embedder.stats(),
+            "graph": graph.stats(),
+        },
+        "peak_memory_bytes": peak_memory,
+        "metrics": metrics,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Relative change of the headline numbers between two reports."""
+    def pick(report):
+        values = {
+            "wall_time": report["wall_time"],
+            "chunks_per_s": report["throughput"]["chunks_per_s"],
+            "triplets_per_s": report["throughput"]["triplets_per_s"],
+            "llm_calls": report["calls"]["llm"]["calls"],
+            "embedder_calls": report["calls"]["embedder"]["calls"],
+            "graph_queries": report["calls"]["graph"]["reads"] + report["calls"]["graph"]["writes"],
+        }
+        if report.get("peak_memory_bytes") is not None:
+            values["peak_memory_bytes"] = report["peak_memory_bytes"]
+        return values
+
+    old = pick(baseline)
+    new = pick(current)
+    return {
+        name: {
+            "baseline": old[name],
+            "current": new[name],
+            "change": (new[name] - old[name]) / old[name] if old[name] else 0.0,
+        }
+        for name in new if name in old
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark build_graph on offline stand-ins")
+    parser.add_argument("--chunks", type=int, default=100)
+    parser.add_argument("--sentences", type=int, default=4)
+    parser.add_argument("--vocabulary", type=int, default=200)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--embedder-latency", type=float, default=0.005)
+    parser.add_argument("--graph-latency", type=float, default=0.002)
+    parser.add_argument("--replay", help="JSONL file recorded with RecordingLLM")
+    parser.add_argument("--config", help="JSON file with a build_graph config")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc peak memory tracking")
+    parser.add_argument("--trace", help="Write the step timeline to this file")
+    parser.add_argument("--trace-format", choices=["chrome", "otel"], default="chrome")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+
+    report = asyncio.run(run_benchmark(
+        num_chunks=args.chunks,
+        sentences_per_chunk=args.sentences,
+        vocabulary_size=args.vocabulary,
+        duplicate_rate=args.duplicate_rate,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        llm_failure_rate=args.llm_failure_rate,
+        llm_malformed_rate=args.llm_malformed_rate,
+        embedder_latency=args.embedder_latency,
+        graph_latency=args.graph_latency,
+        replay_path=args.replay,
+        config=config,
+        trace_memory=not args.no_memory,
+        trace_path=args.trace,
+        trace_format=args.trace_format,
+        seed=args.seed,
+    ))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(json.dumps({
+        "wall_time": report["wall_time"],
+        "throughput": report["throughput"],
+        "steps": {name: stage["busy_time"] for name, stage in report["stages"]["steps"].items()},
+        "calls": report["calls"],
+        "peak_memory_bytes": report["peak_memory_bytes"],
+    }, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(json.dumps(compare_reports(baseline, report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,67 @@
+from typing import List, Optional
+from collections import OrderedDict
+from functools import lru_cache
 from hyperpipe_core import Step
-import dateparser
-from price_parser import Price
 import re
 
+
+# dateparser builds its timezone tables on import (about half a second), so
+# both parsers are only loaded once a cleaner actually checks an entity
+@lru_cache(maxsize=1)
+def _dateparser():
+    import dateparser
+    return dateparser
+
+
+@lru_cache(maxsize=1)
+def _price_class():
+    from price_parser import Price
+    return Price
+
+
+# Most recently checked names kept per cleaner; steps live for a whole run
+DATE_CACHE_SIZE = 10_000
+
 class Cleaner(Step):
     
     def __init__(
         self,
         name: str = "BaseCleaner",
         remove_punctuation: bool = True,
-        normalize_case: bool = True
+        normalize_case: bool = True,
+        date_languages: Optional[List[str]] = None
     ):
         super().__init__()
         self.name = name
         self.remove_punctuation = remove_punctuation
         self.normalize_case = normalize_case
+        # None lets dateparser detect the language; restricting it avoids
+        # probing every installed locale per name
+        self.date_languages = list(date_languages) if date_languages else None
+        self._date_cache = OrderedDict()
 
 
     def _detect_date_entity(self, entity) -> bool:
+        if entity.name in self._date_cache:
+            self._date_cache.move_to_end(entity.name)
+            return self._date_cache[entity.name]
+        
+        is_date = False
         try:
-            parsed_date = dateparser.parse(entity.name, settings={'STRICT_PARSING': False})
+            parsed_date = _dateparser().parse(entity.name, languages=self.date_languages, settings={'STRICT_PARSING': False})
             if parsed_date:
-                return True
+                is_date = True
         except Exception as e:
             pass
         
-        return False
+        self._date_cache[entity.name] = is_date
+        if len(self._date_cache) > DATE_CACHE_SIZE:
+            self._date_cache.popitem(last=False)
+        return is_date
     
     def _detect_price_entity(self, entity) -> bool:
         try:
-            parsed_price = Price.fromstring(entity.name)
+            parsed_price = _price_class().fromstring(entity.name)
             if parsed_price.amount is not None:
                 return True
         except Exception as e:
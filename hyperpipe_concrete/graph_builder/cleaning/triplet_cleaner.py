@@ -1,3 +1,4 @@
+from typing import List, Optional
 from .base_cleaner import Cleaner
 from ..models import GraphBuilderResult
 
@@ -6,9 +7,10 @@ class TripletCleaner(Cleaner):
         self,
         name: str = "TripletCleaner",
         remove_punctuation: bool = True,
-        normalize_case: bool = True
+        normalize_case: bool = True,
+        date_languages: Optional[List[str]] = None
     ):
-        super().__init__(name=name, remove_punctuation=remove_punctuation, normalize_case=normalize_case)
+        super().__init__(name=name, remove_punctuation=remove_punctuation, normalize_case=normalize_case, date_languages=date_languages)
 
     async def execute(self, result: GraphBuilderResult) -> GraphBuilderResult:
         
@@ -0,0 +1,8 @@
+from .neo4j_graph import AsyncNeo4jGraph, GuardedGraph, QueryTimings, as_async_graph
+
+__all__ = [
+    'AsyncNeo4jGraph',
+    'GuardedGraph',
+    'QueryTimings',
+    'as_async_graph'
+]
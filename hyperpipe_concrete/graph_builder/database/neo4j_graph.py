@@ -0,0 +1,184 @@
+from typing import List, Dict, Any, Optional
+import asyncio
+import os
+import time
+
+from ..metrics import percentile
+
+
+class QueryTimings:
+    """Latency and outcome counters for one kind of graph operation."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.wait_time = 0.0
+        self.latencies: List[float] = []
+
+    def record(self, latency: float, wait: float, attempts: int, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += 1 if error else 0
+        self.retries += max(attempts - 1, 0)
+        self.total_time += latency
+        self.wait_time += wait
+        self.latencies.append(latency)
+        if len(self.latencies) > self.window:
+            del self.latencies[:len(self.latencies) - self.window]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "total_time": self.total_time,
+            "wait_time": self.wait_time,
+            "p50": percentile(self.latencies, 50),
+            "p99": percentile(self.latencies, 99),
+            "max": max(self.latencies, default=0.0),
+        }
+
+
+class GuardedGraph:
+    """Bounds read/write concurrency and records query timings around any
+    object exposing async ``read_query``/``write_query``."""
+
+    def __init__(self, graph, max_concurrent_reads: int = 32, max_concurrent_writes: int = 4):
+        self.graph = graph
+        self.max_concurrent_reads = max_concurrent_reads
+        self.max_concurrent_writes = max_concurrent_writes
+        self.timings = {"read": QueryTimings(), "write": QueryTimings()}
+        self._semaphores = None
+        self._loop = None
+
+    def _semaphore(self, operation: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {
+                "read": asyncio.Semaphore(self.max_concurrent_reads),
+                "write": asyncio.Semaphore(self.max_concurrent_writes),
+            }
+        return self._semaphores[operation]
+
+    async def _run(self, operation: str, query: str, params: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        queued = time.perf_counter()
+        async with self._semaphore(operation):
+            start = time.perf_counter()
+            attempts = [0]
+            try:
+                records = await self._execute(operation, query, params or {}, attempts)
+            except Exception:
+                self.timings[operation].record(time.perf_counter() - start, start - queued, attempts[0], error=True)
+                raise
+            self.timings[operation].record(time.perf_counter() - start, start - queued, attempts[0])
+            return records
+
+    async def _execute(self, operation: str, query: str, params: Dict[str, Any], attempts: List[int]) -> List[Dict[str, Any]]:
+        attempts[0] += 1
+        if operation == "read":
+            return await self.graph.read_query(query, params)
+        return await self.graph.write_query(query, params=params)
+
+    async def read_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return await self._run("read", query, params)
+
+    async def write_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return await self._run("write", query, params)
+
+    async def close(self) -> None:
+        close = getattr(self.graph, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+    def stats(self) -> Dict[str, Any]:
+        return {operation: timings.stats() for operation, timings in self.timings.items()}
+
+
+class AsyncNeo4jGraph(GuardedGraph):
+    """Graph adapter on the official async driver.
+
+    Queries run in managed transactions (``execute_read``/``execute_write``),
+    so transient errors and lost connections are retried by the driver for up
+    to ``max_transaction_retry_time`` seconds. Reads are routed to readers in
+    a cluster.
+    """
+
+    def __init__(self,
+                 uri: str,
+                 user: str = None,
+                 password: str = None,
+                 database: str = None,
+                 max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 60.0,
+                 max_transaction_retry_time: float = 30.0,
+                 max_concurrent_reads: int = 32,
+                 max_concurrent_writes: int = 4,
+                 query_timeout: float = None,
+                 driver=None):
+        self.uri = uri
+        self.database = database
+        self.query_timeout = query_timeout
+        if driver is None:
+            # Imported here so extract-only workers never load the driver
+            from neo4j import AsyncGraphDatabase
+        self.driver = driver or AsyncGraphDatabase.driver(
+            uri,
+            auth=(user, password) if user else None,
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+            max_transaction_retry_time=max_transaction_retry_time,
+        )
+        super().__init__(None, max_concurrent_reads=max_concurrent_reads, max_concurrent_writes=max_concurrent_writes)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AsyncNeo4jGraph":
+        uri = kwargs.pop("uri", None) or os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+        user = kwargs.pop("user", None) or os.environ.get("NEO4J_USERNAME", os.environ.get("NEO4J_USER"))
+        password = kwargs.pop("password", None) or os.environ.get("NEO4J_PASSWORD")
+        database = kwargs.pop("database", None) or os.environ.get("NEO4J_DATABASE")
+        return cls(uri, user=user, password=password, database=database, **kwargs)
+
+    async def _execute(self, operation: str, query: str, params: Dict[str, Any], attempts: List[int]) -> List[Dict[str, Any]]:
+        from neo4j import Query
+
+        async def work(tx):
+            attempts[0] += 1
+            result = await tx.run(Query(query, timeout=self.query_timeout), params)
+            return await result.data()
+
+        async with self.driver.session(database=self.database) as session:
+            if operation == "read":
+                return await session.execute_read(work)
+            return await session.execute_write(work)
+
+    async def verify_connectivity(self) -> None:
+        await self.driver.verify_connectivity()
+
+    async def close(self) -> None:
+        await self.driver.close()
+
+    async def __aenter__(self) -> "AsyncNeo4jGraph":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+def as_async_graph(graph=None, **kwargs):
+    """Returns ``graph`` behind the shared access layer. ``None`` connects with
+    the NEO4J_* environment variables; foreign graph objects are wrapped in a
+    ``GuardedGraph``."""
+    if isinstance(graph, GuardedGraph):
+        return graph
+    if graph is None:
+        return AsyncNeo4jGraph.from_env(**kwargs)
+    return GuardedGraph(
+        graph,
+        max_concurrent_reads=kwargs.get("max_concurrent_reads", 32),
+        max_concurrent_writes=kwargs.get("max_concurrent_writes", 4),
+    )
@@ -0,0 +1,196 @@
+"""Near-duplicate chunk detection.
+
+Chunks are compared by MinHash signatures over word shingles, and candidate
+pairs are found with locality sensitive hashing (banded signatures), so a
+corpus is deduplicated in roughly linear time. A duplicate is always mapped
+to the earliest matching chunk, which is extracted normally; the duplicate
+reuses that extraction instead of calling the LLM again.
+
+Near-duplicates can differ in exactly the words that matter (two filings that
+only swap the company name score well above 0.9), so results copied onto a
+near-duplicate keep only the entities and triplets whose names occur in the
+duplicate's own text.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from hyperpipe_core import Step
+
+from .models import Entity, Triplet, GraphBuilderResult
+
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def lsh_params(threshold: float, num_perm: int, min_recall: float = 0.99) -> Tuple[int, int]:
+    """Returns ``(bands, rows)`` with the sharpest S-curve that still finds
+    pairs at ``threshold`` with probability ``min_recall``."""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        recall = 1 - (1 - threshold ** rows) ** bands
+        if recall >= min_recall:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateDetector:
+    """MinHash/LSH detector over chunk texts.
+
+    ``threshold`` is the estimated Jaccard similarity of word
+    ``shingle_size``-grams above which two chunks count as duplicates.
+    Identical texts (after case and whitespace normalization) are matched
+    exactly without computing signatures; with a ``threshold`` of 1.0 only
+    those are matched.
+    """
+
+    def __init__(self, threshold: float = 1.0, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.exact_only = threshold >= 1.0
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+
+    def _tokens(self, text: str) -> List[str]:
+        return WORD_PATTERN.findall(text.lower())
+
+    def signature(self, tokens: Sequence[str]) -> np.ndarray:
+        size = min(self.shingle_size, len(tokens))
+        shingles = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) & MERSENNE_PRIME for shingle in shingles),
+            dtype=np.int64, count=len(shingles),
+        )
+        return ((np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME).min(axis=0)
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+    def find_duplicates(self, texts: Sequence[str]) -> Dict[int, Tuple[int, float]]:
+        """Maps the position of every duplicate text to ``(position of the
+        chunk it duplicates, estimated similarity)``."""
+        duplicates: Dict[int, Tuple[int, float]] = {}
+        exact: Dict[bytes, int] = {}
+        signatures: Dict[int, np.ndarray] = {}
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+        for position, text in enumerate(texts):
+            tokens = self._tokens(text or "")
+            if not tokens:
+                continue
+            digest = hashlib.sha1(" ".join(tokens).encode("utf-8")).digest()
+            if digest in exact:
+                duplicates[position] = (exact[digest], 1.0)
+                continue
+            exact[digest] = position
+            if self.exact_only:
+                continue
+
+            signature = self.signature(tokens)
+            keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+            candidates = {candidate for band, key in enumerate(keys) for candidate in buckets[band].get(key, ())}
+            best: Optional[Tuple[int, float]] = None
+            for candidate in candidates:
+                score = self.similarity(signature, signatures[candidate])
+                if score >= self.threshold and (best is None or score > best[1] or (score == best[1] and candidate < best[0])):
+                    best = (candidate, score)
+            if best is not None:
+                duplicates[position] = best
+                continue
+
+            # Only originals are indexed, so a duplicate always points at an
+            # extracted chunk
+            signatures[position] = signature
+            for band, key in enumerate(keys):
+                buckets[band].setdefault(key, []).append(position)
+        return duplicates
+
+
+def _words(text: str) -> str:
+    return " " + " ".join(WORD_PATTERN.findall((text or "").lower())) + " "
+
+
+def _mentioned(entity: Entity, text_words: str) -> bool:
+    name_words = _words(entity.name)
+    return not name_words.strip() or name_words in text_words
+
+
+def _retag_entity(entity: Entity, source_chunk_id: str, chunk_id: str) -> Entity:
+    if entity.metadata is None or entity.metadata.chunk_id != source_chunk_id:
+        return entity.model_copy(update={"alternatives": []})
+    return entity.model_copy(update={
+        "alternatives": [],
+        "metadata": entity.metadata.model_copy(update={"chunk_id": chunk_id}),
+    })
+
+
+def replay_duplicates(result: GraphBuilderResult,
+                      duplicates: Dict[str, List[str]],
+                      near_texts: Optional[Dict[str, str]] = None) -> Tuple[List[Entity], List[Triplet]]:
+    """Copies the entities and triplets extracted from each chunk in
+    ``duplicates`` (chunk uid -> duplicate uids), re-tagged with the
+    duplicate's chunk id.
+
+    ``near_texts`` maps the uids of near (not identical) duplicates to their
+    text; for those, entities and triplets whose head or tail name does not
+    occur in that text are not copied.
+    """
+    entities, triplets = [], []
+    if not duplicates:
+        return entities, triplets
+    near_words = {chunk_id: _words(text) for chunk_id, text in (near_texts or {}).items()}
+
+    def mentioned(chunk_id: str, *mentions: Entity) -> bool:
+        text_words = near_words.get(chunk_id)
+        return text_words is None or all(_mentioned(entity, text_words) for entity in mentions)
+
+    for entity in result.entity_extraction:
+        source = entity.metadata.chunk_id if entity.metadata else None
+        for chunk_id in duplicates.get(source, ()):
+            if mentioned(chunk_id, entity):
+                entities.append(_retag_entity(entity, source, chunk_id))
+    for triplet in result.relation_extraction:
+        # Extractors tag the chunk on the triplet's entities
+        source = triplet.metadata.chunk_id or (triplet.head.metadata.chunk_id if triplet.head.metadata else None)
+        for chunk_id in duplicates.get(source, ()):
+            if not mentioned(chunk_id, triplet.head, triplet.tail):
+                continue
+            metadata = triplet.metadata
+            if metadata.chunk_id is not None:
+                metadata = metadata.model_copy(update={"chunk_id": chunk_id})
+            triplets.append(triplet.model_copy(update={
+                "head": _retag_entity(triplet.head, source, chunk_id),
+                "relation": triplet.relation.model_copy(),
+                "tail": _retag_entity(triplet.tail, source, chunk_id),
+                "metadata": metadata,
+            }))
+    return entities, triplets
+
+
+class DuplicateReuseStep(Step):
+    """Adds the results of the batch's duplicate chunks, copied from the
+    chunks they duplicate, right after extraction."""
+
+    def __init__(self, duplicates: Dict[str, List[str]], near_texts: Optional[Dict[str, str]] = None, name: str = "DuplicateReuse"):
+        self.name = name
+        self.duplicates = duplicates
+        self.near_texts = near_texts
+
+    def execute(self, result: GraphBuilderResult) -> Tuple[List[Entity], List[Triplet]]:
+        entities, triplets = replay_duplicates(result, self.duplicates, self.near_texts)
+        self.log.info(f"Reused {len(entities)} entities and {len(triplets)} triplets for duplicate chunks")
+        return entities, triplets
+
+    def save_result(self, step_result: Tuple[List[Entity], List[Triplet]], result: GraphBuilderResult) -> None:
+        entities, triplets = step_result
+        result.entity_extraction.extend(entities)
+        result.relation_extraction.extend(triplets)
+        result.metrics.increment("dedup.entities_reused", len(entities))
+        result.metrics.increment("dedup.triplets_reused", len(triplets))
@@ -1,5 +1,7 @@
 from .triplet_embedder import TripletEmbedder
+from .micro_batcher import EmbeddingMicroBatcher
 
 __all__ = [
-    'TripletEmbedder'
+    'TripletEmbedder',
+    'EmbeddingMicroBatcher'
 ]
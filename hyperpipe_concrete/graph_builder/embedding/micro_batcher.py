@@ -0,0 +1,146 @@
+from typing import List, Dict, Any, Optional
+from collections import Counter
+import asyncio
+
+from ..utils.packing import estimate_tokens
+
+
+class EmbeddingMicroBatcher:
+    """Coalesces concurrent ``embed`` requests into right-sized embedder calls.
+
+    Exposes the same ``embed(texts)`` coroutine as the wrapped embedder, so it
+    can be passed anywhere an embedder is expected and shared between steps
+    and ``build_graph`` runs. Pending texts are flushed once a call would reach
+    ``max_batch_size`` items or ``max_batch_tokens`` tokens, or ``max_wait``
+    seconds after the first text was queued. At most ``max_concurrency``
+    embedder calls are in flight; identical pending texts share one slot.
+    """
+
+    def __init__(self,
+                 embedder,
+                 max_batch_size: int = 256,
+                 max_batch_tokens: int = 8000,
+                 max_wait: float = 0.02,
+                 max_concurrency: int = 4):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait
+        self.max_concurrency = max_concurrency
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._pending_tokens: Dict[str, int] = {}
+        self._pending_token_count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+
+        self.requests = 0
+        self.texts = 0
+        self.coalesced = 0
+        self.calls = 0
+        self.failed_calls = 0
+        self.flushes = Counter()
+        self.batch_sizes: List[int] = []
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._pending = {}
+            self._pending_tokens = {}
+            self._pending_token_count = 0
+            self._timer = None
+            self._tasks = set()
+
+    async def embed(self, texts: List[str]) -> List[Any]:
+        if not texts:
+            return []
+        self._bind_loop()
+        self.requests += 1
+        self.texts += len(texts)
+
+        futures = []
+        for text in texts:
+            future = self._pending.get(text)
+            if future is None:
+                tokens = estimate_tokens(text)
+                if self._pending and (
+                    len(self._pending) >= self.max_batch_size
+                    or self._pending_token_count + tokens > self.max_batch_tokens
+                ):
+                    self._flush("size")
+                future = self._loop.create_future()
+                self._pending[text] = future
+                self._pending_tokens[text] = tokens
+                self._pending_token_count += tokens
+            else:
+                self.coalesced += 1
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size or self._pending_token_count >= self.max_batch_tokens:
+            self._flush("size")
+        elif self._pending and self._timer is None:
+            self._timer = self._loop.call_later(self.max_wait, self._flush, "timeout")
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self, reason: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = {}
+        self._pending_tokens = {}
+        self._pending_token_count = 0
+        self.flushes[reason] += 1
+
+        task = self._loop.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        async with self._semaphore:
+            self.calls += 1
+            self.batch_sizes.append(len(texts))
+            try:
+                embeddings = await self.embedder.embed(texts)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"Embedder returned {len(embeddings)} embeddings for {len(texts)} texts")
+            except Exception as e:
+                self.failed_calls += 1
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for text, embedding in zip(texts, embeddings):
+            future = batch[text]
+            if not future.done():
+                future.set_result(embedding)
+
+    async def flush(self) -> None:
+        """Sends everything still pending and waits for in-flight calls."""
+        if self._loop is None:
+            return
+        self._flush("manual")
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "coalesced": self.coalesced,
+            "calls": self.calls,
+            "failed_calls": self.failed_calls,
+            "flushes": dict(self.flushes),
+            "mean_batch_size": sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else 0.0,
+            "max_batch_size": max(self.batch_sizes, default=0),
+        }
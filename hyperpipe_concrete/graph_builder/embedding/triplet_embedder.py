@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Tuple, Optional
 from ..models import Entity, Relationship, Triplet, GraphBuilderResult
 from hyperpipe_core import AsyncStep
 import asyncio
+import numpy as np
 
 class TripletEmbedder(AsyncStep):
     def __init__(
@@ -10,16 +11,34 @@ class TripletEmbedder(AsyncStep):
         name: str = "TripletEmbedder",
         entity_name_weight: float = 0.6,
         entity_label_weight: float = 0.4,
+        normalize: bool = False,
+        truncate_dimension: Optional[int] = None,
     ):
         super().__init__()
         self.name = name
         self.embedder = embedder
         self.entity_name_weight = entity_name_weight
         self.entity_label_weight = entity_label_weight
+        self.normalize = normalize
+        self.truncate_dimension = truncate_dimension
 
-            
+    def _to_matrix(self, embeddings: List) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if self.truncate_dimension:
+            matrix = matrix[:, :self.truncate_dimension]
+        return matrix
+
+    def _normalize_rows(self, matrix: np.ndarray) -> np.ndarray:
+        if not self.normalize:
+            return matrix
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @staticmethod
+    def _valid_rows(*embedding_lists: List) -> List[int]:
+        return [i for i, row in enumerate(zip(*embedding_lists)) if all(embedding is not None for embedding in row)]
 
-    
 
     def extract_entities_from_triplets(self, triplets: List[Triplet]) -> List[Entity]:
         entities_list = []
@@ -37,19 +56,20 @@ class TripletEmbedder(AsyncStep):
                 relationships_list.append(triplet.relation)
         return relationships_list
 
+    @staticmethod
+    def group_by_identity(items: List) -> Tuple[List, List[List]]:
+        # Same identity as Entity.__eq__ / Relationship.__eq__, hashed instead of scanned
+        groups = {}
+        for item in items:
+            groups.setdefault((item.name, item.label), []).append(item)
+        grouped = list(groups.values())
+        return [group[0] for group in grouped], grouped
+
     def deduplicate_entities(self, entities: List[Entity]) -> List[Entity]:
-        unique_entities = []
-        for entity in entities:
-            if entity not in unique_entities:
-                unique_entities.append(entity)
-        return unique_entities
+        return self.group_by_identity(entities)[0]
 
     def deduplicate_relationships(self, relationships: List[Relationship]) -> List[Relationship]:
-        unique_relationships = []
-        for relationship in relationships:
-            if relationship not in unique_relationships:
-                unique_relationships.append(relationship)
-        return unique_relationships
+        return self.group_by_identity(relationships)[0]
 
 
 
@@ -67,17 +87,28 @@ class TripletEmbedder(AsyncStep):
         name_task = self.embedder.embed(names)
         label_task = self.embedder.embed(labels)
         name_embeddings, label_embeddings = await asyncio.gather(name_task, label_task)
-        
-        
-        for i, entity in enumerate(entities_to_process):
-            if name_embeddings[i] is not None and label_embeddings[i] is not None:
-                combined_embedding = (
-                    self.entity_name_weight * name_embeddings[i] +
-                    self.entity_label_weight * label_embeddings[i]
-                )
-                entity.embedding = combined_embedding.tolist()
-                entity.label_embedding = label_embeddings[i].tolist()
-                entity.name_embedding = name_embeddings[i].tolist()
+
+        valid = self._valid_rows(name_embeddings, label_embeddings)
+        if not valid:
+            return entities
+        if len(valid) < len(entities_to_process):
+            entities_to_process = [entities_to_process[i] for i in valid]
+            name_embeddings = [name_embeddings[i] for i in valid]
+            label_embeddings = [label_embeddings[i] for i in valid]
+
+        name_matrix = self._to_matrix(name_embeddings)
+        label_matrix = self._to_matrix(label_embeddings)
+        combined = self._normalize_rows(
+            self.entity_name_weight * name_matrix + self.entity_label_weight * label_matrix
+        )
+        name_matrix = self._normalize_rows(name_matrix)
+        label_matrix = self._normalize_rows(label_matrix)
+
+        # Rows are views into the batch matrices, no per-entity copies
+        for entity, embedding, name_embedding, label_embedding in zip(entities_to_process, combined, name_matrix, label_matrix):
+            entity.embedding = embedding
+            entity.name_embedding = name_embedding
+            entity.label_embedding = label_embedding
      
         return entities
 
@@ -90,10 +121,17 @@ class TripletEmbedder(AsyncStep):
         
         names = [rel.name.lower() for rel in relationships_to_process]
         name_embeddings = await self.embedder.embed(names)
-        
-        for i, relationship in enumerate(relationships_to_process):
-            if name_embeddings[i] is not None:
-                relationship.embedding = name_embeddings[i].tolist()
+
+        valid = self._valid_rows(name_embeddings)
+        if not valid:
+            return relationships
+        if len(valid) < len(relationships_to_process):
+            relationships_to_process = [relationships_to_process[i] for i in valid]
+            name_embeddings = [name_embeddings[i] for i in valid]
+
+        name_matrix = self._normalize_rows(self._to_matrix(name_embeddings))
+        for relationship, embedding in zip(relationships_to_process, name_matrix):
+            relationship.embedding = embedding
      
         return relationships
 
@@ -104,37 +142,8 @@ class TripletEmbedder(AsyncStep):
         
         self.log.info(f"Processing {len(entities_from_triplets)} entities and {len(relationships_from_triplets)} relationships for embedding")
     
-        unique_entities = []
-        entity_groups = [] 
-        
-        for entity in entities_from_triplets:
-            found_group = None
-            for i, unique_entity in enumerate(unique_entities):
-                if entity == unique_entity:
-                    found_group = i
-                    break
-            
-            if found_group is not None:
-                entity_groups[found_group].append(entity)
-            else:
-                unique_entities.append(entity)
-                entity_groups.append([entity])
-        
-        unique_relationships = []
-        relationship_groups = []
-        
-        for relationship in relationships_from_triplets:
-            found_group = None
-            for i, unique_relationship in enumerate(unique_relationships):
-                if relationship == unique_relationship:
-                    found_group = i
-                    break
-            
-            if found_group is not None:
-                relationship_groups[found_group].append(relationship)
-            else:
-                unique_relationships.append(relationship)
-                relationship_groups.append([relationship])
+        unique_entities, entity_groups = self.group_by_identity(entities_from_triplets)
+        unique_relationships, relationship_groups = self.group_by_identity(relationships_from_triplets)
         
 
 
@@ -149,7 +158,7 @@ class TripletEmbedder(AsyncStep):
         embedded_relationships = 0
         
         for i, unique_entity in enumerate(unique_entities):
-            if unique_entity.embedding: 
+            if unique_entity.embedding is not None:
                 for entity in entity_groups[i]:
                     entity.embedding = unique_entity.embedding
                     entity.label_embedding = unique_entity.label_embedding
@@ -157,7 +166,7 @@ class TripletEmbedder(AsyncStep):
                 embedded_entities += 1
         
         for i, unique_relationship in enumerate(unique_relationships):
-            if unique_relationship.embedding: 
+            if unique_relationship.embedding is not None:
                 for relationship in relationship_groups[i]:
                     relationship.embedding = unique_relationship.embedding
                 embedded_relationships += 1
@@ -1,5 +1,9 @@
 from .neo4j_exporter import Neo4jExporter
+from .dead_letter import DeadLetterQueue
+from .batch_sizing import AdaptiveBatchSizer
 
 __all__ = [
-    'Neo4jExporter'
+    'Neo4jExporter',
+    'DeadLetterQueue',
+    'AdaptiveBatchSizer'
 ]
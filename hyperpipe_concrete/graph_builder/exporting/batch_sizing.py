@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def payload_bytes(value: Any) -> int:
+    """Approximate size of a query parameter on the wire."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return sum(len(key) + payload_bytes(item) for key, item in value.items()) + 2
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], float):
+            return 8 * len(value) + 2
+        return sum(payload_bytes(item) for item in value) + 2
+    return len(str(value))
+
+
+class AdaptiveBatchSizer:
+    """Chooses export batch sizes from transaction feedback.
+
+    Batches are cut by payload bytes. The byte budget converges on
+    ``target_seconds`` per transaction using a smoothed seconds-per-byte
+    estimate: it grows by at most ``growth`` per committed batch, drops to
+    the estimate when a commit runs over target, and is multiplied by
+    ``backoff`` when a transaction fails for its size (memory or timeout).
+    Rows per batch always stay within ``[min_rows, max_rows]``.
+    """
+
+    def __init__(self,
+                 target_seconds: float = 1.0,
+                 initial_bytes: int = 1_000_000,
+                 min_bytes: int = 10_000,
+                 max_bytes: int = 32_000_000,
+                 min_rows: int = 1,
+                 max_rows: int = 10_000,
+                 growth: float = 1.5,
+                 backoff: float = 0.5,
+                 smoothing: float = 0.3):
+        self.target_seconds = target_seconds
+        self.budget_bytes = float(initial_bytes)
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.growth = growth
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.seconds_per_byte: Optional[float] = None
+
+    def take(self, sizes: Sequence[int], start: int = 0) -> int:
+        """Number of items from ``sizes[start:]`` that fit the current budget."""
+        total = 0
+        count = 0
+        for size in sizes[start:start + self.max_rows]:
+            if count >= self.min_rows and total + size > self.budget_bytes:
+                break
+            total += size
+            count += 1
+        return count
+
+    def record_success(self, rows: int, size_bytes: int, seconds: float) -> None:
+        if size_bytes <= 0:
+            return
+        observed = seconds / size_bytes
+        if self.seconds_per_byte is None:
+            self.seconds_per_byte = observed
+        else:
+            self.seconds_per_byte += self.smoothing * (observed - self.seconds_per_byte)
+
+        estimate = self.target_seconds / self.seconds_per_byte if self.seconds_per_byte > 0 else self.max_bytes
+        if seconds > self.target_seconds:
+            budget = min(estimate, self.budget_bytes)
+        elif size_bytes < 0.5 * self.budget_bytes:
+            # Input ran out before the budget did; the batch says little
+            # about larger sizes
+            budget = self.budget_bytes
+        else:
+            budget = min(estimate, self.budget_bytes * self.growth)
+        self._set_budget(budget)
+
+    def record_failure(self, rows: int, size_bytes: int) -> None:
+        self._set_budget(min(self.budget_bytes, size_bytes) * self.backoff)
+
+    def _set_budget(self, budget: float) -> None:
+        self.budget_bytes = max(float(self.min_bytes), min(float(self.max_bytes), budget))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "seconds_per_byte": self.seconds_per_byte,
+        }
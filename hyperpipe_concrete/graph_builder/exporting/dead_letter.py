@@ -0,0 +1,64 @@
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+import json
+import os
+import threading
+
+from ..models import Triplet
+
+
+class DeadLetterQueue:
+    """Append-only JSONL file of triplets that could not be exported.
+
+    Each line holds the serialized triplet, the node ids assigned by the
+    matchers and the error that rejected it, so rows can be replayed once
+    the cause is fixed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, triplets: List[Triplet], error: Exception, source: Optional[str] = None) -> None:
+        failed_at = datetime.now(timezone.utc).isoformat()
+        lines = [
+            json.dumps({
+                "triplet": triplet.model_dump(mode="json"),
+                "head_node_id": triplet.head.node_id,
+                "tail_node_id": triplet.tail.node_id,
+                "error": str(error),
+                "error_type": type(error).__name__,
+                "error_code": getattr(error, "code", None),
+                "source": source,
+                "failed_at": failed_at,
+            })
+            for triplet in triplets
+        ]
+        directory = os.path.dirname(self.path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+    @staticmethod
+    def read(path: str) -> Iterator[Tuple[Triplet, dict]]:
+        """Yields ``(triplet, record)`` pairs; unreadable lines are skipped."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    triplet = Triplet.model_validate(record["triplet"])
+                except (ValueError, KeyError):
+                    continue
+                triplet.head.node_id = record.get("head_node_id")
+                triplet.tail.node_id = record.get("tail_node_id")
+                yield triplet, record
+
+    def __len__(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
@@ -1,20 +1,46 @@
-from typing import List, Dict, Any
-from ..models import Triplet, GraphBuilderResult
+from typing import List, Dict, Any, Optional, Sequence
+from ..models import Entity, Triplet, GraphBuilderResult, vector_to_list
+from ..database import as_async_graph
+from ..matching.partitioning import LabelPartitioner
+from ..utils.naming import normalize_node_name
+from ..metrics import PipelineMetrics, ExportBatchRecord
+from .dead_letter import DeadLetterQueue
+from .batch_sizing import AdaptiveBatchSizer, payload_bytes
 from hyperpipe_core import AsyncStep
+import hashlib
+import time
 import json
 import re
+import numpy as np
 
 class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
+    EMBEDDING_FIELDS = ('embedding', 'label_embedding', 'name_embedding')
     MAX_IDENTIFIER_LENGTH = 16383
     TRUNCATE_SUFFIX = '_trunc'
     DEFAULT_NAMES = {"node": "Entity", "rel": "RELATES", "prop": "property"}
     PROGRESS_LOG_INTERVAL = 100
     
-    def __init__(self, neo4j_graph, name: str = None, batch_size: int = 100, embedded_label: str = "Embedded"):
+    def __init__(self, neo4j_graph=None, name: str = None, batch_size: int = 100, embedded_label: str = "Embedded",
+                 partitioner: Optional[LabelPartitioner] = None, partition_by_label: bool = True,
+                 persist_embeddings: Sequence[str] = EMBEDDING_FIELDS, persist_relation_embeddings: bool = False,
+                 vector_property_type: str = "float32", dead_letter_path: Optional[str] = None,
+                 bisect_failures: bool = True, batch_sizer: Optional[AdaptiveBatchSizer] = None):
         self.name = name or self.__class__.__name__
-        self.neo4j_graph = neo4j_graph
+        self.neo4j_graph = as_async_graph(neo4j_graph)
         self.batch_size = batch_size
         self.embedded_label = embedded_label
+        if partitioner is None and partition_by_label:
+            partitioner = LabelPartitioner(embedded_label=embedded_label)
+        self.partitioner = partitioner
+        self.persist_embeddings = [field for field in self.EMBEDDING_FIELDS if field in persist_embeddings]
+        self.persist_relation_embeddings = persist_relation_embeddings
+        if vector_property_type not in ("float32", "list"):
+            raise ValueError(f"Unknown vector_property_type: {vector_property_type}")
+        self.vector_property_type = vector_property_type
+        self.dead_letter_queue = DeadLetterQueue(dead_letter_path) if dead_letter_path else None
+        self.bisect_failures = bisect_failures
+        self.batch_sizer = batch_sizer
+        self._export_queries = {}
     
     def _normalize_identifier(self, text: str, id_type: str) -> str:
 
@@ -72,14 +98,14 @@ class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
             return json.dumps(value.model_dump())
         return value
     
-    def _flatten_object_properties(self, obj: Any, prefix: str = "") -> Dict[str, Any]:
+    def _flatten_object_properties(self, obj: Any, prefix: str = "", exclude: set = None) -> Dict[str, Any]:
         if obj is None:
             return {}
         
         properties = {}
         
         if hasattr(obj, 'dict'):
-            obj_dict = obj.model_dump()
+            obj_dict = obj.model_dump(exclude=exclude)
         elif isinstance(obj, dict):
             obj_dict = obj
         else:
@@ -159,9 +185,7 @@ class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
         return query_part, parameters
     
     def _normalize_name(self, name: str) -> str:
-        if not name:
-            return name
-        return name.strip().title()
+        return normalize_node_name(name)
     
     def _extract_data(self, result: GraphBuilderResult) -> List[Triplet]:
         if not result.relation_extraction:
@@ -171,86 +195,262 @@ class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
         
         return triplets
     
-    async def _export_batch(self, triplets_batch: List[Triplet]) -> int:
-        if not triplets_batch:
-            return 0
+    @staticmethod
+    def _provenance_clause(var: str, prefix: str) -> str:
+        # mention_count counts distinct chunks, so re-exporting a chunk (a
+        # resumed run, a replayed dead letter, or several triplets of one
+        # chunk) leaves it unchanged
+        chunk_id = f"item.{prefix}_chunk_id"
+        return (
+            f"FOREACH (_ IN CASE WHEN {chunk_id} IS NOT NULL AND NOT {chunk_id} IN coalesce({var}.chunk_ids, []) THEN [1] ELSE [] END |\n"
+            f"    SET {var}.mention_count = coalesce({var}.mention_count, 0) + 1, "
+            f"{var}.chunk_ids = coalesce({var}.chunk_ids, []) + {chunk_id})\n"
+        )
+
+    def _node_clause(self, var: str, prefix: str, known: bool, carried: str) -> str:
+        if known:
+            # Nodes resolved by the matchers are addressed by element id
+            # instead of being looked up again by name
+            return (
+                f"MATCH ({var}) WHERE elementId({var}) = item.{prefix}_id\n"
+                + self._provenance_clause(var, prefix)
+                + f"WITH {carried}\n"
+                f"CALL apoc.create.addLabels({var}, item.{prefix}_labels + item.{prefix}_partition_labels) YIELD node AS {var}_labelled\n"
+            )
+        # Properties are written on create only; embeddings are written when
+        # their hash differs from the stored one (including on create). The
+        # merge only uses the base labels, so nodes written before
+        # partitioning (or under other groups) are still found; the partition
+        # label is added afterwards.
+        merge = (
+            f"CALL apoc.merge.node(item.{prefix}_labels, {{name: item.{prefix}_props.name}}, "
+            f"item.{prefix}_props, {{}}) YIELD node as {var}\n"
+            + self._provenance_clause(var, prefix)
+            + f"WITH {carried}\n"
+            f"CALL apoc.create.addLabels({var}, item.{prefix}_partition_labels) YIELD node AS {var}_partitioned\n"
+        )
+        changed = (
+            f"item.{prefix}_embedding_hash IS NOT NULL "
+            f"AND coalesce({var}.embedding_hash, '') <> item.{prefix}_embedding_hash"
+        )
+        if self.vector_property_type == "float32":
+            # Stored as native float32 vectors instead of float64 lists
+            return merge + (
+                f"WITH {carried}\n"
+                "CALL {\n"
+                f"    WITH item, {var}\n"
+                f"    WITH item, {var} WHERE {changed}\n"
+                f"    SET {var}.embedding_hash = item.{prefix}_embedding_hash\n"
+                f"    WITH item, {var}\n"
+                f"    UNWIND keys(item.{prefix}_embeddings) AS field\n"
+                f"    CALL db.create.setNodeVectorProperty({var}, field, item.{prefix}_embeddings[field])\n"
+                "}\n"
+            )
+        return merge + (
+            f"FOREACH (_ IN CASE WHEN {changed} THEN [1] ELSE [] END |\n"
+            f"    SET {var} += item.{prefix}_embeddings, {var}.embedding_hash = item.{prefix}_embedding_hash)\n"
+        )
+
+    def _build_export_query(self, head_known: bool, tail_known: bool) -> str:
+        key = (head_known, tail_known)
+        if key not in self._export_queries:
+            self._export_queries[key] = (
+                "UNWIND $batch AS item\n"
+                + self._node_clause("h", "head", head_known, "item, h")
+                + "WITH item, h\n"
+                + self._node_clause("t", "tail", tail_known, "item, h, t")
+                + "WITH item, h, t\n"
+                "CALL apoc.merge.relationship(h, item.rel_type, {}, item.rel_props, t) YIELD rel as r\n"
+                + self._provenance_clause("r", "rel")
+                + "RETURN count(r) as created"
+            )
+        return self._export_queries[key]
+
+    def _embedding_properties(self, entity: Entity) -> tuple[Dict[str, Any], Optional[str]]:
+        # Matched nodes keep their stored embeddings, so nothing is sent for them
+        if entity.node_id is not None or not self.persist_embeddings:
+            return {}, None
+        vectors = [(field, getattr(entity, field)) for field in self.persist_embeddings]
+        vectors = [(field, vector) for field, vector in vectors if vector is not None]
+        if not vectors:
+            return {}, None
+        digest = hashlib.sha1()
+        for field, vector in vectors:
+            digest.update(field.encode())
+            digest.update(np.asarray(vector, dtype=np.float32).tobytes())
+        return {field: vector_to_list(vector) for field, vector in vectors}, digest.hexdigest()[:16]
+
+    def _build_batch_item(self, triplet: Triplet) -> Dict[str, Any]:
+        head_props = self._flatten_object_properties(triplet.head, exclude=set(self.EMBEDDING_FIELDS))
+        tail_props = self._flatten_object_properties(triplet.tail, exclude=set(self.EMBEDDING_FIELDS))
+        rel_props = self._flatten_object_properties(
+            triplet.relation,
+            exclude=None if self.persist_relation_embeddings else {'embedding'},
+        )
+        
+        if triplet.metadata:
+            triplet_props = self._flatten_object_properties(triplet.metadata, "")
+            rel_props.update(triplet_props)
         
+        if 'name' in head_props:
+            head_props['name'] = self._normalize_name(head_props['name'])
+        if 'name' in tail_props:
+            tail_props['name'] = self._normalize_name(tail_props['name'])
+        
+        head_labels = [self._normalize_identifier(head_props.get('label', 'Entity'), "node"), self.embedded_label]
+        tail_labels = [self._normalize_identifier(tail_props.get('label', 'Entity'), "node"), self.embedded_label]
+        head_partition_labels, tail_partition_labels = [], []
+        if self.partitioner is not None:
+            head_partition_labels.append(self.partitioner.partition_label(triplet.head.label))
+            tail_partition_labels.append(self.partitioner.partition_label(triplet.tail.label))
+        
+        head_embeddings, head_hash = self._embedding_properties(triplet.head)
+        tail_embeddings, tail_hash = self._embedding_properties(triplet.tail)
+        
+        return {
+            "head_props": head_props,
+            "tail_props": tail_props,
+            "rel_props": rel_props,
+            "head_labels": head_labels,
+            "tail_labels": tail_labels,
+            "head_partition_labels": head_partition_labels,
+            "tail_partition_labels": tail_partition_labels,
+            "head_id": triplet.head.node_id,
+            "tail_id": triplet.tail.node_id,
+            "head_embeddings": head_embeddings,
+            "tail_embeddings": tail_embeddings,
+            "head_embedding_hash": head_hash,
+            "tail_embedding_hash": tail_hash,
+            "head_chunk_id": triplet.head.metadata.chunk_id if triplet.head.metadata else None,
+            "tail_chunk_id": triplet.tail.metadata.chunk_id if triplet.tail.metadata else None,
+            "rel_chunk_id": triplet.metadata.chunk_id if triplet.metadata else None,
+            "rel_type": self._normalize_identifier(rel_props.get('name', 'RELATES'), "rel")
+        }
+
+    async def _write_items(self, items: List[Dict[str, Any]], head_known: bool, tail_known: bool) -> None:
+        query = self._build_export_query(head_known, tail_known)
+        records = await self.neo4j_graph.write_query(query, params={"batch": items})
+        if (head_known or tail_known) and records and records[0].get('created', len(items)) < len(items):
+            self.log.warning(f"{len(items) - records[0]['created']} matched nodes no longer exist, relationships skipped")
+
+    SIZE_ERROR_MARKERS = ('OutOfMemory', 'MemoryPool', 'MemoryLimit', 'TransactionTimedOut')
+
+    @classmethod
+    def _is_size_error(cls, error: Exception) -> bool:
+        # Memory and timeout errors depend on the batch, not on a single row
+        code = getattr(error, 'code', None) or ''
+        return any(marker in code for marker in cls.SIZE_ERROR_MARKERS)
+
+    @classmethod
+    def _is_transient(cls, error: Exception) -> bool:
+        # The driver already retried these; splitting the batch would not help
+        from neo4j.exceptions import TransientError, ServiceUnavailable, SessionExpired
+        return isinstance(error, (TransientError, ServiceUnavailable, SessionExpired)) and not cls._is_size_error(error)
+
+    def _log_failure(self, error: Exception, size: int) -> None:
+        self.log.error(f"Neo4j batch export failed: {str(error)}")
+        if hasattr(error, 'code'):
+            self.log.error(f"Neo4j error code: {error.code}")
+        self.log.error(f"Failed batch context - size: {size}, embedded_label: '{self.embedded_label}'")
+
+    def _dead_letter(self, triplets: List[Triplet], error: Exception, metrics: PipelineMetrics) -> None:
+        metrics.increment('export.dead_letters', len(triplets))
+        if self.dead_letter_queue is None:
+            self.log.warning(f"Dropped {len(triplets)} triplets, they are lost because no dead_letter_path is configured: {str(error)}")
+            return
         try:
-            batch_data = []
-            
-            for triplet in triplets_batch:
-                head_props = self._flatten_object_properties(triplet.head)
-                tail_props = self._flatten_object_properties(triplet.tail)
-                rel_props = self._flatten_object_properties(triplet.relation)
-                
-                if triplet.metadata:
-                    triplet_props = self._flatten_object_properties(triplet.metadata, "")
-                    rel_props.update(triplet_props)
-                
-                if 'name' in head_props:
-                    head_props['name'] = self._normalize_name(head_props['name'])
-                if 'name' in tail_props:
-                    tail_props['name'] = self._normalize_name(tail_props['name'])
-                
-                head_labels = [self._normalize_identifier(head_props.get('label', 'Entity'), "node")]
-                tail_labels = [self._normalize_identifier(tail_props.get('label', 'Entity'), "node")]
-                
-                if triplet.head.embedding:
-                    head_labels.append(self.embedded_label)
-                else:
-                    continue
-                if triplet.tail.embedding:
-                    tail_labels.append(self.embedded_label)
-                else:
-                    continue
-                
-                batch_item = {
-                    "head_props": head_props,
-                    "tail_props": tail_props,
-                    "rel_props": rel_props,
-                    "head_labels": head_labels,
-                    "tail_labels": tail_labels,
-                    "rel_type": self._normalize_identifier(rel_props.get('name', 'RELATES'), "rel")
-                }
-                
-                batch_data.append(batch_item)
-            
-            query = """
-            UNWIND $batch AS item
-            
-            CALL apoc.merge.node(item.head_labels, {name: item.head_props.name}, item.head_props, item.head_props) YIELD node as h
-            
-            WITH item, h
-            
-            CALL apoc.merge.node(item.tail_labels, {name: item.tail_props.name}, item.tail_props, item.tail_props) YIELD node as t
-            
-            WITH item, h, t
-            
-            CALL apoc.merge.relationship(h, item.rel_type, {}, item.rel_props, t) YIELD rel as r
-            RETURN count(r) as created
-            """
-            
-            result = await self.neo4j_graph.write_query(query, params={"batch": batch_data})
-            exported_count = len(triplets_batch)
-            self.log.debug(f"Batch export successful: {exported_count} triplets")
-            return exported_count
-            
+            self.dead_letter_queue.append(triplets, error, source=self.name)
         except Exception as e:
-            error_msg = str(e)
-            self.log.error(f"Neo4j batch export failed: {error_msg}")
-            
-            # Log specific Neo4j error details
-            if hasattr(e, 'code'):
-                self.log.error(f"Neo4j error code: {e.code}")
-            if hasattr(e, 'message'):
-                self.log.error(f"Neo4j error message: {e.message}")
-                
-            self.log.error(f"Failed batch context - size: {len(triplets_batch)}, embedded_label: '{self.embedded_label}'")
+            self.log.error(f"Failed to write {len(triplets)} dead letters to {self.dead_letter_queue.path}: {str(e)}")
+            return
+        self.log.warning(f"Wrote {len(triplets)} triplets to dead letter file {self.dead_letter_queue.path}")
+
+    async def _timed_write(self, entries: List[tuple], head_known: bool, tail_known: bool, metrics: PipelineMetrics) -> None:
+        size_bytes = sum(size for _, _, size in entries)
+        start = time.perf_counter()
+        error = None
+        try:
+            await self._write_items([item for _, item, _ in entries], head_known, tail_known)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            if self.batch_sizer is not None:
+                if error is None:
+                    self.batch_sizer.record_success(len(entries), size_bytes, latency)
+                elif self._is_size_error(error):
+                    self.batch_sizer.record_failure(len(entries), size_bytes)
+            metrics.export_batches.append(ExportBatchRecord(
+                rows=len(entries),
+                size_bytes=size_bytes,
+                latency=latency,
+                budget_bytes=self.batch_sizer.budget_bytes if self.batch_sizer is not None else None,
+                error=type(error).__name__ if error is not None else None,
+            ))
+
+    async def _write_with_bisection(self, entries: List[tuple], head_known: bool, tail_known: bool, metrics: PipelineMetrics) -> int:
+        """Writes ``(triplet, item, size)`` entries in one transaction. A
+        failing batch is split in halves until the rows that fail on their
+        own are isolated; only those are dead-lettered."""
+        try:
+            await self._timed_write(entries, head_known, tail_known, metrics)
+            return len(entries)
+        except Exception as e:
+            if len(entries) == 1 or not self.bisect_failures or self._is_transient(e):
+                self._log_failure(e, len(entries))
+                self._dead_letter([triplet for triplet, _, _ in entries], e, metrics)
+                return 0
+            metrics.increment('export.bisections')
+            self.log.debug(f"Export of {len(entries)} triplets failed, retrying halves: {str(e)}")
+        middle = len(entries) // 2
+        exported = await self._write_with_bisection(entries[:middle], head_known, tail_known, metrics)
+        exported += await self._write_with_bisection(entries[middle:], head_known, tail_known, metrics)
+        return exported
+
+    def _prepare_entries(self, triplets: List[Triplet], metrics: PipelineMetrics) -> Dict[tuple, List[tuple]]:
+        groups = {}
+        for triplet in triplets:
+            if triplet.head.embedding is None or triplet.tail.embedding is None:
+                continue
+            try:
+                item = self._build_batch_item(triplet)
+            except Exception as e:
+                self._dead_letter([triplet], e, metrics)
+                continue
+            size = payload_bytes(item) if self.batch_sizer is not None else 0
+            groups.setdefault((item["head_id"] is not None, item["tail_id"] is not None), []).append((triplet, item, size))
+        return groups
+
+    async def _export_batch(self, triplets_batch: List[Triplet], metrics: PipelineMetrics = None) -> int:
+        if not triplets_batch:
             return 0
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        
+        exported_count = 0
+        for (head_known, tail_known), entries in self._prepare_entries(triplets_batch, metrics).items():
+            exported_count += await self._write_with_bisection(entries, head_known, tail_known, metrics)
+        self.log.debug(f"Batch export finished: {exported_count} triplets")
+        return exported_count
+
+    async def _export_adaptive(self, triplets: List[Triplet], metrics: PipelineMetrics) -> int:
+        exported = 0
+        for (head_known, tail_known), entries in self._prepare_entries(triplets, metrics).items():
+            sizes = [size for _, _, size in entries]
+            start = 0
+            while start < len(entries):
+                count = self.batch_sizer.take(sizes, start)
+                self.log.debug(f"Exporting {count} triplets ({sum(sizes[start:start + count])} bytes)")
+                exported += await self._write_with_bisection(entries[start:start + count], head_known, tail_known, metrics)
+                start += count
+        return exported
     
-    async def _export_data(self, triplets: List[Triplet]) -> int:
+    async def _export_data(self, triplets: List[Triplet], metrics: PipelineMetrics = None) -> int:
         if not triplets:
             return 0
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        if self.batch_sizer is not None:
+            return await self._export_adaptive(triplets, metrics)
         
         total_exported = 0
         total_batches = (len(triplets) + self.batch_size - 1) // self.batch_size
@@ -260,7 +460,7 @@ class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
             batch_num = (i // self.batch_size) + 1
             self.log.debug(f"Processing export batch {batch_num}/{total_batches}: {len(batch)} triplets")
             
-            batch_exported = await self._export_batch(batch)
+            batch_exported = await self._export_batch(batch, metrics)
             total_exported += batch_exported
         
         return total_exported
@@ -272,8 +472,11 @@ class Neo4jExporter(AsyncStep[GraphBuilderResult, None]):
             return None
         
         self.log.info(f"Exporting {len(triplets)} triplets to Neo4j")
-        await self._export_data(triplets)
-        self.log.info(f"Export completed")
+        metrics = PipelineMetrics()
+        exported = await self._export_data(triplets, metrics)
+        metrics.increment('export.triplets', exported)
+        result.metrics.merge(metrics)
+        self.log.info(f"Export completed: {exported} triplets, {int(metrics.counters.get('export.dead_letters', 0))} dead-lettered")
         
         return None
     
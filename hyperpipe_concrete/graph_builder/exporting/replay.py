@@ -0,0 +1,127 @@
+"""Re-exports triplets from a dead letter file.
+
+    python -m hyperpipe_concrete.graph_builder.exporting.replay dead_letters.jsonl [--config config.json]
+
+Rows are read from the file, which is then replaced by the rows that still
+fail. Connection settings come from ``pipeline.neo4j_graph`` or the NEO4J_*
+environment variables.
+"""
+from typing import Dict, Any, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from hyperpipe_core.logger import set_logger
+
+from ..metrics import PipelineMetrics
+from ..models import Triplet
+from .dead_letter import DeadLetterQueue
+from .neo4j_exporter import Neo4jExporter
+
+
+class _RecordingQueue(DeadLetterQueue):
+    """Remembers which triplets were dead-lettered again."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.appended = set()
+
+    def append(self, triplets: List[Triplet], error: Exception, source: Optional[str] = None) -> None:
+        super().append(triplets, error, source)
+        self.appended.update(id(triplet) for triplet in triplets)
+
+
+async def replay_dead_letters(path: str, exporter: Neo4jExporter, dry_run: bool = False) -> Dict[str, Any]:
+    """Exports the triplets in ``path`` with ``exporter``, one export batch
+    at a time. Rows that fail again are written back to ``path`` by the
+    exporter's dead letter queue.
+
+    When the replay itself breaks, the rows of the batch in flight and of
+    the batches not started yet are written back, minus those already
+    dead-lettered again; rows of finished batches are not. Rows of the
+    batch in flight that did commit are exported again on the next replay,
+    which leaves their provenance unchanged.
+    """
+    if not os.path.exists(path):
+        return {"read": 0, "exported": 0, "dead_letters": 0}
+    if dry_run:
+        return {"read": sum(1 for _ in DeadLetterQueue.read(path)), "exported": 0, "dead_letters": 0}
+
+    replaying = path + ".replaying"
+    os.replace(path, replaying)
+    rows = None
+    queue = _RecordingQueue(path)
+    metrics = PipelineMetrics()
+    exported = 0
+    finished = 0
+    try:
+        rows = list(DeadLetterQueue.read(replaying))
+        exporter.dead_letter_queue = queue
+        for start in range(0, len(rows), exporter.batch_size):
+            batch = rows[start:start + exporter.batch_size]
+            exported += await exporter._export_data([triplet for triplet, _ in batch], metrics)
+            finished = start + len(batch)
+    except BaseException:
+        with open(path, "a", encoding="utf-8") as f:
+            if rows is not None:
+                f.write("".join(
+                    json.dumps(record) + "\n"
+                    for triplet, record in rows[finished:] if id(triplet) not in queue.appended
+                ))
+            else:
+                # Failed while reading; nothing was exported
+                with open(replaying, encoding="utf-8") as src:
+                    f.write(src.read())
+        raise
+    finally:
+        if os.path.exists(replaying):
+            os.remove(replaying)
+    return {"read": len(rows), "exported": exported, "dead_letters": int(metrics.counters.get('export.dead_letters', 0))}
+
+
+async def _main(args) -> Dict[str, Any]:
+    from ..__main__ import merge_config, create_partitioner, create_batch_sizer
+    from ..database import as_async_graph
+
+    config = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    pipeline_config = merge_config(config)['pipeline']
+    exporter_config = dict(pipeline_config['neo4j_exporter'])
+    exporter_config.pop('dead_letter_path', None)
+
+    partitioner = create_partitioner(pipeline_config)
+    graph = as_async_graph(None, **pipeline_config['neo4j_graph'])
+    exporter = Neo4jExporter(
+        neo4j_graph=graph,
+        partitioner=partitioner,
+        partition_by_label=partitioner is not None,
+        batch_sizer=create_batch_sizer(pipeline_config),
+        **exporter_config,
+    )
+    set_logger(logging.getLogger("replay"))(exporter)
+    try:
+        return await replay_dead_letters(args.path, exporter, dry_run=args.dry_run)
+    finally:
+        await graph.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="dead letter JSONL file")
+    parser.add_argument("--config", help="JSON config file, same format as build_graph's config")
+    parser.add_argument("--dry-run", action="store_true", help="only count readable rows")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = asyncio.run(_main(args))
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["dead_letters"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,16 @@
 from .entity_extractor import AsyncEntityExtractor
 from .relation_extractor import AsyncRelationExtractor
+from .joint_extractor import AsyncJointExtractor
+from .packed_extractor import PackedEntityExtractor, PackedRelationExtractor, PackedJointExtractor
+from .routing import ModelRouter, ModelCascade
 
 __all__ = [
     'AsyncEntityExtractor',
-    'AsyncRelationExtractor'
+    'AsyncRelationExtractor',
+    'AsyncJointExtractor',
+    'PackedEntityExtractor',
+    'PackedRelationExtractor',
+    'PackedJointExtractor',
+    'ModelRouter',
+    'ModelCascade'
 ]
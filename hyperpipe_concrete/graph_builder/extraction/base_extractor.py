@@ -2,7 +2,7 @@ from typing import List, Dict, Tuple
 import re
 
 from .base_llm_step import BaseLLMStep
-from ..models import Entity, EntityMetadata
+from ..models import Entity, EntityMetadata, Triplet, TripletMetadata, Relationship
 
 
 class BaseExtractor(BaseLLMStep):
@@ -50,6 +50,120 @@ class BaseExtractor(BaseLLMStep):
         return entity
     
     
+    def convert_entity_outputs(self, entity_outputs: List, chunk) -> List[Entity]:
+        
+        entities = []
+        for entity_data in entity_outputs:
+            try:
+                if not self.is_valid_entity_name(entity_data.name):
+                    continue
+                    
+                if not self.is_valid_entity_label(entity_data.label):
+                    continue
+                
+                entity = self.create_entity_with_metadata(
+                    entity_data.name,
+                    entity_data.label,
+                    chunk.text,
+                    chunk_id=chunk.uid,
+                    source="qTracker",
+                    summary=entity_data.summary
+                )
+                entities.append(entity)
+                
+            except Exception as e:
+                continue
+        
+        return entities
+
+    def calculate_triplet_positions(self, content: str, head_entity_name: str, tail_entity_name: str, relation_name: str) -> Tuple[int, int]:
+   
+        positions = self.find_text_positions(content, [head_entity_name, tail_entity_name, relation_name])
+        if not positions:
+            return 0, len(content)
+        start = min(pos[0] for pos in positions)
+        end = max(pos[1] for pos in positions)
+        return start, end
+
+    def convert_relation_outputs(self, relation_outputs: List, chunk) -> List[Triplet]:
+
+        triplets = []
+        
+        for llm_relation in relation_outputs:
+            try:
+                if not self.is_valid_entity_name(llm_relation.head.name):
+                    continue
+                    
+                if not self.is_valid_entity_label(llm_relation.head.label):
+                    continue
+                
+                if not self.is_valid_entity_name(llm_relation.tail.name):
+                    continue
+                    
+                if not self.is_valid_entity_label(llm_relation.tail.label):
+                    continue
+                
+                if not self.is_valid_relation_name(llm_relation.relation.name):
+                    continue
+                
+                
+                head_label = llm_relation.head.label
+                tail_label = llm_relation.tail.label
+                
+                generic_labels = {"entity", "entity type", "entitytype", "generic", "unknown", ""}
+                
+                if (head_label.lower().strip() in generic_labels or 
+                    tail_label.lower().strip() in generic_labels):
+                    continue
+                
+                head_entity = self.create_entity_with_metadata(
+                    llm_relation.head.name,
+                    head_label,
+                    chunk.text,
+                    chunk_id=chunk.uid,
+                    source="qTracker",
+                    summary=llm_relation.head.summary
+                )
+                
+                tail_entity = self.create_entity_with_metadata(
+                    llm_relation.tail.name,
+                    tail_label,
+                    chunk.text,
+                    chunk_id=chunk.uid,
+                    source="qTracker",
+                    summary=llm_relation.tail.summary
+                )
+                
+                relationship = Relationship(
+                    name=llm_relation.relation.name,
+                    label=llm_relation.relation.label
+                )
+                
+                start_pos, end_pos = self.calculate_triplet_positions(
+                    chunk.text, llm_relation.head.name, llm_relation.tail.name, llm_relation.relation.name
+                )
+                
+                metadata = TripletMetadata(
+                    context=chunk.text,
+                    start_position=start_pos,
+                    end_position=end_pos
+                )
+                
+                triplet = Triplet(
+                    head=head_entity,
+                    relation=relationship,
+                    tail=tail_entity,
+                    metadata=metadata
+                )
+                triplets.append(triplet)
+                self.log.debug(f"Triplet validated: {llm_relation.head.name} -[{llm_relation.relation.name}]-> {llm_relation.tail.name}")
+                
+            except Exception as e:
+                self.log.debug(f"Error processing relation: {str(e)[:50]}")
+                continue
+        
+        return triplets
+    
     @staticmethod
     def is_valid_entity_name(name: str) -> bool:
         if not name or not isinstance(name, str):
@@ -1,11 +1,18 @@
 from abc import abstractmethod
-from typing import TypeVar, Generic, Type, Callable, List, Dict, Any
+from typing import TypeVar, Generic, Type, Callable, List, Dict, Any, Optional
 import json
 import asyncio
 import time
 
+from pydantic import ValidationError
 from hyperpipe_core import AsyncStep, Result
 
+from .hedging import HedgePolicy
+from .scheduler import LLMScheduler
+from .routing import ModelCascade
+from ..metrics import LLMCallRecord
+from ..utils.json_repair import parse_model, count_items
+
 T = TypeVar('T')
 U = TypeVar('U')
 R = TypeVar('R')
@@ -14,14 +21,25 @@ R = TypeVar('R')
 class BaseLLMStep(AsyncStep, Generic[T, U, R]):
     def __init__(self,
                  llm,
+                 model: Optional[str] = None,
                  temperature: float = 0.1,
                  name: str = None,
                  examples: List[Dict[str, str]] = None,
+                 call_timeout: Optional[float] = 30.0,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 scheduler: Optional[LLMScheduler] = None,
+                 cascade: Optional[ModelCascade] = None,
                  **kwargs):
         self.llm = llm
+        self.model = model
+        self.cascade = cascade
         self.temperature = temperature
         self.name = name or self.__class__.__name__
         self.examples = examples
+        self.call_timeout = call_timeout
+        self.hedge_policy = hedge_policy
+        self.scheduler = scheduler
+        self.llm_calls: List[LLMCallRecord] = []
 
     def build_messages(self, system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
         messages = [{"role": "system", "content": system_prompt}]
@@ -41,6 +59,7 @@ class BaseLLMStep(AsyncStep, Generic[T, U, R]):
     def build_hallucination_params(self, messages: List[Dict[str, str]], **extra_params) -> Dict[str, Any]:
         return {
             "messages": messages,
+            "model": extra_params.get("model", self.model),
             "temperature": extra_params.get("temperature", self.temperature),
             "tools": extra_params.get("tools", []),
             "parallel_tool_calls": extra_params.get("parallel_tool_calls", False),
@@ -48,15 +67,67 @@ class BaseLLMStep(AsyncStep, Generic[T, U, R]):
             "is_vision": extra_params.get("is_vision", False),
         }
 
-    async def async_extract_structured_data(
+    @staticmethod
+    def _read_field(source: Any, name: str) -> Any:
+        if source is None:
+            return None
+        if isinstance(source, dict):
+            return source.get(name)
+        return getattr(source, name, None)
+
+    def read_usage(self, result: Any) -> Dict[str, Any]:
+        usage = self._read_field(result, "usage")
+        if usage is None:
+            usage = self._read_field(self._read_field(result, "raw"), "usage")
+        hidden_params = self._read_field(result, "_hidden_params") or {}
+
+        cache_hit = self._read_field(result, "cache_hit")
+        if cache_hit is None:
+            cache_hit = self._read_field(hidden_params, "cache_hit")
+
+        cost = self._read_field(result, "cost")
+        if cost is None:
+            cost = self._read_field(hidden_params, "response_cost")
+
+        return {
+            "prompt_tokens": self._read_field(usage, "prompt_tokens") or 0,
+            "completion_tokens": self._read_field(usage, "completion_tokens") or 0,
+            "cache_hit": bool(cache_hit),
+            "cost": cost or 0.0,
+        }
+
+    def record_usage(self, record: LLMCallRecord, result: Any) -> None:
+        usage = self.read_usage(result)
+        record.prompt_tokens += usage["prompt_tokens"]
+        record.completion_tokens += usage["completion_tokens"]
+        record.cost += usage["cost"]
+        record.cache_hits += int(usage["cache_hit"])
+
+    @staticmethod
+    def call_priority(hallucination_params: Dict[str, Any]) -> float:
+        return float(sum(len(message.get("content") or "") for message in hallucination_params["messages"]))
+
+    def save_llm_metrics(self, result: Result) -> None:
+        if self.llm_calls:
+            result.metrics.record_llm_calls(self.llm_calls)
+            self.llm_calls = []
+
+    async def async_request_model(
         self,
         hallucination_params: Dict[str, Any],
         response_model: Type[T],
-        converter: Callable[[T], List[U]],
         max_retries: int = 2,
         retry_delay: float = 3.0,
         total_timeout: float = 30.0,
-    ) -> List[U]:
+        chunk_ids: List[str] = None,
+    ) -> Optional[T]:
+        record = LLMCallRecord(
+            step=self.name,
+            chunk_ids=list(chunk_ids or []),
+            model=hallucination_params.get("model"),
+        )
+        self.llm_calls.append(record)
+
         start_time = time.time()
         json_parsing_errors = 0
         attempt = 0
@@ -64,43 +135,152 @@ class BaseLLMStep(AsyncStep, Generic[T, U, R]):
             try:
                 elapsed_time = time.time() - start_time
                 if elapsed_time > total_timeout:
-                    return []
-
-                result = await self.llm.hallucinate(
-                    messages=hallucination_params["messages"],
-                    temperature=hallucination_params.get("temperature", self.temperature),
-                    tools=hallucination_params.get("tools", []),
-                    parallel_tool_calls=hallucination_params.get("parallel_tool_calls", False),
-                    response_format=response_model,
-                    user=hallucination_params.get("user", self.name or ""),
-                    is_vision=hallucination_params.get("is_vision", False),
-                )
-                content = result.message.content
+                    return None
 
-                if '```json' in content:
-                    content = content.split('```json', 1)[1].split('```', 1)[0].strip()
+                # total_timeout only decides whether another attempt starts;
+                # a running attempt is only cut short by call_timeout, which
+                # bounds hung calls (None disables it)
+                deadline = self.call_timeout
 
-                parsed_data: Dict = json.loads(content)
-                parsed_model: T = response_model.model_validate(parsed_data)
-                return converter(parsed_model)
+                def make_call():
+                    # ``model`` is only sent when a step is routed, so clients
+                    # bound to a single model keep working unchanged
+                    routing = {"model": record.model} if record.model else {}
+                    return self.llm.hallucinate(
+                        messages=hallucination_params["messages"],
+                        temperature=hallucination_params.get("temperature", self.temperature),
+                        tools=hallucination_params.get("tools", []),
+                        parallel_tool_calls=hallucination_params.get("parallel_tool_calls", False),
+                        response_format=response_model,
+                        user=hallucination_params.get("user", self.name or ""),
+                        is_vision=hallucination_params.get("is_vision", False),
+                        **routing,
+                    )
+
+                record.attempts += 1
+                if self.scheduler is not None:
+                    # Time spent queued for a slot does not count against the timeouts
+                    waited = await self.scheduler.acquire(self.call_priority(hallucination_params))
+                    start_time += waited
+                    record.queue_time += waited
+                call_start = time.perf_counter()
+                try:
+                    if self.hedge_policy is not None:
+                        result, hedged = await asyncio.wait_for(self.hedge_policy.run(make_call, scheduler=self.scheduler), timeout=deadline)
+                        record.hedges += int(hedged)
+                    else:
+                        result = await asyncio.wait_for(make_call(), timeout=deadline)
+                except asyncio.TimeoutError:
+                    record.timeouts += 1
+                    raise
+                finally:
+                    if self.scheduler is not None:
+                        self.scheduler.release()
+                    call_latency = time.perf_counter() - call_start
+                    record.attempt_latencies.append(call_latency)
+                    record.latency += call_latency
+
+                self.record_usage(record, result)
+                parsed_model, parse_mode, dropped_items = parse_model(result.message.content, response_model)
+                record.parse_mode = parse_mode
+                record.dropped_items += dropped_items
+                record.success = True
+                return parsed_model
 
             except json.JSONDecodeError:
                 attempt += 1
                 json_parsing_errors += 1
+                record.parse_failures += 1
                 if json_parsing_errors >= 2:
-                    return []
+                    return None
                 if attempt < max_retries:
                     await asyncio.sleep(retry_delay)
                 else:
-                    return []
+                    return None
 
-            except Exception:
+            except Exception as e:
                 attempt += 1
+                if isinstance(e, ValidationError):
+                    record.parse_failures += 1
+                elif not isinstance(e, asyncio.TimeoutError):
+                    record.errors += 1
                 if attempt < max_retries:
                     await asyncio.sleep(retry_delay)
                 else:
-                    return []
+                    return None
+
+        return None
 
+    async def async_extract_structured_data(
+        self,
+        hallucination_params: Dict[str, Any],
+        response_model: Type[T],
+        converter: Callable[[T], List[U]],
+        max_retries: int = 2,
+        retry_delay: float = 3.0,
+        total_timeout: float = 30.0,
+        chunk_ids: List[str] = None,
+    ) -> List[U]:
+        if self.cascade is not None:
+            return await self.async_extract_with_cascade(
+                hallucination_params, response_model, converter,
+                max_retries=max_retries, retry_delay=retry_delay,
+                total_timeout=total_timeout, chunk_ids=chunk_ids,
+            )
+        parsed_model = await self.async_request_model(
+            hallucination_params=hallucination_params,
+            response_model=response_model,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            total_timeout=total_timeout,
+            chunk_ids=chunk_ids,
+        )
+        if parsed_model is None:
+            return []
+        return converter(parsed_model)
+
+    @staticmethod
+    def count_outputs(outputs: List[Any]) -> int:
+        # Joint extractors convert into (entities, triplets) pairs
+        return sum(sum(len(part) for part in output) if isinstance(output, tuple) else 1 for output in outputs)
+
+    async def async_extract_with_cascade(
+        self,
+        hallucination_params: Dict[str, Any],
+        response_model: Type[T],
+        converter: Callable[[T], List[U]],
+        max_retries: int = 2,
+        retry_delay: float = 3.0,
+        total_timeout: float = 30.0,
+        chunk_ids: List[str] = None,
+    ) -> List[U]:
+        """Asks the cascade's models in order and keeps the first answer
+        that does not need escalation. Cheaper models get
+        ``cascade.cheap_retries`` attempts, the last one ``max_retries``."""
+        models = self.cascade.models
+        for position, model in enumerate(models):
+            last = position == len(models) - 1
+            parsed_model = await self.async_request_model(
+                hallucination_params={**hallucination_params, "model": model},
+                response_model=response_model,
+                max_retries=max_retries if last else self.cascade.cheap_retries,
+                retry_delay=retry_delay,
+                total_timeout=total_timeout,
+                chunk_ids=chunk_ids,
+            )
+            record = self.llm_calls[-1]
+            outputs = converter(parsed_model) if parsed_model is not None else []
+            if last:
+                return outputs
+            if parsed_model is None:
+                record.escalation = "failed"
+            else:
+                record.escalation = self.cascade.escalation_reason(
+                    count_items(parsed_model), self.count_outputs(outputs), record.parse_mode,
+                )
+            if record.escalation is None:
+                return outputs
+            self.log.debug(f"Escalating {chunk_ids} from {model} to {models[position + 1]}: {record.escalation}")
         return []
 
     async def async_extract_from_llm(
@@ -108,6 +288,7 @@ class BaseLLMStep(AsyncStep, Generic[T, U, R]):
         template: str,
         response_model: Type[T],
         converter: Callable[[T], List[U]],
+        chunk_ids: List[str] = None,
         **template_kwargs
     ) -> List[U]:
         user_prompt = self.format_prompt_template(template, **template_kwargs)
@@ -117,6 +298,7 @@ class BaseLLMStep(AsyncStep, Generic[T, U, R]):
             hallucination_params=hallucination_params,
             response_model=response_model,
             converter=converter,
+            chunk_ids=chunk_ids,
         )
 
     @abstractmethod
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from .base_extractor import BaseExtractor
 from ..models import Entity, GraphBuilderResult
@@ -9,7 +9,7 @@ from ..utils.prompts import EntityExtractionPrompts
 class AsyncEntityExtractor(BaseExtractor):
     
     def __init__(self, 
-                 model: str = "gpt-4o-mini",
+                 model: Optional[str] = None,
                  temperature: float = 0.1,
                  name: str = "AsyncEntityExtractor",
                  **kwargs):
@@ -40,6 +40,7 @@ class AsyncEntityExtractor(BaseExtractor):
             template=self.user_prompt_template,
             response_model=EntitiesListResponse,
             converter=lambda model: self.convert_to_domain(model, chunk),
+            chunk_ids=[chunk.uid],
             text=text,
         )
         
@@ -53,32 +54,10 @@ class AsyncEntityExtractor(BaseExtractor):
     
     
     def convert_to_domain(self, parsed_model: EntitiesListResponse, chunk) -> List[Entity]:
-        
-        entities = []
-        for entity_data in parsed_model.entities:
-            try:
-                if not self.is_valid_entity_name(entity_data.name):
-                    continue
-                    
-                if not self.is_valid_entity_label(entity_data.label):
-                    continue
-                
-                entity = self.create_entity_with_metadata(
-                    entity_data.name,
-                    entity_data.label,
-                    chunk.text,
-                    chunk_id=chunk.uid,
-                    source="qTracker",
-                    summary=entity_data.summary
-                )
-                entities.append(entity)
-                
-            except Exception as e:
-                continue
-        
-        return entities
+        return self.convert_entity_outputs(parsed_model.entities, chunk)
     
     def save_result(self, step_result: List[Entity], result: GraphBuilderResult) -> None:
         result.entity_extraction.extend(step_result)
+        self.save_llm_metrics(result)
     
     
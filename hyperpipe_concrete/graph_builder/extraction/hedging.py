@@ -0,0 +1,109 @@
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from collections import deque
+import asyncio
+import time
+
+from ..metrics import percentile
+
+
+class HedgePolicy:
+    """Fires a duplicate LLM request once the primary one is slower than a
+    latency percentile of recent calls, and returns whichever finishes first.
+
+    A single policy is meant to be shared by all extractors of a run so that
+    latency samples and the hedge budget are global. ``budget`` caps hedged
+    requests as a fraction of all requests. With a scheduler, a hedge takes
+    its own slot and is only fired when one is free, so hedging never pushes
+    calls above ``max_in_flight``.
+    """
+
+    def __init__(self,
+                 latency_percentile: float = 95.0,
+                 budget: float = 0.1,
+                 min_samples: int = 20,
+                 window: int = 200,
+                 min_delay: float = 0.5):
+        self.latency_percentile = latency_percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_without_slot = 0
+
+    def observe(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        if len(self.latencies) < self.min_samples:
+            return None
+        return max(percentile(list(self.latencies), self.latency_percentile), self.min_delay)
+
+    def _try_acquire_hedge(self) -> bool:
+        if self.hedges + 1 > self.budget * self.requests:
+            return False
+        self.hedges += 1
+        return True
+
+    async def _timed(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await make_call()
+        finally:
+            # Cancelled and failed calls count too; leaving out the slow
+            # ones that lose a race would bias the percentile low
+            self.observe(time.perf_counter() - start)
+
+    async def run(self, make_call: Callable[[], Awaitable[Any]], scheduler=None) -> Tuple[Any, bool]:
+        """Returns the first successful result and whether a hedge was fired.
+        The caller holds the primary's ``scheduler`` slot."""
+        self.requests += 1
+        primary = asyncio.ensure_future(self._timed(make_call))
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                return await primary, False
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return await primary, False
+            if scheduler is not None and not scheduler.try_acquire():
+                self.hedges_without_slot += 1
+                return await primary, False
+            if not self._try_acquire_hedge():
+                if scheduler is not None:
+                    scheduler.release()
+                return await primary, False
+
+            hedge = asyncio.ensure_future(self._timed(make_call))
+            if scheduler is not None:
+                hedge.add_done_callback(lambda _: scheduler.release())
+            tasks.add(hedge)
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result(), True
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_without_slot": self.hedges_without_slot,
+            "hedge_delay": self.hedge_delay(),
+        }
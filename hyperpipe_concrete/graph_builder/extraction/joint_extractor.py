@@ -0,0 +1,61 @@
+from typing import List, Optional, Tuple
+
+from .base_extractor import BaseExtractor
+from ..models import Entity, Triplet, GraphBuilderResult
+from ..utils.extraction_models import JointExtractionResponse
+from ..utils.prompts import JointExtractionPrompts
+
+
+class AsyncJointExtractor(BaseExtractor):
+
+    def __init__(self,
+                 model: Optional[str] = None,
+                 temperature: float = 0.1,
+                 name: str = "AsyncJointExtractor",
+                 system_prompt: str = None,
+                 user_prompt_template: str = None,
+                 **kwargs):
+
+        super().__init__(
+            model=model,
+            temperature=temperature,
+            name=name,
+            **kwargs
+        )
+        self.name = name
+        self.iteration = 0
+        self.system_prompt = system_prompt or JointExtractionPrompts.SYSTEM
+        self.user_prompt_template = user_prompt_template or JointExtractionPrompts.USER_TEMPLATE
+
+    async def execute(self, data: GraphBuilderResult) -> Tuple[List[Entity], List[Triplet]]:
+
+        chunks = data.initial_input.chunks
+        if self.iteration >= len(chunks):
+            return [], []
+
+        chunk = chunks[self.iteration]
+
+        extracted = await self.async_extract_from_llm(
+            template=self.user_prompt_template,
+            response_model=JointExtractionResponse,
+            converter=lambda model: [self.convert_to_domain(model, chunk)],
+            chunk_ids=[chunk.uid],
+            text=chunk.text,
+        )
+        entities, triplets = extracted[0] if extracted else ([], [])
+
+        self.log.info(f"Extracted {len(entities)} entities and {len(triplets)} triplets")
+
+        return entities, triplets
+
+    def convert_to_domain(self, parsed_model: JointExtractionResponse, chunk) -> Tuple[List[Entity], List[Triplet]]:
+        return (
+            self.convert_entity_outputs(parsed_model.entities, chunk),
+            self.convert_relation_outputs(parsed_model.relations, chunk),
+        )
+
+    def save_result(self, step_result: Tuple[List[Entity], List[Triplet]], result: GraphBuilderResult) -> None:
+        entities, triplets = step_result
+        result.entity_extraction.extend(entities)
+        result.relation_extraction.extend(triplets)
+        self.save_llm_metrics(result)
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Tuple
+import asyncio
+
+from .entity_extractor import AsyncEntityExtractor
+from .relation_extractor import AsyncRelationExtractor
+from .joint_extractor import AsyncJointExtractor
+from ..models import Entity, Triplet, GraphBuilderResult
+from ..utils.extraction_models import PackedEntitiesResponse, PackedRelationsResponse, PackedJointResponse
+from ..utils.packing import chunk_tag
+from ..utils.prompts import EntityExtractionPrompts, RelationExtractionPrompts, JointExtractionPrompts
+
+
+class PackedExtractionMixin(ABC):
+    """Sends several chunks in one LLM request and maps the chunk-tagged
+    answers back to each ``chunk.uid``. Packs whose response fails validation
+    are bisected and retried until single chunks remain."""
+
+    packed_response_model = None
+    chunk_template = EntityExtractionPrompts.CHUNK_TEMPLATE
+
+    def format_chunks(self, chunks: List, texts: List[str] = None) -> str:
+        texts = texts or [chunk.text for chunk in chunks]
+        return "\n\n".join(
+            self.chunk_template.format(chunk_id=chunk_tag(position), text=text)
+            for position, text in enumerate(texts)
+        )
+
+    @abstractmethod
+    def build_pack_prompt(self, chunks: List, data: GraphBuilderResult) -> str:
+        pass
+
+    @abstractmethod
+    def convert_chunk_output(self, chunk_output: Any, chunk, data: GraphBuilderResult) -> List:
+        pass
+
+    async def extract_pack(self, chunks: List, data: GraphBuilderResult) -> Dict[str, List]:
+        if not chunks:
+            return {}
+
+        user_prompt = self.build_pack_prompt(chunks, data)
+        messages = self.build_messages(self.packed_system_prompt, user_prompt)
+        parsed_model = await self.async_request_model(
+            hallucination_params=self.build_hallucination_params(messages),
+            response_model=self.packed_response_model,
+            max_retries=self.pack_max_retries,
+            chunk_ids=[chunk.uid for chunk in chunks],
+        )
+
+        results = {}
+        missing = list(chunks)
+        if parsed_model is not None:
+            outputs = {output.chunk_id.strip(): output for output in parsed_model.chunks}
+            missing = []
+            for position, chunk in enumerate(chunks):
+                output = outputs.get(chunk_tag(position))
+                if output is None:
+                    missing.append(chunk)
+                    continue
+                results[chunk.uid] = self.convert_chunk_output(output, chunk, data)
+
+        if len(missing) == len(chunks):
+            if len(chunks) == 1:
+                self.log.warning(f"Packed extraction failed for chunk {chunks[0].uid}")
+                return {chunks[0].uid: []}
+
+            middle = len(chunks) // 2
+            self.log.debug(f"Splitting pack of {len(chunks)} chunks after failed response")
+            left, right = await asyncio.gather(
+                self.extract_pack(chunks[:middle], data),
+                self.extract_pack(chunks[middle:], data),
+            )
+            results.update(left)
+            results.update(right)
+
+        elif missing:
+            self.log.debug(f"Retrying {len(missing)} chunks missing from packed response")
+            results.update(await self.extract_pack(missing, data))
+
+        return results
+
+    def get_pack_chunks(self, data: GraphBuilderResult) -> List:
+        chunks = data.initial_input.chunks
+        return [chunks[i] for i in self.chunk_indices if i < len(chunks)]
+
+
+class PackedEntityExtractor(PackedExtractionMixin, AsyncEntityExtractor):
+
+    packed_response_model = PackedEntitiesResponse
+
+    def __init__(self,
+                 chunk_indices: List[int] = None,
+                 pack_max_retries: int = 1,
+                 name: str = "PackedEntityExtractor",
+                 **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.chunk_indices = chunk_indices or []
+        self.pack_max_retries = pack_max_retries
+        self.packed_system_prompt = EntityExtractionPrompts.PACKED_SYSTEM
+        self.packed_user_prompt_template = EntityExtractionPrompts.PACKED_USER_TEMPLATE
+
+    def build_pack_prompt(self, chunks: List, data: GraphBuilderResult) -> str:
+        return self.format_prompt_template(
+            self.packed_user_prompt_template,
+            chunks=self.format_chunks(chunks),
+        )
+
+    def convert_chunk_output(self, chunk_output, chunk, data: GraphBuilderResult) -> List[Entity]:
+        return self.convert_to_domain(chunk_output, chunk)
+
+    async def execute(self, data: GraphBuilderResult) -> List[Entity]:
+        chunks = self.get_pack_chunks(data)
+        results = await self.extract_pack(chunks, data)
+
+        entities = [entity for chunk in chunks for entity in results.get(chunk.uid, [])]
+        self.log.info(f"Extracted {len(entities)} from {len(chunks)} packed chunks")
+        return entities
+
+
+class PackedRelationExtractor(PackedExtractionMixin, AsyncRelationExtractor):
+
+    packed_response_model = PackedRelationsResponse
+
+    def __init__(self,
+                 chunk_indices: List[int] = None,
+                 pack_max_retries: int = 1,
+                 name: str = "PackedRelationExtractor",
+                 **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.chunk_indices = chunk_indices or []
+        self.pack_max_retries = pack_max_retries
+        self.packed_system_prompt = RelationExtractionPrompts.PACKED_SYSTEM
+        self.packed_user_prompt_template = RelationExtractionPrompts.PACKED_USER_TEMPLATE
+
+    def build_pack_prompt(self, chunks: List, data: GraphBuilderResult) -> str:
+        entities = data.entity_extraction or []
+        texts = [self.prepare_text_with_alternatives(chunk.text, entities) for chunk in chunks]
+        return self.format_prompt_template(
+            self.packed_user_prompt_template,
+            chunks=self.format_chunks(chunks, texts),
+            entity_list=self.build_entity_list(entities),
+        )
+
+    def convert_chunk_output(self, chunk_output, chunk, data: GraphBuilderResult) -> List[Triplet]:
+        return self.convert_to_domain(chunk_output, chunk, data.entity_extraction or [])
+
+    async def execute(self, data: GraphBuilderResult) -> List[Triplet]:
+        chunks = self.get_pack_chunks(data)
+        results = await self.extract_pack(chunks, data)
+
+        triplets = [triplet for chunk in chunks for triplet in results.get(chunk.uid, [])]
+        self.log.info(f"Extracted {len(triplets)} from {len(chunks)} packed chunks")
+        return triplets
+
+
+class PackedJointExtractor(PackedExtractionMixin, AsyncJointExtractor):
+
+    packed_response_model = PackedJointResponse
+
+    def __init__(self,
+                 chunk_indices: List[int] = None,
+                 pack_max_retries: int = 1,
+                 name: str = "PackedJointExtractor",
+                 **kwargs):
+        super().__init__(name=name, **kwargs)
+        self.chunk_indices = chunk_indices or []
+        self.pack_max_retries = pack_max_retries
+        self.packed_system_prompt = JointExtractionPrompts.PACKED_SYSTEM
+        self.packed_user_prompt_template = JointExtractionPrompts.PACKED_USER_TEMPLATE
+
+    def build_pack_prompt(self, chunks: List, data: GraphBuilderResult) -> str:
+        return self.format_prompt_template(
+            self.packed_user_prompt_template,
+            chunks=self.format_chunks(chunks),
+        )
+
+    def convert_chunk_output(self, chunk_output, chunk, data: GraphBuilderResult) -> List[Tuple[List[Entity], List[Triplet]]]:
+        return [self.convert_to_domain(chunk_output, chunk)]
+
+    async def execute(self, data: GraphBuilderResult) -> Tuple[List[Entity], List[Triplet]]:
+        chunks = self.get_pack_chunks(data)
+        results = await self.extract_pack(chunks, data)
+
+        entities = []
+        triplets = []
+        for chunk in chunks:
+            for chunk_entities, chunk_triplets in results.get(chunk.uid, []):
+                entities.extend(chunk_entities)
+                triplets.extend(chunk_triplets)
+
+        self.log.info(f"Extracted {len(entities)} entities and {len(triplets)} triplets from {len(chunks)} packed chunks")
+        return entities, triplets
@@ -1,6 +1,6 @@
-from typing import List, Tuple
+from typing import List, Optional
 
-from ..models import Triplet, TripletMetadata, Relationship, Entity, GraphBuilderResult
+from ..models import Triplet, Entity, GraphBuilderResult
 
 from .base_extractor import BaseExtractor
 from ..utils.prompts import RelationExtractionPrompts
@@ -12,7 +12,7 @@ from ..utils.extraction_models import RelationsListResponse
 class AsyncRelationExtractor(BaseExtractor):
     
     def __init__(self, 
-                 model: str = "gpt-4o-mini",
+                 model: Optional[str] = None,
                  embeddings_model=None,
                  rel_threshold: float = 0.7,
                  name: str = "AsyncRelationExtractor",
@@ -33,96 +33,11 @@ class AsyncRelationExtractor(BaseExtractor):
         self.system_prompt = system_prompt or RelationExtractionPrompts.SYSTEM
         self.user_prompt_template = user_prompt_template or RelationExtractionPrompts.USER_TEMPLATE
 
-    def calculate_triplet_positions(self, content: str, head_entity_name: str, tail_entity_name: str, relation_name: str) -> Tuple[int, int]:
-   
-        positions = self.find_text_positions(content, [head_entity_name, tail_entity_name, relation_name])
-        if not positions:
-            return 0, len(content)
-        start = min(pos[0] for pos in positions)
-        end = max(pos[1] for pos in positions)
-        return start, end
-
     def convert_to_domain(self, parsed_model: RelationsListResponse, chunk, entities: List[Entity]) -> List[Triplet]:
-
-        triplets = []
-        
-        for i, llm_relation in enumerate(parsed_model.relations):
-            try:
-                if not self.is_valid_entity_name(llm_relation.head.name):
-                    continue
-                    
-                if not self.is_valid_entity_label(llm_relation.head.label):
-                    continue
-                
-                if not self.is_valid_entity_name(llm_relation.tail.name):
-                    continue
-                    
-                if not self.is_valid_entity_label(llm_relation.tail.label):
-                    continue
-                
-                if not self.is_valid_relation_name(llm_relation.relation.name):
-                    continue
-                
-                
-                head_label = llm_relation.head.label
-                tail_label = llm_relation.tail.label
-                
-                generic_labels = {"entity", "entity type", "entitytype", "generic", "unknown", ""}
-                
-                if (head_label.lower().strip() in generic_labels or 
-                    tail_label.lower().strip() in generic_labels):
-                    continue
-                
-                head_entity = self.create_entity_with_metadata(
-                    llm_relation.head.name,
-                    head_label,
-                    chunk.text,
-                    chunk_id=chunk.uid,
-                    source="qTracker",
-                    summary=llm_relation.head.summary
-                )
-                
-                tail_entity = self.create_entity_with_metadata(
-                    llm_relation.tail.name,
-                    tail_label,
-                    chunk.text,
-                    chunk_id=chunk.uid,
-                    source="qTracker",
-                    summary=llm_relation.tail.summary
-                )
-                
-                relationship = Relationship(
-                    name=llm_relation.relation.name,
-                    label=llm_relation.relation.label
-                )
-                
-                start_pos, end_pos = self.calculate_triplet_positions(
-                    chunk.text, llm_relation.head.name, llm_relation.tail.name, llm_relation.relation.name
-                )
-                
-                metadata = TripletMetadata(
-                    context=chunk.text,
-                    start_position=start_pos,
-                    end_position=end_pos
-                )
-                
-                triplet = Triplet(
-                    head=head_entity,
-                    relation=relationship,
-                    tail=tail_entity,
-                    metadata=metadata
-                )
-                triplets.append(triplet)
-                self.log.debug(f"Triplet validated: {llm_relation.head.name} -[{llm_relation.relation.name}]-> {llm_relation.tail.name}")
-                
-            except Exception as e:
-                self.log.debug(f"Error processing relation: {str(e)[:50]}")
-                continue
-        
-        return triplets
+        return self.convert_relation_outputs(parsed_model.relations, chunk)
     
-    async def extract_relations_from_chunk(self, chunk, entities: List[Entity]) -> List[Triplet]:
-        
+    @staticmethod
+    def build_entity_list(entities: List[Entity]) -> str:
         entity_info = []
         for e in entities:
             if e.label and e.label.strip():
@@ -130,7 +45,11 @@ class AsyncRelationExtractor(BaseExtractor):
             else:
                 entity_info.append(e.name)
         
-        entity_list = ", ".join(entity_info) if entity_info else "No entities provided"
+        return ", ".join(entity_info) if entity_info else "No entities provided"
+
+    async def extract_relations_from_chunk(self, chunk, entities: List[Entity]) -> List[Triplet]:
+        
+        entity_list = self.build_entity_list(entities)
         
         text = self.prepare_text_with_alternatives(chunk.text, entities)
 
@@ -138,6 +57,7 @@ class AsyncRelationExtractor(BaseExtractor):
             template=self.user_prompt_template,
             response_model=RelationsListResponse,
             converter=lambda model: self.convert_to_domain(model, chunk, entities),
+            chunk_ids=[chunk.uid],
             text=text,
             entity_list=entity_list,
         )
@@ -159,5 +79,6 @@ class AsyncRelationExtractor(BaseExtractor):
 
     def save_result(self, step_result: List[Triplet], result: GraphBuilderResult) -> None:
         result.relation_extraction.extend(step_result)
+        self.save_llm_metrics(result)
                 
         
\ No newline at end of file
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+
+
+class ModelRouter:
+    """``llm`` that sends each call to the client registered for its model.
+
+    Calls for unregistered models (or without a model) go to ``default``,
+    which receives the model name as ``model=`` when ``pass_model`` is set.
+    """
+
+    def __init__(self, clients: Dict[str, Any] = None, default=None, pass_model: bool = True):
+        self.clients = dict(clients or {})
+        self.default = default
+        self.pass_model = pass_model
+
+    def client_for(self, model: Optional[str]):
+        client = self.clients.get(model)
+        if client is not None:
+            return client
+        if self.default is None:
+            raise KeyError(f"No LLM client for model {model!r}")
+        return self.default
+
+    async def hallucinate(self, model: Optional[str] = None, **kwargs):
+        client = self.client_for(model)
+        if client is self.default and self.pass_model and model is not None:
+            kwargs["model"] = model
+        return await client.hallucinate(**kwargs)
+
+
+class ModelCascade:
+    """Tries ``models`` in order, cheapest first, and escalates to the next
+    one only when the answer is not usable.
+
+    An answer escalates when it fails to parse or validate, when it was only
+    recovered by JSON repair or salvage (``escalate_on_salvage``), when it
+    yields fewer than ``min_items`` items, or when the extractor's validity
+    filters (for example ``is_valid_entity_label``) rejected more than
+    ``max_rejected_fraction`` of the items the model returned. The answer of
+    the last model is always kept.
+    """
+
+    def __init__(self,
+                 models: List[str],
+                 min_items: int = 1,
+                 max_rejected_fraction: float = 0.5,
+                 escalate_on_salvage: bool = True,
+                 cheap_retries: int = 1):
+        if not models:
+            raise ValueError("ModelCascade needs at least one model")
+        self.models = list(models)
+        self.min_items = min_items
+        self.max_rejected_fraction = max_rejected_fraction
+        self.escalate_on_salvage = escalate_on_salvage
+        self.cheap_retries = cheap_retries
+
+    def escalation_reason(self, returned_items: int, kept_items: int, parse_mode: Optional[str]) -> Optional[str]:
+        """Why an answer with ``returned_items`` parsed items, of which
+        ``kept_items`` survived conversion, should escalate; ``None`` keeps it."""
+        if self.escalate_on_salvage and parse_mode in ("repaired", "salvaged"):
+            return parse_mode
+        if kept_items < self.min_items:
+            return "empty"
+        if returned_items and (returned_items - kept_items) / returned_items > self.max_rejected_fraction:
+            return "rejected"
+        return None
@@ -0,0 +1,88 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class LLMScheduler:
+    """Global window of in-flight LLM calls shared by all extractors of a run.
+
+    At most ``max_in_flight`` calls run at once, independently of how chunks
+    are grouped into merge batches. Waiting calls are granted largest
+    priority first; extractors use the prompt size, so long prompts start
+    early and do not end up as the last stragglers of a run.
+    """
+
+    def __init__(self, max_in_flight: int = 16):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.calls = 0
+        self.queued = 0
+        self.wait_time = 0.0
+        self.peak_in_flight = 0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._waiters = []
+            self.in_flight = 0
+
+    def _grant(self) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def acquire(self, priority: float = 0.0) -> float:
+        """Waits for a slot and returns the time spent queued."""
+        self._bind_loop()
+        self.calls += 1
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self._grant()
+            return 0.0
+
+        queued_at = time.perf_counter()
+        future = self._loop.create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._sequence), future))
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the caller was cancelled
+                self.release()
+            raise
+        waited = time.perf_counter() - queued_at
+        self.wait_time += waited
+        return waited
+
+    def try_acquire(self) -> bool:
+        """Takes a slot only if one is free and nobody is queued."""
+        self._bind_loop()
+        if self.in_flight >= self.max_in_flight or self._waiters:
+            return False
+        self.calls += 1
+        self._grant()
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.max_in_flight:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._grant()
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "calls": self.calls,
+            "queued": self.queued,
+            "wait_time": self.wait_time,
+            "peak_in_flight": self.peak_in_flight,
+        }
@@ -1,5 +1,11 @@
 from .neo4j_entity_matcher import Neo4jEntityMatcher
+from .neo4j_exact_matcher import Neo4jExactMatcher
+from .partitioning import LabelPartitioner
+from .local_index import LocalVectorIndex
 
 __all__ = [
     'Neo4jEntityMatcher',
+    'Neo4jExactMatcher',
+    'LabelPartitioner',
+    'LocalVectorIndex',
 ]
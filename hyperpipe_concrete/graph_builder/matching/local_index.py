@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+class LocalVectorIndex:
+    """In-memory cosine index with compact vector storage.
+
+    Vectors are L2-normalized, optionally truncated to their first
+    ``truncate_dimension`` components (Matryoshka-style, re-normalized) and
+    stored as ``float32``, ``float16`` or symmetric per-vector ``int8`` codes.
+    Searches scan the compact codes; with ``rescore`` the best
+    ``top_k * oversample`` candidates are re-ranked with the full float32
+    vectors, so final scores and threshold decisions are exact.
+    """
+
+    QUANTIZATIONS = ("float32", "float16", "int8")
+
+    def __init__(self,
+                 quantization: str = "int8",
+                 truncate_dimension: Optional[int] = None,
+                 rescore: bool = True,
+                 oversample: int = 4):
+        if quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.quantization = quantization
+        self.truncate_dimension = truncate_dimension
+        self.rescore = rescore
+        self.oversample = oversample
+        self._partitions: Dict[Optional[str], Dict[str, Any]] = {}
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _scan_vectors(self, full: np.ndarray) -> np.ndarray:
+        if self.truncate_dimension:
+            return self._normalize(full[..., :self.truncate_dimension])
+        return full
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.quantization == "float16":
+            return vectors.astype(np.float16), None
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(vectors / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return vectors.astype(np.float32), None
+
+    def _partition(self, partition: Optional[str]) -> Dict[str, Any]:
+        return self._partitions.setdefault(partition, {
+            "pending": [], "payloads": [], "size": 0, "codes": None, "scales": None, "full": None,
+        })
+
+    def add(self, vector, payload: Any, partition: Optional[str] = None) -> None:
+        self._partition(partition)["pending"].append((np.asarray(vector, dtype=np.float32), payload))
+
+    @staticmethod
+    def _append(buffer: Optional[np.ndarray], size: int, rows: np.ndarray) -> np.ndarray:
+        # Capacity doubles so interleaved add/search stays amortized O(1) per row
+        needed = size + len(rows)
+        if buffer is None or needed > len(buffer):
+            capacity = max(needed, 2 * (len(buffer) if buffer is not None else 0), 64)
+            grown = np.empty((capacity,) + rows.shape[1:], dtype=rows.dtype)
+            if buffer is not None:
+                grown[:size] = buffer[:size]
+            buffer = grown
+        buffer[size:needed] = rows
+        return buffer
+
+    def _materialize(self, part: Dict[str, Any]) -> None:
+        if not part["pending"]:
+            return
+        full = self._normalize(np.stack([vector for vector, _ in part["pending"]]))
+        codes, scales = self._encode(self._scan_vectors(full))
+        part["payloads"].extend(payload for _, payload in part["pending"])
+        part["pending"] = []
+
+        size = part["size"]
+        part["codes"] = self._append(part["codes"], size, codes)
+        if scales is not None:
+            part["scales"] = self._append(part["scales"], size, scales)
+        if self.rescore:
+            part["full"] = self._append(part["full"], size, full)
+        part["size"] = size + len(codes)
+
+    def search(self,
+               vector,
+               top_k: int = 1,
+               threshold: Optional[float] = None,
+               partition: Optional[str] = None) -> List[Tuple[float, Any]]:
+        part = self._partitions.get(partition)
+        if part is None:
+            return []
+        self._materialize(part)
+        size = part["size"]
+        if not size:
+            return []
+
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        scan_query = self._scan_vectors(query)
+        approx = part["codes"][:size].astype(np.float32) @ scan_query
+        if part["scales"] is not None:
+            approx *= part["scales"][:size]
+
+        candidates = min(len(approx), max(top_k * self.oversample, top_k) if self.rescore else top_k)
+        indices = np.argpartition(-approx, candidates - 1)[:candidates]
+        scores = part["full"][indices] @ query if self.rescore else approx[indices]
+
+        order = np.argsort(-scores)[:top_k]
+        results = []
+        for position in order:
+            score = float(scores[position])
+            if threshold is not None and score < threshold:
+                break
+            results.append((score, part["payloads"][indices[position]]))
+        return results
+
+    def __len__(self) -> int:
+        return sum(len(part["payloads"]) + len(part["pending"]) for part in self._partitions.values())
+
+    def memory_bytes(self) -> Dict[str, int]:
+        for part in self._partitions.values():
+            self._materialize(part)
+        return {
+            "codes": sum(part["codes"][:part["size"]].nbytes + (part["scales"][:part["size"]].nbytes if part["scales"] is not None else 0)
+                         for part in self._partitions.values() if part["codes"] is not None),
+            "rescore": sum(part["full"][:part["size"]].nbytes for part in self._partitions.values() if part["full"] is not None),
+        }
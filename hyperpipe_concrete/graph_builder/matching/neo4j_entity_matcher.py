@@ -1,23 +1,39 @@
 from typing import List, Dict, Optional, Tuple
 from hyperpipe_core import AsyncStep
-from ..models import Triplet, Entity, GraphBuilderResult
+from ..models import Triplet, Entity, GraphBuilderResult, vector_to_list
+from ..database import as_async_graph
+from .partitioning import LabelPartitioner
+from .local_index import LocalVectorIndex
 
 
 class Neo4jEntityMatcher(AsyncStep[GraphBuilderResult, None]):
     
     def __init__(
         self,
-        neo4j_graph,
+        neo4j_graph=None,
         name: str = "Neo4jEntityMatcher",
         similarity_threshold: float = 0.85,
         top_k: int = 1,
-        vector_index_name: str = "embedded_entities_index"
+        vector_index_name: str = "embedded_entities_index",
+        embedding_dimension: int = 1536,
+        partitioner: Optional[LabelPartitioner] = None,
+        partition_by_label: bool = True,
+        global_fallback: bool = True,
+        fallback_top_k: int = 10,
+        local_index: Optional[LocalVectorIndex] = None
     ):
         self.name = name
-        self.neo4j_graph = neo4j_graph
+        self.neo4j_graph = as_async_graph(neo4j_graph)
         self.similarity_threshold = similarity_threshold
         self.top_k = top_k
         self.vector_index_name = vector_index_name
+        self.embedding_dimension = embedding_dimension
+        if partitioner is None and partition_by_label:
+            partitioner = LabelPartitioner(embedding_dimension=embedding_dimension)
+        self.partitioner = partitioner
+        self.global_fallback = global_fallback
+        self.fallback_top_k = fallback_top_k
+        self.local_index = local_index
         
     def _extract_unique_entities(self, triplets: List[Triplet]) -> Dict[str, Entity]:
         unique_entities = {}
@@ -36,39 +52,85 @@ class Neo4jEntityMatcher(AsyncStep[GraphBuilderResult, None]):
     
 
     
-    async def _find_similar_entity_in_neo4j(self, entity: Entity) -> Optional[Tuple[str, str, float]]:
+    async def _query_vector_index(self, entity: Entity, index_name: str, top_k: int, partition_label: str = None) -> Optional[Tuple[str, str, float, str]]:
+        # partition_label filters hits of the global index down to the entity's
+        # partition; nodes without any partition label (exported before
+        # partitioning) are kept, since no partition index covers them
+        query = """
+        CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)
+        YIELD node, score
+        WHERE score >= $threshold AND ($partition_label IS NULL OR $partition_label IN labels(node)
+              OR NOT any(l IN labels(node) WHERE l STARTS WITH $embedded_label AND l <> $embedded_label))
+        RETURN node.name as name, node.label as label, score, elementId(node) as node_id,
+               CASE WHEN $with_embedding THEN node.embedding END as embedding
+        ORDER BY score DESC
+        LIMIT 1
+        """
+        
+        params = {
+            "index_name": index_name,
+            "top_k": top_k,
+            "embedding": vector_to_list(entity.embedding),
+            "threshold": self.similarity_threshold,
+            "partition_label": partition_label,
+            "embedded_label": self.partitioner.embedded_label if self.partitioner is not None else None,
+            "with_embedding": self.local_index is not None,
+        }
+        
+        results = await self.neo4j_graph.read_query(query, params)
+        
+        if results:
+            result = results[0]
+            if self.local_index is not None and result.get('embedding') is not None:
+                self.local_index.add(
+                    result['embedding'],
+                    (result['name'], result['label'], result.get('node_id')),
+                    self._local_partition(entity),
+                )
+            return (result['name'], result['label'], result['score'], result.get('node_id'))
+        return None
+
+    def _local_partition(self, entity: Entity) -> Optional[str]:
+        return self.partitioner.partition(entity.label) if self.partitioner is not None else None
+
+    def _find_in_local_index(self, entity: Entity) -> Optional[Tuple[str, str, float, str]]:
+        hits = self.local_index.search(entity.embedding, 1, self.similarity_threshold, self._local_partition(entity))
+        if not hits:
+            return None
+        score, (name, label, node_id) = hits[0]
+        return (name, label, score, node_id)
+
+    async def _find_similar_entity_in_neo4j(self, entity: Entity) -> Optional[Tuple[str, str, float, str]]:
         
-        if not entity.embedding:
+        if entity.embedding is None:
             return None
         
+        if self.local_index is not None:
+            local_match = self._find_in_local_index(entity)
+            if local_match:
+                return local_match
+
+        index_name = self.vector_index_name
         try:
-            query = """
-            CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)
-            YIELD node, score
-            WHERE score >= $threshold
-            RETURN node.name as name, node.label as label, score
-            ORDER BY score DESC
-            LIMIT 1
-            """
-            
-            params = {
-                "index_name": self.vector_index_name,
-                "top_k": self.top_k,
-                "embedding": entity.embedding,
-                "threshold": self.similarity_threshold
-            }
-            
-            results = await self.neo4j_graph.read_query(query, params)
-            
-            if results:
-                result = results[0]
-                name = result['name']
-                label = result['label']
-                score = result['score']
-                
-                return (name, label, score)
-            else:
-                return None
+            if self.partitioner is not None:
+                partition_label = self.partitioner.partition_label(entity.label)
+                partition_index, _ = await self.partitioner.ensure_index(self.neo4j_graph, entity.label)
+                if partition_index is not None:
+                    index_name = partition_index
+                    try:
+                        match = await self._query_vector_index(entity, partition_index, self.top_k)
+                    except Exception as e:
+                        self.log.warning(f"Partition index '{partition_index}' query failed, using '{self.vector_index_name}': {e}")
+                    else:
+                        if match or not self.global_fallback:
+                            return match
+
+                index_name = self.vector_index_name
+                return await self._query_vector_index(
+                    entity, index_name, max(self.top_k, self.fallback_top_k), partition_label
+                )
+
+            return await self._query_vector_index(entity, index_name, self.top_k)
                 
         except Exception as e:
             error_msg = str(e)
@@ -81,18 +143,20 @@ class Neo4jEntityMatcher(AsyncStep[GraphBuilderResult, None]):
                 self.log.error(f"Neo4j error message: {e.message}")
                 
             # Log embedding context for debugging
-            embedding_info = f"type: {type(entity.embedding)}, length: {len(entity.embedding) if entity.embedding else 0}"
-            self.log.error(f"Query failed - index: '{self.vector_index_name}', embedding {embedding_info}")
+            embedding_info = f"type: {type(entity.embedding)}, length: {len(entity.embedding) if entity.embedding is not None else 0}"
+            self.log.error(f"Query failed - index: '{index_name}', embedding {embedding_info}")
             
             return None
     
-    def _create_replacement_entity(self, original_entity: Entity, neo4j_name: str, neo4j_label: str) -> Entity:
+    def _create_replacement_entity(self, original_entity: Entity, neo4j_name: str, neo4j_label: str, node_id: str = None) -> Entity:
         
         replacement_entity = Entity(
             name=neo4j_name,
             label=neo4j_label,
             embedding=original_entity.embedding,
-            metadata=original_entity.metadata
+            metadata=original_entity.metadata,
+            graph_match='vector',
+            node_id=node_id
         )
         
         replacement_entity.alternatives.append(original_entity)
@@ -138,14 +202,17 @@ class Neo4jEntityMatcher(AsyncStep[GraphBuilderResult, None]):
             
             elif entity.special_type == 'PRICE':
                 continue
+
+            elif entity.graph_match:
+                continue
             
             similar_result = await self._find_similar_entity_in_neo4j(entity)
             if similar_result:
-                neo4j_name, neo4j_label, score = similar_result
+                neo4j_name, neo4j_label, score, node_id = similar_result
                 self.log.debug(f"Neo4j match found: {entity.name} -> {neo4j_name} (score: {score:.3f})")
                 
                 replacement_entity = self._create_replacement_entity(
-                    entity, neo4j_name, neo4j_label
+                    entity, neo4j_name, neo4j_label, node_id
                 )
                 entity_mapping[entity_key] = replacement_entity
                 matches_found += 1
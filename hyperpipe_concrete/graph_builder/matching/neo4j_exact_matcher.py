@@ -0,0 +1,190 @@
+from typing import List, Dict, Optional, Tuple
+import re
+from hyperpipe_core import AsyncStep
+from rapidfuzz import fuzz
+from ..models import Triplet, Entity, GraphBuilderResult
+from ..database import as_async_graph
+from ..utils.naming import normalize_node_name
+from .local_index import LocalVectorIndex
+from .partitioning import LabelPartitioner
+
+
+LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+class Neo4jExactMatcher(AsyncStep[GraphBuilderResult, None]):
+    """Resolves triplet entities that already exist in the graph before they
+    are embedded.
+
+    Entities are looked up in batches on ``(label, name)`` of embedded nodes,
+    optionally followed by a fulltext lookup verified with ``fuzz.ratio``.
+    Resolved entities take the node's name, label and stored embedding, so
+    ``TripletEmbedder`` and ``Neo4jEntityMatcher`` skip them.
+    """
+
+    def __init__(
+        self,
+        neo4j_graph=None,
+        name: str = "Neo4jExactMatcher",
+        embedded_label: str = "Embedded",
+        lookup_batch_size: int = 500,
+        fulltext_index_name: Optional[str] = None,
+        fuzzy_threshold: float = 0.9,
+        create_indexes: bool = True,
+        local_index: Optional[LocalVectorIndex] = None,
+        partitioner: Optional[LabelPartitioner] = None
+    ):
+        self.name = name
+        self.neo4j_graph = as_async_graph(neo4j_graph)
+        self.embedded_label = embedded_label
+        self.lookup_batch_size = lookup_batch_size
+        self.fulltext_index_name = fulltext_index_name
+        self.fuzzy_threshold = fuzzy_threshold
+        self.create_indexes = create_indexes
+        self.local_index = local_index
+        self.partitioner = partitioner
+        self._indexes_ensured = False
+
+    async def _ensure_indexes(self) -> None:
+        if self._indexes_ensured or not self.create_indexes:
+            return
+        self._indexes_ensured = True
+        try:
+            await self.neo4j_graph.write_query(
+                f"CREATE INDEX {self.embedded_label.lower()}_label_name_index IF NOT EXISTS "
+                f"FOR (n:{self.embedded_label}) ON (n.label, n.name)"
+            )
+            if self.fulltext_index_name:
+                await self.neo4j_graph.write_query(
+                    f"CREATE FULLTEXT INDEX {self.fulltext_index_name} IF NOT EXISTS "
+                    f"FOR (n:{self.embedded_label}) ON EACH [n.name]"
+                )
+        except Exception as e:
+            self.log.error(f"Index creation failed: {str(e)}")
+
+    @staticmethod
+    def _entity_key(entity: Entity) -> Tuple[Optional[str], str]:
+        return (entity.label, normalize_node_name(entity.name))
+
+    def _extract_unresolved_entities(self, triplets: List[Triplet]) -> Dict[Tuple[Optional[str], str], Entity]:
+        unresolved = {}
+        for triplet in triplets:
+            for entity in (triplet.head, triplet.tail):
+                if entity.graph_match or entity.special_type in ['DATE', 'PRICE'] or not entity.name:
+                    continue
+                unresolved.setdefault(self._entity_key(entity), entity)
+        return unresolved
+
+    async def _lookup_exact(self, keys: List[Tuple[Optional[str], str]]) -> Dict[Tuple[Optional[str], str], dict]:
+        query = f"""
+        UNWIND $keys AS key
+        OPTIONAL MATCH (n:{self.embedded_label} {{label: key.label, name: key.name}})
+        WITH key, head(collect(n)) AS n
+        WHERE n IS NOT NULL
+        RETURN key.label AS key_label, key.name AS key_name,
+               n.name AS name, n.label AS label, n.embedding AS embedding, elementId(n) AS node_id
+        """
+        found = {}
+        for i in range(0, len(keys), self.lookup_batch_size):
+            batch = [{"label": label, "name": name} for label, name in keys[i:i + self.lookup_batch_size]]
+            try:
+                records = await self.neo4j_graph.read_query(query, {"keys": batch})
+            except Exception as e:
+                self.log.error(f"Neo4j exact lookup failed for {len(batch)} entities: {str(e)}")
+                continue
+            for record in records:
+                found[(record['key_label'], record['key_name'])] = record
+        return found
+
+    @staticmethod
+    def _fulltext_query(name: str) -> str:
+        terms = [LUCENE_SPECIAL.sub(r'\\\1', term) for term in name.split()]
+        return " AND ".join(f"{term}~" for term in terms if term)
+
+    async def _lookup_fulltext(self, keys: List[Tuple[Optional[str], str]]) -> Dict[Tuple[Optional[str], str], dict]:
+        query = """
+        UNWIND $keys AS key
+        CALL {
+            WITH key
+            CALL db.index.fulltext.queryNodes($index_name, key.query, {limit: 5}) YIELD node, score
+            WHERE node.label = key.label
+            RETURN node
+        }
+        RETURN key.label AS key_label, key.name AS key_name,
+               node.name AS name, node.label AS label, node.embedding AS embedding, elementId(node) AS node_id
+        """
+        found = {}
+        for i in range(0, len(keys), self.lookup_batch_size):
+            batch = [
+                {"label": label, "name": name, "query": self._fulltext_query(name)}
+                for label, name in keys[i:i + self.lookup_batch_size]
+            ]
+            batch = [key for key in batch if key["query"]]
+            if not batch:
+                continue
+            try:
+                records = await self.neo4j_graph.read_query(query, {"keys": batch, "index_name": self.fulltext_index_name})
+            except Exception as e:
+                self.log.error(f"Neo4j fulltext lookup failed for {len(batch)} entities: {str(e)}")
+                continue
+            # Lucene scores are not comparable across queries, so candidates
+            # are accepted on string similarity instead
+            for record in records:
+                key = (record['key_label'], record['key_name'])
+                score = fuzz.ratio(record['key_name'].lower(), (record['name'] or "").lower()) / 100
+                if score >= self.fuzzy_threshold and score > found.get(key, {}).get('score', 0):
+                    found[key] = {**record, 'score': score}
+        return found
+
+    def _create_replacement_entity(self, original_entity: Entity, record: dict, match_type: str) -> Entity:
+        replacement_entity = Entity(
+            name=record['name'],
+            label=record['label'],
+            embedding=record['embedding'] if record['embedding'] is not None else original_entity.embedding,
+            metadata=original_entity.metadata,
+            graph_match=match_type,
+            node_id=record.get('node_id'),
+        )
+        replacement_entity.alternatives.append(original_entity)
+        if self.local_index is not None and record['embedding'] is not None:
+            # Known nodes seed the vector matcher's local cache
+            partition = self.partitioner.partition(record['label']) if self.partitioner is not None else None
+            self.local_index.add(record['embedding'], (record['name'], record['label'], record.get('node_id')), partition)
+        return replacement_entity
+
+    async def execute(self, result: GraphBuilderResult) -> None:
+
+        if not result.relation_extraction:
+            return None
+
+        await self._ensure_indexes()
+
+        triplets = result.relation_extraction
+        unresolved = self._extract_unresolved_entities(triplets)
+        self.log.info(f"Looking up {len(unresolved)} entities by label and name")
+
+        entity_mapping = {}
+        exact = await self._lookup_exact(list(unresolved))
+        for key, record in exact.items():
+            entity_mapping[key] = self._create_replacement_entity(unresolved[key], record, 'exact')
+
+        fulltext_matches = 0
+        if self.fulltext_index_name:
+            remaining = [key for key in unresolved if key not in entity_mapping]
+            fulltext = await self._lookup_fulltext(remaining)
+            for key, record in fulltext.items():
+                entity_mapping[key] = self._create_replacement_entity(unresolved[key], record, 'fulltext')
+            fulltext_matches = len(fulltext)
+
+        if entity_mapping:
+            for triplet in triplets:
+                if not triplet.head.graph_match:
+                    triplet.head = entity_mapping.get(self._entity_key(triplet.head), triplet.head)
+                if not triplet.tail.graph_match:
+                    triplet.tail = entity_mapping.get(self._entity_key(triplet.tail), triplet.tail)
+
+        self.log.info(f"Exact matching completed: {len(exact)} exact, {fulltext_matches} fulltext matches")
+        return None
+
+    def save_result(self, step_result: GraphBuilderResult, result: GraphBuilderResult) -> None:
+        pass
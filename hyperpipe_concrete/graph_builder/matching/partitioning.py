@@ -0,0 +1,111 @@
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import re
+
+
+class LabelPartitioner:
+    """Maps entity labels to vector-index partitions.
+
+    Every embedded node gets an extra ``<embedded_label><Partition>`` label
+    (e.g. ``EmbeddedPerson``) and each partition has its own vector index on
+    that label, so similarity searches only scan nodes of the same label or
+    label group. ``groups`` maps labels to a shared partition name, e.g.
+    ``{"company": "organization"}``.
+
+    One instance is meant to be shared by the matcher and the exporter.
+    Nodes written before partitioning was enabled, or before ``groups``
+    changed, lack their current partition label until :meth:`backfill` runs.
+    """
+
+    def __init__(self,
+                 embedded_label: str = "Embedded",
+                 groups: Dict[str, str] = None,
+                 embedding_dimension: int = 1536,
+                 similarity_function: str = "cosine",
+                 index_prefix: str = "embedded",
+                 await_index_timeout: float = 30.0):
+        self.embedded_label = embedded_label
+        self.groups = {self._key(label): group for label, group in (groups or {}).items()}
+        self.embedding_dimension = embedding_dimension
+        self.similarity_function = similarity_function
+        self.index_prefix = index_prefix
+        self.await_index_timeout = await_index_timeout
+        self.ensured: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(label: Optional[str]) -> str:
+        return re.sub(r"[^a-z0-9]+", "_", (label or "").strip().lower()).strip("_")
+
+    def partition(self, label: Optional[str]) -> str:
+        key = self._key(label) or "entity"
+        return self._key(self.groups.get(key, key)) or "entity"
+
+    def partition_label(self, label: Optional[str]) -> str:
+        partition = self.partition(label)
+        pascal = "".join(part.capitalize() for part in partition.split("_"))
+        if not pascal[0].isalpha():
+            pascal = "Entity" + pascal
+        return f"{self.embedded_label}{pascal}"
+
+    def index_name(self, label: Optional[str]) -> str:
+        return f"{self.index_prefix}_{self.partition(label)}_index"
+
+    async def ensure_index(self, graph, label: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Creates the partition's vector index on first use. Returns the index
+        name, or ``None`` and the error when it could not be created; failed
+        partitions are not retried."""
+        index_name = self.index_name(label)
+        if index_name in self.ensured:
+            return index_name, None
+        if index_name in self.failed:
+            return None, self.failed[index_name]
+
+        lock = self._locks.setdefault(index_name, asyncio.Lock())
+        async with lock:
+            if index_name in self.ensured:
+                return index_name, None
+            if index_name in self.failed:
+                return None, self.failed[index_name]
+            try:
+                # Index and label names cannot be query parameters; both are
+                # built from [A-Za-z0-9_] only.
+                await graph.write_query(
+                    f"CREATE VECTOR INDEX {index_name} IF NOT EXISTS "
+                    f"FOR (n:{self.partition_label(label)}) ON (n.embedding) "
+                    "OPTIONS {indexConfig: {`vector.dimensions`: $dimension, `vector.similarity_function`: $similarity}}",
+                    {"dimension": self.embedding_dimension, "similarity": self.similarity_function},
+                )
+                if self.await_index_timeout:
+                    await graph.read_query(
+                        "CALL db.awaitIndex($index_name, $timeout)",
+                        {"index_name": index_name, "timeout": int(self.await_index_timeout)},
+                    )
+            except Exception as e:
+                self.failed[index_name] = str(e)
+                return None, str(e)
+            self.ensured.add(index_name)
+        return index_name, None
+
+    async def backfill(self, graph, batch_size: int = 10000) -> int:
+        """Adds the current partition label to every embedded node that lacks
+        it, so nodes exported earlier are found by the partition indexes.
+        Returns the number of nodes relabelled."""
+        records = await graph.read_query(
+            f"MATCH (n:{self.embedded_label}) RETURN DISTINCT coalesce(n.label, '') AS label"
+        )
+        relabelled = 0
+        for record in records:
+            label = record['label']
+            results = await graph.write_query(
+                "CALL apoc.periodic.iterate("
+                f"'MATCH (n:{self.embedded_label}) WHERE coalesce(n.label, \\'\\') = $label "
+                "AND NOT $partition_label IN labels(n) RETURN n', "
+                "'CALL apoc.create.addLabels(n, [$partition_label]) YIELD node RETURN count(node)', "
+                "{batchSize: $batch_size, params: {label: $label, partition_label: $partition_label}}) "
+                "YIELD total RETURN total",
+                {"label": label, "partition_label": self.partition_label(label), "batch_size": batch_size},
+            )
+            relabelled += results[0]['total'] if results else 0
+        return relabelled
@@ -1,9 +1,11 @@
 from .entity_merger import EntityTextMerger
 from .relation_merger import RelationTextMerger
 from .triplet_entity_merger import TripletEntityMerger
+from .entity_resolver import EntityResolver
 
 __all__ = [
     'EntityTextMerger',
     'RelationTextMerger',
-    'TripletEntityMerger'
+    'TripletEntityMerger',
+    'EntityResolver'
 ]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from hyperpipe_core import Step
 from ..models import Entity, GraphBuilderResult
 from rapidfuzz import process,fuzz
@@ -8,28 +8,40 @@ class EntityTextMerger(Step):
     def __init__(
         self,
         name: str = "EntityTextMerger",
-        name_similarity_threshold: float = 0.7
+        name_similarity_threshold: float = 0.7,
+        label_mapping: Dict[str, str] = None
     ):
         
         self.name = name
         self.name_similarity_threshold = name_similarity_threshold
+        # A precomputed mapping keeps labels consistent when entities are
+        # merged in separate blocks
+        self.label_mapping = label_mapping
 
     def _deduplicate_by_name(self, entities: List[Entity]) -> List[Entity]:
         
         unique_entities = [entities[0]]
+        unique_names = [entities[0].name]
+        index_by_name = {entities[0].name: 0}
         
         for entity in entities[1:]:
             
-            match = process.extractOne(
-                entity.name, 
-                [n.name for n in unique_entities], 
-                scorer=fuzz.ratio,
-            )
+            if entity.name in index_by_name and self.name_similarity_threshold <= 1:
+                match = (entity.name, 100.0, index_by_name[entity.name])
+            else:
+                match = process.extractOne(
+                    entity.name, 
+                    unique_names, 
+                    scorer=fuzz.ratio,
+                    score_cutoff=round(self.name_similarity_threshold * 100, 6),
+                )
 
-            if (match[1]/100) < self.name_similarity_threshold:
+            if match is None:
+                index_by_name.setdefault(entity.name, len(unique_entities))
                 unique_entities.append(entity)
+                unique_names.append(entity.name)
             else:
-                existing_entity = next(e for e in unique_entities if e.name == match[0])
+                existing_entity = unique_entities[match[2]]
                 existing_entity.alternatives.append(entity)
                 self.log.debug(f"Entity merged: {entity.name} -> {match[0]} (similarity: {match[1]/100:.2f})")
                 
@@ -37,13 +49,8 @@ class EntityTextMerger(Step):
                 
         return unique_entities
 
-    def _normalize_labels(self, entities: List[Entity], label_similarity_threshold: float = 0.8) -> List[Entity]:
-        if not entities:
-            return entities
-            
-        unique_labels = list(set(entity.label for entity in entities))
-        
-        
+    @staticmethod
+    def build_label_mapping(unique_labels: List[str], label_similarity_threshold: float = 0.8) -> Dict[str, str]:
         label_mapping = {}
         normalized_labels = []
         
@@ -64,6 +71,16 @@ class EntityTextMerger(Step):
             else:
                 normalized_labels.append(label)
                 label_mapping[label] = label
+        return label_mapping
+
+    def _normalize_labels(self, entities: List[Entity], label_similarity_threshold: float = 0.8) -> List[Entity]:
+        if not entities:
+            return entities
+            
+        label_mapping = self.label_mapping
+        if label_mapping is None:
+            unique_labels = list(set(entity.label for entity in entities))
+            label_mapping = self.build_label_mapping(unique_labels, label_similarity_threshold)
         
         updated_count = 0
         for entity in entities:
@@ -0,0 +1,229 @@
+from typing import Dict, List, Optional, Tuple
+from hyperpipe_core import Step
+from ..models import Entity, Triplet, GraphBuilderResult
+import numpy as np
+
+Identity = Tuple[str, Optional[str]]
+
+
+class _Block:
+    """Unit-normalized embeddings of the identities seen for one label,
+    grown in place with doubling capacity."""
+
+    def __init__(self):
+        self.keys: List[Identity] = []
+        self.matrix: Optional[np.ndarray] = None
+        self.size = 0
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self.matrix[:self.size]
+
+    def extend(self, keys: List[Identity], rows: np.ndarray) -> None:
+        needed = self.size + len(rows)
+        if self.matrix is None or needed > len(self.matrix):
+            grown = np.empty((max(needed, 2 * self.size), rows.shape[1]), dtype=np.float32)
+            if self.size:
+                grown[:self.size] = self.rows
+            self.matrix = grown
+        self.matrix[self.size:needed] = rows
+        self.keys.extend(keys)
+        self.size = needed
+
+
+class EntityResolver(Step):
+    """Merges triplet entities whose embeddings are near-identical.
+
+    Runs after embedding. Entities are blocked by label, and each new
+    (name, label) identity is compared with every identity of its block by
+    batched matrix products over unit-normalized float32 embeddings. Its
+    ``top_k`` neighbours at or above ``similarity_threshold`` are merged
+    with a union-find, so synonyms with different spellings resolve to one
+    entity. The representative of a group is a graph-matched entity when
+    there is one, and the first one seen otherwise; merged names are kept as
+    ``alternatives``. Groups matched to different graph nodes never merge,
+    and triplets whose head and tail end up in the same group are dropped.
+
+    State is kept across batches, so every identity is compared once per
+    run and the total work grows with the block sizes, not with the number
+    of batches.
+    """
+
+    def __init__(
+        self,
+        name: str = "EntityResolver",
+        similarity_threshold: float = 0.95,
+        top_k: int = 10,
+        embedding_field: str = "embedding",
+        block_by_label: bool = True,
+        query_batch_size: int = 1024,
+    ):
+        self.name = name
+        self.similarity_threshold = similarity_threshold
+        self.top_k = top_k
+        self.embedding_field = embedding_field
+        self.block_by_label = block_by_label
+        self.query_batch_size = query_batch_size
+
+        self._blocks: Dict[str, _Block] = {}
+        self._parent: Dict[Identity, Identity] = {}
+        self._order: Dict[Identity, int] = {}
+        self._entity: Dict[Identity, Entity] = {}
+        # Graph node of each group, kept on its root
+        self._node: Dict[Identity, Optional[str]] = {}
+        self._aliased = set()
+
+    @staticmethod
+    def _identity(entity: Entity) -> Identity:
+        return (entity.name, entity.label)
+
+    def _block_key(self, entity: Entity) -> str:
+        return (entity.label or "").strip().lower() if self.block_by_label else ""
+
+    def _find(self, key: Identity) -> Identity:
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def _rank(self, key: Identity) -> Tuple[int, int]:
+        # Graph-matched entities win, then the one seen first
+        return (0 if self._entity[key].node_id is not None else 1, self._order[key])
+
+    def _union(self, first: Identity, second: Identity) -> bool:
+        first_root, second_root = self._find(first), self._find(second)
+        if first_root == second_root:
+            return False
+        first_node = self._node.get(first_root)
+        second_node = self._node.get(second_root)
+        if first_node is not None and second_node is not None and first_node != second_node:
+            return False
+        root, child = sorted((first_root, second_root), key=self._rank)
+        self._parent[child] = root
+        self._node[root] = first_node if first_node is not None else second_node
+        return True
+
+    def _attach_node(self, key: Identity, entity: Entity) -> None:
+        """Records a graph match found for an identity after it was grouped."""
+        self._entity[key] = entity
+        root = self._find(key)
+        group_node = self._node.get(root)
+        if group_node is None:
+            # The matched entity becomes the group's representative
+            self._parent[root] = key
+            self._parent[key] = key
+            self._node[key] = entity.node_id
+        elif group_node != entity.node_id:
+            # Matched to another node than its group: split it off
+            self._parent[key] = key
+            self._node[key] = entity.node_id
+
+    def _normalized(self, embeddings: List) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _neighbour_pairs(self, block: _Block, start: int) -> List[Tuple[int, int]]:
+        """Pairs ``(query, candidate)`` of block rows from ``start`` on with
+        their top-k neighbours above the threshold; candidates are earlier
+        rows and the new rows themselves."""
+        pairs = []
+        rows = block.rows
+        for batch_start in range(start, block.size, self.query_batch_size):
+            batch_end = min(batch_start + self.query_batch_size, block.size)
+            # Each query only looks at rows before it, so every pair is scored once
+            scores = rows[batch_start:batch_end] @ rows[:batch_end].T
+            positions = np.arange(batch_start, batch_end)
+            scores[np.arange(batch_end)[None, :] >= positions[:, None]] = -np.inf
+            k = min(self.top_k, batch_end - 1)
+            if k <= 0:
+                continue
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            for query, candidate in zip(*np.nonzero(top_scores >= self.similarity_threshold)):
+                pairs.append((int(positions[query]), int(top[query, candidate])))
+        return pairs
+
+    def _register(self, entities: List[Entity]) -> int:
+        """Adds identities not seen before and merges them into their
+        neighbours; returns the number of merges."""
+        new_by_block: Dict[str, List[Entity]] = {}
+        for entity in entities:
+            key = self._identity(entity)
+            if key in self._parent:
+                if entity.node_id is not None and self._entity[key].node_id is None:
+                    self._attach_node(key, entity)
+                continue
+            self._parent[key] = key
+            self._order[key] = len(self._order)
+            self._entity[key] = entity
+            self._node[key] = entity.node_id
+            new_by_block.setdefault(self._block_key(entity), []).append(entity)
+
+        merges = 0
+        for block_key, block_entities in new_by_block.items():
+            block = self._blocks.setdefault(block_key, _Block())
+            start = block.size
+            rows = self._normalized([getattr(entity, self.embedding_field) for entity in block_entities])
+            block.extend([self._identity(entity) for entity in block_entities], rows)
+            for query, candidate in self._neighbour_pairs(block, start):
+                merges += int(self._union(block.keys[query], block.keys[candidate]))
+        return merges
+
+    def _representative(self, entity: Entity) -> Entity:
+        key = self._identity(entity)
+        if key not in self._parent:
+            return entity
+        root = self._find(key)
+        if root == key:
+            return entity
+        representative = self._entity[root]
+        if key not in self._aliased:
+            self._aliased.add(key)
+            merged = self._entity[key]
+            # A former representative brings the names merged into it
+            representative.alternatives.extend([merged.model_copy(update={"alternatives": []}), *merged.alternatives])
+        return representative
+
+    def _collapses(self, triplet: Triplet) -> bool:
+        head, tail = self._identity(triplet.head), self._identity(triplet.tail)
+        return (head != tail and head in self._parent and tail in self._parent
+                and self._find(head) == self._find(tail))
+
+    def execute(self, result: GraphBuilderResult) -> GraphBuilderResult:
+        if not result.relation_extraction:
+            return result
+
+        candidates = []
+        for triplet in result.relation_extraction:
+            for entity in (triplet.head, triplet.tail):
+                if entity.special_type in ['DATE', 'PRICE'] or getattr(entity, self.embedding_field) is None:
+                    continue
+                candidates.append(entity)
+
+        merges = self._register(candidates)
+        replaced = 0
+        triplets = []
+        for triplet in result.relation_extraction:
+            if self._collapses(triplet):
+                # Both ends resolved to one entity; keeping it would add a self-loop
+                continue
+            head = self._representative(triplet.head)
+            tail = self._representative(triplet.tail)
+            replaced += (head is not triplet.head) + (tail is not triplet.tail)
+            triplet.head = head
+            triplet.tail = tail
+            triplets.append(triplet)
+        dropped = len(result.relation_extraction) - len(triplets)
+        result.relation_extraction = triplets
+
+        result.metrics.increment("entity_resolver.merges", merges)
+        result.metrics.increment("entity_resolver.self_loops_dropped", dropped)
+        self.log.info(f"Entity resolution: {merges} merges, {replaced} triplet endpoints replaced, {dropped} self-loops dropped across {len(self._blocks)} label blocks")
+        return result
+
+    def save_result(self, step_result: GraphBuilderResult, result: GraphBuilderResult):
+        result.relation_extraction = step_result.relation_extraction
+        return result
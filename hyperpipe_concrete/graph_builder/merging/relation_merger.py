@@ -21,18 +21,26 @@ class RelationTextMerger(Step):
             return relationships
             
         unique_relationships = [relationships[0]]
+        unique_names = [relationships[0].name]
+        index_by_name = {relationships[0].name: 0}
         
         for relationship in relationships[1:]:
-            match = process.extractOne(
-                relationship.name, 
-                [r.name for r in unique_relationships], 
-                scorer=fuzz.ratio,
-            )
+            if relationship.name in index_by_name and self.name_similarity_threshold <= 1:
+                match = (relationship.name, 100.0, index_by_name[relationship.name])
+            else:
+                match = process.extractOne(
+                    relationship.name, 
+                    unique_names, 
+                    scorer=fuzz.ratio,
+                    score_cutoff=round(self.name_similarity_threshold * 100, 6),
+                )
 
-            if (match[1]/100) < self.name_similarity_threshold:
+            if match is None:
+                index_by_name.setdefault(relationship.name, len(unique_relationships))
                 unique_relationships.append(relationship)
+                unique_names.append(relationship.name)
             else:
-                existing_relationship = next(r for r in unique_relationships if r.name == match[0])
+                existing_relationship = unique_relationships[match[2]]
                 original_name = relationship.name
                 relationship.name = existing_relationship.name
                 self.log.debug(f"Relation merged: {original_name} -> {existing_relationship.name} (similarity: {match[1]/100:.2f})")
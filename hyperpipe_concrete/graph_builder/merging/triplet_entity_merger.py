@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Dict, Sequence
 from hyperpipe_core import Step
 from ..models import Entity, Triplet, GraphBuilderResult
 from rapidfuzz import process,fuzz
@@ -7,24 +7,37 @@ class TripletEntityMerger(Step):
     def __init__(
         self,
         name: str = "TripletEntityMerger",
-        similarity_threshold: float = 0.9
+        similarity_threshold: float = 0.9,
+        endpoints: Sequence[str] = ("head", "tail")
     ):
         
         self.name = name
         self.similarity_threshold = similarity_threshold
+        self.endpoints = tuple(endpoints)
 
-    def _find_matching_entity(self, entity: Entity, existing_entities: List[Entity]) -> Entity:
+    def _find_matching_entity(self, entity: Entity, existing_entities: List[Entity], existing_names: List[str] = None, index_by_name: Dict[str, int] = None) -> Entity:
  
         if entity.special_type in ['DATE', 'PRICE']:
             return entity
  
-        match = process.extractOne(
-            entity.name, 
-            [e.name for e in existing_entities], 
-            scorer=fuzz.ratio,
-        )
-        if match and (match[1]/100) >= self.similarity_threshold:
-            matching_entity = next(e for e in existing_entities if e.name == match[0])
+        if index_by_name is None:
+            index_by_name = {}
+            for i, existing in enumerate(existing_entities):
+                index_by_name.setdefault(existing.name, i)
+        if existing_names is None:
+            existing_names = list(index_by_name)
+        
+        if entity.name in index_by_name and self.similarity_threshold <= 1:
+            match = (entity.name, 100.0)
+        else:
+            match = process.extractOne(
+                entity.name, 
+                existing_names, 
+                scorer=fuzz.ratio,
+                score_cutoff=round(self.similarity_threshold * 100, 6),
+            )
+        if match:
+            matching_entity = existing_entities[index_by_name[match[0]]]
             self.log.debug(f"Entity match found: {entity.name} -> {matching_entity.name} (similarity: {match[1]/100:.2f})")
             return matching_entity
         
@@ -35,13 +48,25 @@ class TripletEntityMerger(Step):
             return []
             
         merged_triplets = []
+        index_by_name = {}
+        for i, entity in enumerate(entities):
+            index_by_name.setdefault(entity.name, i)
+        existing_names = list(index_by_name)
+        matches = {}
+
+        def find(entity: Entity) -> Entity:
+            if entity.special_type in ['DATE', 'PRICE']:
+                return entity
+            if entity.name not in matches:
+                matching_entity = self._find_matching_entity(entity, entities, existing_names, index_by_name)
+                matches[entity.name] = None if matching_entity is entity else matching_entity
+            return matches[entity.name] or entity
         
         for triplet in triplets:
-            matching_head = self._find_matching_entity(triplet.head, entities)
-            matching_tail = self._find_matching_entity(triplet.tail, entities)
-            
-            triplet.head = matching_head
-            triplet.tail = matching_tail
+            if "head" in self.endpoints:
+                triplet.head = find(triplet.head)
+            if "tail" in self.endpoints:
+                triplet.tail = find(triplet.tail)
             
             merged_triplets.append(triplet)
             
@@ -0,0 +1,261 @@
+from typing import Optional, List, Dict, Any, Iterable
+from collections import defaultdict
+import json
+import math
+
+from pydantic import BaseModel, Field
+
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+
+class LLMCallRecord(BaseModel):
+    step: str
+    chunk_ids: List[str] = Field(default_factory=list)
+    model: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+    queue_time: float = 0.0
+    attempt_latencies: List[float] = Field(default_factory=list)
+    attempts: int = 0
+    cache_hits: int = 0
+    parse_failures: int = 0
+    parse_mode: Optional[str] = None
+    dropped_items: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    hedges: int = 0
+    escalation: Optional[str] = None
+    success: bool = False
+
+    @property
+    def retries(self) -> int:
+        return max(self.attempts - 1, 0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class Span(BaseModel):
+    name: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = "step"
+    batch: Optional[int] = None
+    chunk_ids: List[str] = Field(default_factory=list)
+    start_ns: int
+    end_ns: Optional[int] = None
+    input_items: Optional[int] = None
+    output_items: Optional[int] = None
+    memory_delta: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.end_ns is None:
+            return 0.0
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class ExportBatchRecord(BaseModel):
+    rows: int
+    size_bytes: int
+    latency: float
+    budget_bytes: Optional[float] = None
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def latency_histogram(latencies: Iterable[float], buckets: Iterable[float] = LATENCY_BUCKETS) -> Dict[str, int]:
+    buckets = sorted(buckets)
+    histogram = {f"<={bound:g}s": 0 for bound in buckets}
+    histogram[f">{buckets[-1]:g}s"] = 0
+    for latency in latencies:
+        for bound in buckets:
+            if latency <= bound:
+                histogram[f"<={bound:g}s"] += 1
+                break
+        else:
+            histogram[f">{buckets[-1]:g}s"] += 1
+    return histogram
+
+
+def parse_summary(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    """How responses were parsed. ``salvage_rate`` is the share of responses
+    that failed strict validation but were recovered by repair or salvage."""
+    modes = defaultdict(int)
+    for record in records:
+        if record.parse_mode is not None:
+            modes[record.parse_mode] += 1
+    recovered = modes["repaired"] + modes["salvaged"]
+    failed = sum(record.parse_failures for record in records)
+    return {
+        "direct": modes["direct"],
+        "repaired": modes["repaired"],
+        "salvaged": modes["salvaged"],
+        "dropped_items": sum(record.dropped_items for record in records),
+        "salvage_rate": recovered / (recovered + failed) if recovered + failed else 0.0,
+    }
+
+
+def cascade_summary(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    """Calls per model and why cheaper models' answers were escalated."""
+    models = defaultdict(lambda: {"calls": 0, "escalated": 0, "total_tokens": 0, "cost": 0.0, "latency": 0.0})
+    reasons = defaultdict(int)
+    for record in records:
+        totals = models[record.model or "default"]
+        totals["calls"] += 1
+        totals["total_tokens"] += record.total_tokens
+        totals["cost"] += record.cost
+        totals["latency"] += record.latency
+        if record.escalation is not None:
+            totals["escalated"] += 1
+            reasons[record.escalation] += 1
+    return {"models": dict(models), "escalations": dict(reasons)}
+
+
+def aggregate_llm_calls(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    latencies = [latency for record in records for latency in record.attempt_latencies]
+    return {
+        "calls": len(records),
+        "requests": sum(record.attempts for record in records),
+        "failed_calls": sum(1 for record in records if not record.success),
+        "retries": sum(record.retries for record in records),
+        "cache_hits": sum(record.cache_hits for record in records),
+        "parse_failures": sum(record.parse_failures for record in records),
+        "parsing": parse_summary(records),
+        "errors": sum(record.errors for record in records),
+        "timeouts": sum(record.timeouts for record in records),
+        "hedges": sum(record.hedges for record in records),
+        "prompt_tokens": sum(record.prompt_tokens for record in records),
+        "completion_tokens": sum(record.completion_tokens for record in records),
+        "total_tokens": sum(record.total_tokens for record in records),
+        "cost": sum(record.cost for record in records),
+        "queue_time": sum(record.queue_time for record in records),
+        "latency": {
+            "total": sum(latencies),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        },
+    }
+
+
+class PipelineMetrics(BaseModel):
+    llm_calls: List[LLMCallRecord] = Field(default_factory=list)
+    counters: Dict[str, float] = Field(default_factory=dict)
+    spans: List[Span] = Field(default_factory=list)
+    export_batches: List[ExportBatchRecord] = Field(default_factory=list)
+
+    def record_llm_calls(self, records: Iterable[LLMCallRecord]) -> None:
+        self.llm_calls.extend(records)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: "PipelineMetrics") -> None:
+        self.llm_calls.extend(other.llm_calls)
+        self.spans.extend(other.spans)
+        self.export_batches.extend(other.export_batches)
+        for name, value in other.counters.items():
+            self.increment(name, value)
+
+    def llm_by_step(self) -> Dict[str, Dict[str, Any]]:
+        groups = defaultdict(list)
+        for record in self.llm_calls:
+            groups[record.step].append(record)
+        return {step: aggregate_llm_calls(records) for step, records in groups.items()}
+
+    def llm_by_chunk(self) -> Dict[str, Dict[str, Any]]:
+        """Token and latency totals per chunk; calls covering several packed
+        chunks are split evenly between them."""
+        chunks = defaultdict(lambda: defaultdict(float))
+        for record in self.llm_calls:
+            if not record.chunk_ids:
+                continue
+            share = 1.0 / len(record.chunk_ids)
+            for chunk_id in record.chunk_ids:
+                totals = chunks[chunk_id]
+                totals["calls"] += share
+                totals["prompt_tokens"] += record.prompt_tokens * share
+                totals["completion_tokens"] += record.completion_tokens * share
+                totals["cost"] += record.cost * share
+                totals["latency"] += record.latency * share
+                totals[f"{record.step}.prompt_tokens"] += record.prompt_tokens * share
+        return {chunk_id: dict(totals) for chunk_id, totals in chunks.items()}
+
+    def latency_histogram(self, step: str = None, buckets: Iterable[float] = LATENCY_BUCKETS) -> Dict[str, int]:
+        records = [record for record in self.llm_calls if step is None or record.step == step]
+        return latency_histogram(
+            (latency for record in records for latency in record.attempt_latencies),
+            buckets,
+        )
+
+    def stage_times(self) -> Dict[str, Dict[str, Any]]:
+        """Busy time and item counts per step name from the recorded spans."""
+        stages = {}
+        for span in self.spans:
+            if span.kind != "step" or span.end_ns is None:
+                continue
+            stage = stages.setdefault(span.name, {"calls": 0, "busy_time": 0.0, "max": 0.0, "errors": 0, "output_items": 0})
+            stage["calls"] += 1
+            stage["busy_time"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+            stage["errors"] += 1 if span.error else 0
+            stage["output_items"] += span.output_items or 0
+        return stages
+
+    def export_batch_summary(self) -> Dict[str, Any]:
+        """Sizes chosen for export transactions; ``budget_bytes`` is the
+        adaptive budget after the last one."""
+        committed = [record for record in self.export_batches if record.error is None]
+        rows = [float(record.rows) for record in committed]
+        sizes = [float(record.size_bytes) for record in committed]
+        latencies = [record.latency for record in committed]
+        return {
+            "transactions": len(self.export_batches),
+            "failed": len(self.export_batches) - len(committed),
+            "rows": {"mean": sum(rows) / len(rows) if rows else 0.0, "p50": percentile(rows, 50), "max": max(rows, default=0.0)},
+            "bytes": {"mean": sum(sizes) / len(sizes) if sizes else 0.0, "p50": percentile(sizes, 50), "max": max(sizes, default=0.0)},
+            "latency": {"p50": percentile(latencies, 50), "p99": percentile(latencies, 99), "max": max(latencies, default=0.0)},
+            "budget_bytes": self.export_batches[-1].budget_bytes if self.export_batches else None,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "llm": {
+                "total": aggregate_llm_calls(self.llm_calls),
+                "by_step": self.llm_by_step(),
+                "latency_histogram": self.latency_histogram(),
+                "latency_histogram_by_step": {
+                    step: self.latency_histogram(step) for step in self.llm_by_step()
+                },
+                "by_model": cascade_summary(self.llm_calls),
+            },
+            "counters": dict(self.counters),
+            "stages": self.stage_times(),
+            "export": self.export_batch_summary(),
+        }
+
+    def export_summary(self, path: str, include_chunks: bool = False) -> None:
+        summary = self.summary()
+        if include_chunks:
+            summary["llm"]["by_chunk"] = self.llm_by_chunk()
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
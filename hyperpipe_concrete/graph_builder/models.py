@@ -1,6 +1,25 @@
-from typing import Optional, List, Any
-from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Annotated
+from pydantic import BaseModel, Field, BeforeValidator, PlainSerializer
 from hyperpipe_core import Result
+import numpy as np
+
+from .metrics import PipelineMetrics
+
+
+def to_vector(value) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+    return np.asarray(value, dtype=np.float32)
+
+
+def vector_to_list(value) -> Optional[List[float]]:
+    if value is None:
+        return None
+    return value.tolist() if isinstance(value, np.ndarray) else list(value)
+
+
+# Embeddings are kept as float32 arrays and only turned into lists when dumped
+Vector = Annotated[Any, BeforeValidator(to_vector), PlainSerializer(vector_to_list, return_type=Optional[List[float]])]
 
 class EntityMetadata(BaseModel):
     context: str
@@ -14,11 +33,13 @@ class Entity(BaseModel):
     label: Optional[str] = None
     summary: Optional[str] = None
     metadata: Optional[EntityMetadata] = None
-    embedding: Optional[List[float]] = Field(default=None, repr=False)
-    label_embedding: Optional[List[float]] = Field(default=None, repr=False)
-    name_embedding: Optional[List[float]] = Field(default=None, repr=False)
+    embedding: Optional[Vector] = Field(default=None, repr=False)
+    label_embedding: Optional[Vector] = Field(default=None, repr=False)
+    name_embedding: Optional[Vector] = Field(default=None, repr=False)
     alternatives: List['Entity'] = Field(default_factory=list)
     special_type: Optional[str] = None
+    graph_match: Optional[str] = Field(default=None, exclude=True)
+    node_id: Optional[str] = Field(default=None, exclude=True)
     
     def __eq__(self, other) -> bool:
         if isinstance(other, Entity):
@@ -28,7 +49,7 @@ class Entity(BaseModel):
 class Relationship(BaseModel):
     name: str
     label: Optional[str] = None
-    embedding: Optional[List[float]] = Field(default=None, repr=False)
+    embedding: Optional[Vector] = Field(default=None, repr=False)
     
     def __eq__(self, other) -> bool:
         if isinstance(other, Relationship):
@@ -59,4 +80,5 @@ class GraphBuilderResult(BaseModel):
     
     entity_extraction: list[Entity] = Field(default_factory=list)
     relation_extraction: list[Triplet] = Field(default_factory=list)
+    metrics: PipelineMetrics = Field(default_factory=PipelineMetrics)
 
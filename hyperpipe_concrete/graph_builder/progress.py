@@ -0,0 +1,177 @@
+from typing import Any, Dict, Optional
+import sys
+import time
+
+from hyperpipe_core import Step
+
+from .models import GraphBuilderResult
+
+
+def _usage_tokens(response: Any) -> int:
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is None:
+        return 0
+    if isinstance(usage, dict):
+        return (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+    return (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """Live chunks/s, triplets/s, tokens/s and ETA for a build.
+
+    Renders a rich progress bar when rich is available and stderr is a
+    terminal, and periodic plain log lines otherwise.
+    """
+
+    def __init__(self, total_chunks: Optional[int] = None, refresh_interval: float = 5.0, stream=None):
+        self.total_chunks = total_chunks
+        self.refresh_interval = refresh_interval
+        self.stream = stream or sys.stderr
+        self.start_time = time.perf_counter()
+        self.chunks = 0
+        self.triplets = 0
+        self.tokens = 0
+        self.llm_calls = 0
+        self._window_triplets = 0
+        self._last_render = 0.0
+        self._progress = None
+        self._task = None
+
+    def __enter__(self) -> "ProgressReporter":
+        if self.stream.isatty():
+            try:
+                from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
+            except ImportError:
+                return self
+            self._progress = Progress(
+                TextColumn("[bold]chunks"),
+                BarColumn(),
+                TextColumn("{task.completed}/{task.total}"),
+                TextColumn("{task.fields[rates]}"),
+                TextColumn("ETA {task.fields[eta]}"),
+                TimeElapsedColumn(),
+                transient=False,
+            )
+            self._progress.start()
+            self._task = self._progress.add_task("build", total=self.total_chunks, rates="", eta="--:--")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.render(force=True)
+        if self._progress is not None:
+            self._progress.stop()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def rates(self) -> Dict[str, float]:
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "chunks_per_second": self.chunks / elapsed,
+            "triplets_per_second": self.triplets / elapsed,
+            "tokens_per_second": self.tokens / elapsed,
+        }
+
+    def eta(self) -> Optional[float]:
+        if not self.total_chunks or not self.chunks:
+            return None
+        return max(self.total_chunks - self.chunks, 0) / self.rates()["chunks_per_second"]
+
+    def record_llm_response(self, response: Any) -> None:
+        self.llm_calls += 1
+        self.tokens += _usage_tokens(response)
+        self.render()
+
+    def batch_done(self, chunks: int, window_triplets: int) -> None:
+        self.chunks += chunks
+        self.triplets += max(window_triplets - self._window_triplets, 0)
+        self._window_triplets = window_triplets
+        self.render()
+
+    def window_done(self, result: GraphBuilderResult, chunks: int = 0, count_tokens: bool = False, triplets: int = None) -> None:
+        """Called after each ``build_graph`` call. ``chunks``,
+        ``count_tokens`` and ``triplets`` account for work done out of
+        process, where batches and responses were not reported live."""
+        self.chunks += chunks
+        if triplets is None:
+            triplets = len(result.relation_extraction)
+        self.triplets += max(triplets - self._window_triplets, 0)
+        self._window_triplets = 0
+        if count_tokens:
+            self.tokens += sum(record.total_tokens for record in result.metrics.llm_calls)
+            self.llm_calls += len(result.metrics.llm_calls)
+        self.render(force=True)
+
+    def describe(self) -> str:
+        rates = self.rates()
+        return (
+            f"{rates['chunks_per_second']:.2f} chunks/s, "
+            f"{rates['triplets_per_second']:.1f} triplets/s, "
+            f"{rates['tokens_per_second']:.0f} tokens/s"
+        )
+
+    def render(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if self._progress is not None:
+            self._progress.update(self._task, completed=self.chunks, rates=self.describe(), eta=_format_duration(self.eta()))
+            return
+        if not force and now - self._last_render < self.refresh_interval:
+            return
+        self._last_render = now
+        total = f"/{self.total_chunks}" if self.total_chunks else ""
+        self.stream.write(
+            f"[{_format_duration(self.elapsed)}] {self.chunks}{total} chunks, {self.triplets} triplets | "
+            f"{self.describe()} | ETA {_format_duration(self.eta())}\n"
+        )
+        self.stream.flush()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "triplets": self.triplets,
+            "tokens": self.tokens,
+            "llm_calls": self.llm_calls,
+            "wall_time": self.elapsed,
+            **self.rates(),
+        }
+
+
+class MeteredLLM:
+    """Passes ``hallucinate`` calls through and reports token usage."""
+
+    def __init__(self, llm, reporter: ProgressReporter):
+        self.llm = llm
+        self.reporter = reporter
+
+    async def hallucinate(self, *args, **kwargs):
+        response = await self.llm.hallucinate(*args, **kwargs)
+        self.reporter.record_llm_response(response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class ProgressStep(Step):
+    """Last step of a merge batch: reports its chunks to a reporter."""
+
+    def __init__(self, reporter: ProgressReporter, num_chunks: int, name: str = "Progress"):
+        self.name = name
+        self.reporter = reporter
+        self.num_chunks = num_chunks
+
+    def execute(self, data: GraphBuilderResult) -> None:
+        self.reporter.batch_done(self.num_chunks, len(data.relation_extraction))
+
+    def save_result(self, step_result, result) -> None:
+        pass
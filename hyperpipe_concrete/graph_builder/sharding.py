@@ -0,0 +1,415 @@
+"""Multi-process sharded graph building.
+
+Chunks are assigned to shards by a stable hash of their uid. Every shard is
+extracted, cleaned and merged locally by a worker process
+(``build_graph(..., stages="extract")``), which writes its entities and
+triplets to a JSONL file in ``work_dir``. The coordinator then resolves
+entities across all shard outputs, one block of similar names at a time, and
+drives embedding, matching and export in bounded batches.
+
+Shards only exchange files, so workers can also run on other machines
+against a shared directory:
+
+    python -m hyperpipe_concrete.graph_builder.sharding worker shard-00003.chunks.jsonl \\
+        --llm mypackage.llms:create_llm [--config config.json]
+"""
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import zlib
+
+from hyperpipe_core import AsyncStep, Pipeline, PipelineRunner
+from hyperpipe_core.logger import set_logger
+
+from .models import Entity, Triplet, GraphBuilderResult
+from .metrics import PipelineMetrics
+
+NAME_KEY_PATTERN = re.compile(r"[\W_]+")
+
+
+@dataclass
+class ShardChunk:
+    uid: str
+    text: str
+
+
+@dataclass
+class ShardTracker:
+    """The part of a qTracker that extraction reads."""
+    chunks: List[ShardChunk] = field(default_factory=list)
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def shard_paths(work_dir: str, shard: int) -> Dict[str, str]:
+    prefix = os.path.join(work_dir, f"shard-{shard:05d}")
+    return {
+        "chunks": f"{prefix}.chunks.jsonl",
+        "output": f"{prefix}.output.jsonl",
+        "metrics": f"{prefix}.metrics.json",
+        "done": f"{prefix}.done",
+    }
+
+
+def _chunks_digest(chunks: List[ShardChunk]) -> str:
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        digest.update(chunk.uid.encode("utf-8"))
+        digest.update(hashlib.sha1(chunk.text.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def write_shard_inputs(qtracker, num_shards: int, work_dir: str) -> List[int]:
+    """Writes each shard's chunks to ``work_dir`` and returns the shards that
+    still need to run; shards whose done marker matches their chunks are
+    skipped."""
+    os.makedirs(work_dir, exist_ok=True)
+    shards: List[List[ShardChunk]] = [[] for _ in range(num_shards)]
+    for chunk in qtracker.chunks:
+        shards[shard_of(chunk.uid, num_shards)].append(ShardChunk(uid=chunk.uid, text=chunk.text))
+
+    pending = []
+    for shard, chunks in enumerate(shards):
+        paths = shard_paths(work_dir, shard)
+        digest = _chunks_digest(chunks)
+        if os.path.exists(paths["done"]):
+            with open(paths["done"], encoding="utf-8") as f:
+                if f.read().strip() == digest:
+                    continue
+        with open(paths["chunks"], "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps({"uid": chunk.uid, "text": chunk.text}) + "\n")
+        pending.append(shard)
+    return pending
+
+
+def read_shard_chunks(path: str) -> List[ShardChunk]:
+    with open(path, encoding="utf-8") as f:
+        return [ShardChunk(**json.loads(line)) for line in f if line.strip()]
+
+
+def write_shard_output(result: GraphBuilderResult, paths: Dict[str, str], digest: str) -> None:
+    # Written to temporary files first so a crashed worker never leaves a
+    # partial output behind a done marker
+    with open(paths["output"] + ".tmp", "w", encoding="utf-8") as f:
+        for entity in result.entity_extraction:
+            f.write(json.dumps({"type": "entity", "data": entity.model_dump(mode="json")}) + "\n")
+        for triplet in result.relation_extraction:
+            f.write(json.dumps({"type": "triplet", "data": triplet.model_dump(mode="json")}) + "\n")
+    with open(paths["metrics"] + ".tmp", "w", encoding="utf-8") as f:
+        f.write(result.metrics.model_dump_json())
+    os.replace(paths["output"] + ".tmp", paths["output"])
+    os.replace(paths["metrics"] + ".tmp", paths["metrics"])
+    with open(paths["done"], "w", encoding="utf-8") as f:
+        f.write(digest)
+
+
+def load_factory(spec):
+    """``spec`` is a callable or a ``"module:attribute"`` string."""
+    if callable(spec):
+        return spec
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+async def run_shard(chunks_path: str, llm, config: dict = None, logger=None) -> GraphBuilderResult:
+    from .__main__ import build_graph
+
+    tracker = ShardTracker(read_shard_chunks(chunks_path))
+    config = dict(config or {})
+    tracer_config = config.get("pipeline", {}).get("tracer", {})
+    if tracer_config.get("export_path"):
+        base, extension = os.path.splitext(tracer_config["export_path"])
+        shard_name = os.path.basename(chunks_path).split(".")[0]
+        config["pipeline"] = {
+            **config["pipeline"],
+            "tracer": {**tracer_config, "export_path": f"{base}.{shard_name}{extension}"},
+        }
+    return await build_graph(tracker, None, llm, None, config=config, logger=logger, stages="extract")
+
+
+def run_shard_worker(chunks_path: str, llm_factory, config: dict = None) -> str:
+    """Process entry point: extracts one shard and writes its output files."""
+    work_dir = os.path.dirname(chunks_path)
+    shard = int(os.path.basename(chunks_path).split(".")[0].split("-")[1])
+    paths = shard_paths(work_dir, shard)
+    chunks = read_shard_chunks(chunks_path)
+
+    llm = load_factory(llm_factory)()
+    result = asyncio.run(run_shard(chunks_path, llm, config))
+    write_shard_output(result, paths, _chunks_digest(chunks))
+    return paths["output"]
+
+
+def name_block(name: str, num_blocks: int, key_length: int = 2) -> int:
+    """Block of an entity name for the reduce: names that share their first
+    ``key_length`` letters or digits (case-insensitive) share a block."""
+    key = NAME_KEY_PATTERN.sub("", (name or "").lower())[:key_length]
+    return zlib.crc32(key.encode("utf-8")) % num_blocks
+
+
+def reduce_paths(reduce_dir: str, block: int) -> Dict[str, str]:
+    prefix = os.path.join(reduce_dir, f"block-{block:05d}")
+    return {
+        "entities": f"{prefix}.entities.jsonl",
+        "heads": f"{prefix}.heads.jsonl",
+        "merged": f"{prefix}.merged.jsonl",
+        "tails": f"{prefix}.tails.jsonl",
+    }
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+class BlockWriter:
+    """Appends JSON lines to one file per reduce block."""
+
+    def __init__(self, reduce_dir: str, kind: str, num_blocks: int):
+        self.files = [open(reduce_paths(reduce_dir, block)[kind], "a", encoding="utf-8") for block in range(num_blocks)]
+
+    def write(self, block: int, line: str) -> None:
+        self.files[block].write(line + "\n")
+
+    def close(self) -> None:
+        for f in self.files:
+            f.close()
+
+
+def partition_shard_outputs(output_paths: List[str], reduce_dir: str, num_blocks: int, key_length: int = 2) -> Tuple[PipelineMetrics, Set[str], int]:
+    """Streams shard outputs into per-block entity files (by entity name) and
+    triplet files (by head name). Returns the merged shard metrics, the
+    entity labels seen and the number of triplets."""
+    os.makedirs(reduce_dir, exist_ok=True)
+    for block in range(num_blocks):
+        for path in reduce_paths(reduce_dir, block).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    metrics = PipelineMetrics()
+    labels = set()
+    num_triplets = 0
+    entities = BlockWriter(reduce_dir, "entities", num_blocks)
+    heads = BlockWriter(reduce_dir, "heads", num_blocks)
+    try:
+        for path in output_paths:
+            for line in iter_lines(path):
+                record = json.loads(line)
+                data = record["data"]
+                if record["type"] == "entity":
+                    labels.add(data.get("label"))
+                    entities.write(name_block(data["name"], num_blocks, key_length), json.dumps(data))
+                else:
+                    num_triplets += 1
+                    heads.write(name_block(data["head"]["name"], num_blocks, key_length), json.dumps(data))
+            metrics_path = path.replace(".output.jsonl", ".metrics.json")
+            if os.path.exists(metrics_path):
+                with open(metrics_path, encoding="utf-8") as f:
+                    metrics.merge(PipelineMetrics.model_validate_json(f.read()))
+    finally:
+        entities.close()
+        heads.close()
+    labels.discard(None)
+    return metrics, labels, num_triplets
+
+
+class LoadBlock(AsyncStep[GraphBuilderResult, GraphBuilderResult]):
+    """Reads one reduce block's entities and triplets."""
+
+    def __init__(self, entities_path: str, triplets_path: str, name: str = "LoadBlock"):
+        self.name = name
+        self.entities_path = entities_path
+        self.triplets_path = triplets_path
+
+    async def execute(self, result: GraphBuilderResult) -> GraphBuilderResult:
+        loaded = GraphBuilderResult()
+        loaded.entity_extraction = [Entity.model_validate_json(line) for line in iter_lines(self.entities_path)]
+        loaded.relation_extraction = [Triplet.model_validate_json(line) for line in iter_lines(self.triplets_path)]
+        return loaded
+
+    def save_result(self, step_result: GraphBuilderResult, result: GraphBuilderResult) -> None:
+        result.entity_extraction.extend(step_result.entity_extraction)
+        result.relation_extraction.extend(step_result.relation_extraction)
+
+
+class LoadTriplets(AsyncStep[GraphBuilderResult, List[Triplet]]):
+    """Seeds a reduce batch with already resolved triplets."""
+
+    def __init__(self, triplets: List[Triplet], name: str = "LoadTriplets"):
+        self.name = name
+        self.triplets = triplets
+
+    async def execute(self, result: GraphBuilderResult) -> List[Triplet]:
+        return self.triplets
+
+    def save_result(self, step_result: List[Triplet], result: GraphBuilderResult) -> None:
+        result.relation_extraction.extend(step_result)
+
+
+async def _run_steps(steps: list, name: str, logger) -> GraphBuilderResult:
+    runner = PipelineRunner(Pipeline(steps, name=name), result_class=GraphBuilderResult)
+    runner.map_transform([set_logger(logger)])
+    return await runner.arun(ShardTracker())
+
+
+async def reduce_shards(output_paths: List[str],
+                        neo4j_graph,
+                        embedder,
+                        config: dict = None,
+                        logger=None,
+                        batch_size: int = 2000,
+                        num_blocks: int = 64,
+                        block_key_length: int = 2,
+                        reduce_dir: str = None) -> GraphBuilderResult:
+    """Resolves entities across shard outputs, then embeds, matches and
+    exports the triplets ``batch_size`` at a time.
+
+    Shard outputs are streamed into ``num_blocks`` blocks on disk, keyed by
+    the first ``block_key_length`` characters of entity names, and each
+    block is merged on its own: entities, and triplet heads, in a first pass
+    over the blocks, triplet tails in a second pass that also exports them.
+    Memory and the fuzzy matching cost are bounded by the largest block
+    instead of the corpus; names that differ in their first characters are
+    not merged across shards. The returned result only holds metrics.
+    """
+    from .__main__ import merge_config, create_graph_steps, record_graph_stats
+    from .database import as_async_graph
+    from .merging import EntityTextMerger, TripletEntityMerger
+
+    pipeline_config = merge_config(config)['pipeline']
+    owns_reduce_dir = reduce_dir is None
+    reduce_dir = reduce_dir or os.path.join(os.path.dirname(output_paths[0]) if output_paths else ".", "reduce")
+    result = GraphBuilderResult()
+    metrics, labels, num_triplets = partition_shard_outputs(output_paths, reduce_dir, num_blocks, block_key_length)
+    result.metrics.merge(metrics)
+    label_mapping = EntityTextMerger.build_label_mapping(sorted(labels))
+
+    # Heads: merge each block's entities and resolve the triplets whose head
+    # falls in the block, then move those triplets to their tail's block
+    tails = BlockWriter(reduce_dir, "tails", num_blocks)
+    try:
+        for block in range(num_blocks):
+            paths = reduce_paths(reduce_dir, block)
+            merged = await _run_steps([
+                LoadBlock(paths["entities"], paths["heads"]),
+                EntityTextMerger(label_mapping=label_mapping, **pipeline_config['entity_text_merger']),
+                TripletEntityMerger(endpoints=("head",), **pipeline_config['triplet_entity_merger']),
+            ], f"Resolve heads {block}", logger)
+            with open(paths["merged"], "w", encoding="utf-8") as f:
+                for entity in merged.entity_extraction:
+                    f.write(entity.model_dump_json() + "\n")
+            for triplet in merged.relation_extraction:
+                tails.write(name_block(triplet.tail.name, num_blocks, block_key_length), triplet.model_dump_json())
+    finally:
+        tails.close()
+
+    owns_graph = neo4j_graph is None
+    neo4j_graph = as_async_graph(neo4j_graph, **pipeline_config['neo4j_graph'])
+    graph_steps = create_graph_steps(pipeline_config, neo4j_graph, embedder)
+    graph_stats_before = neo4j_graph.stats()
+
+    async def export(triplets: List[Triplet]) -> None:
+        batch_result = await _run_steps([LoadTriplets(triplets), *graph_steps], "Export", logger)
+        result.metrics.merge(batch_result.metrics)
+
+    try:
+        # Small blocks are combined so export batches stay at batch_size
+        pending: List[Triplet] = []
+        for block in range(num_blocks):
+            paths = reduce_paths(reduce_dir, block)
+            resolved = await _run_steps([
+                LoadBlock(paths["merged"], paths["tails"]),
+                TripletEntityMerger(endpoints=("tail",), **pipeline_config['triplet_entity_merger']),
+            ], f"Resolve tails {block}", logger)
+            pending.extend(resolved.relation_extraction)
+            while len(pending) >= batch_size:
+                await export(pending[:batch_size])
+                pending = pending[batch_size:]
+        if pending:
+            await export(pending)
+        record_graph_stats(result, graph_stats_before, neo4j_graph.stats())
+    finally:
+        if owns_graph:
+            await neo4j_graph.close()
+    result.metrics.increment("reduce.triplets", num_triplets)
+    if owns_reduce_dir:
+        shutil.rmtree(reduce_dir, ignore_errors=True)
+    return result
+
+
+async def build_graph_sharded(qtracker,
+                              neo4j_graph,
+                              llm_factory,
+                              embedder,
+                              config: dict = None,
+                              logger=None,
+                              num_shards: int = None,
+                              max_workers: int = None,
+                              work_dir: str = "graph_builder_shards",
+                              reduce_batch_size: int = 2000,
+                              reduce_blocks: int = 64) -> GraphBuilderResult:
+    """Sharded ``build_graph``. ``llm_factory`` is called in each worker
+    process and must be picklable (a module-level callable, a
+    ``functools.partial`` of one, or a ``"module:attribute"`` string).
+    Finished shards are reused when the run is repeated with the same
+    ``work_dir``."""
+    num_shards = num_shards or os.cpu_count() or 1
+    max_workers = min(max_workers or os.cpu_count() or 1, num_shards)
+    pending = write_shard_inputs(qtracker, num_shards, work_dir)
+
+    if pending:
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = [
+                loop.run_in_executor(pool, run_shard_worker, shard_paths(work_dir, shard)["chunks"], llm_factory, config)
+                for shard in pending
+            ]
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
+        failed = {shard: outcome for shard, outcome in zip(pending, outcomes) if isinstance(outcome, BaseException)}
+        if failed:
+            details = "; ".join(f"shard {shard}: {error}" for shard, error in failed.items())
+            raise RuntimeError(f"{len(failed)} of {num_shards} shards failed, rerun to resume: {details}")
+
+    output_paths = [shard_paths(work_dir, shard)["output"] for shard in range(num_shards)]
+    return await reduce_shards(output_paths, neo4j_graph, embedder, config, logger,
+                               batch_size=reduce_batch_size, num_blocks=reduce_blocks)
+
+
+def main(argv: Iterable[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run one graph builder shard")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker = subparsers.add_parser("worker", help="extract a shard written by the coordinator")
+    worker.add_argument("chunks_path")
+    worker.add_argument("--llm", required=True, help="module:callable returning the LLM client")
+    worker.add_argument("--config", help="JSON config file")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    print(run_shard_worker(args.chunks_path, args.llm, config))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+from .llm import FakeLLM, FakeLLMError, SyntheticResponder, RecordingLLM, ReplayLLM
+from .embedder import FakeEmbedder, FakeEmbedderError
+from .graph import FakeGraph, FakeGraphError
+
+__all__ = [
+    'FakeLLM',
+    'FakeLLMError',
+    'SyntheticResponder',
+    'RecordingLLM',
+    'ReplayLLM',
+    'FakeEmbedder',
+    'FakeEmbedderError',
+    'FakeGraph',
+    'FakeGraphError'
+]
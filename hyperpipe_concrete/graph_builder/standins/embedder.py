@@ -0,0 +1,65 @@
+from typing import List, Dict
+import asyncio
+import hashlib
+import random
+import time
+
+import numpy as np
+
+
+class FakeEmbedderError(RuntimeError):
+    pass
+
+
+class FakeEmbedder:
+    """Offline ``embedder`` stand-in returning deterministic unit vectors
+    derived from a hash of each text."""
+
+    def __init__(self,
+                 dimension: int = 64,
+                 latency: float = 0.0,
+                 per_item_latency: float = 0.0,
+                 failure_rate: float = 0.0,
+                 seed: int = 0):
+        self.dimension = dimension
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.items = 0
+        self.failures = 0
+        self.busy_time = 0.0
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return vector / np.linalg.norm(vector)
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        start = time.perf_counter()
+        try:
+            return await self._embed(texts)
+        finally:
+            self.busy_time += time.perf_counter() - start
+
+    async def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        self.calls += 1
+        self.items += len(texts)
+        delay = self.latency + self.per_item_latency * len(texts)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeEmbedderError("Injected embedder failure")
+
+        return [self._vector(text) for text in texts]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "failures": self.failures,
+            "busy_time": self.busy_time,
+        }
@@ -0,0 +1,71 @@
+from typing import List, Dict, Any
+import asyncio
+import random
+import time
+
+
+class FakeGraphError(RuntimeError):
+    pass
+
+
+class FakeGraph:
+    """Offline ``neo4j_graph`` stand-in. Queries are counted and answered
+    with no rows; written batches are only tallied."""
+
+    def __init__(self,
+                 read_latency: float = 0.0,
+                 write_latency: float = 0.0,
+                 per_row_latency: float = 0.0,
+                 failure_rate: float = 0.0,
+                 seed: int = 0):
+        self.read_latency = read_latency
+        self.write_latency = write_latency
+        self.per_row_latency = per_row_latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.reads = 0
+        self.writes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.read_time = 0.0
+        self.write_time = 0.0
+
+    def _maybe_fail(self) -> None:
+        if self.random.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeGraphError("Injected graph failure")
+
+    async def read_query(self, query: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        self.reads += 1
+        try:
+            if self.read_latency > 0:
+                await asyncio.sleep(self.read_latency)
+            self._maybe_fail()
+            return []
+        finally:
+            self.read_time += time.perf_counter() - start
+
+    async def write_query(self, query: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        self.writes += 1
+        rows = len((params or {}).get("batch", [])) or 1
+        try:
+            delay = self.write_latency + self.per_row_latency * rows
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._maybe_fail()
+            self.rows_written += rows
+            return []
+        finally:
+            self.write_time += time.perf_counter() - start
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "reads": self.reads,
+            "writes": self.writes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+            "read_time": self.read_time,
+            "write_time": self.write_time,
+        }
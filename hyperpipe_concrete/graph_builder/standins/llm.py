@@ -0,0 +1,253 @@
+from typing import List, Dict, Any, Optional, Callable, Type
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+from ..utils.packing import estimate_tokens
+
+
+CHUNK_PATTERN = re.compile(r'<chunk id="([^"]+)">\n(.*?)\n</chunk>', re.DOTALL)
+ENTITY_PATTERN = re.compile(r"\b[A-Z][a-z]+(?: [A-Z][a-z]+)*\b")
+SENTENCE_PATTERN = re.compile(r"[^.!?]+[.!?]?")
+ENTITY_LABELS = ["Person", "Company", "Location", "Product", "Organization", "Event"]
+
+
+class FakeLLMError(RuntimeError):
+    pass
+
+
+@dataclass
+class FakeMessage:
+    content: str
+    role: str = "assistant"
+
+
+@dataclass
+class FakeLLMResponse:
+    message: FakeMessage
+    usage: Dict[str, int] = field(default_factory=dict)
+    cache_hit: bool = False
+
+
+def _stable_index(text: str, size: int) -> int:
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16) % size
+
+
+def _message_text(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+def _last_user_prompt(messages: List[Dict[str, str]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def _prompt_text(prompt: str) -> str:
+    if "Text: " in prompt:
+        return prompt.split("Text: ", 1)[1].split("\n\nAvailable entities", 1)[0]
+    return prompt.split("\n\n", 1)[1] if "\n\n" in prompt else prompt
+
+
+class SyntheticResponder:
+    """Deterministically answers extraction prompts from the prompt text.
+
+    Capitalized phrases are reported as entities with a label derived from a
+    hash of the name, and consecutive entities of a sentence are related by
+    the words between them. This matches the corpora produced by
+    ``benchmarks.corpus.make_corpus``.
+    """
+
+    def entities(self, text: str) -> List[Dict[str, str]]:
+        seen = {}
+        for name in ENTITY_PATTERN.findall(text):
+            if name not in seen:
+                seen[name] = {
+                    "name": name,
+                    "label": ENTITY_LABELS[_stable_index(name, len(ENTITY_LABELS))],
+                    "summary": f"{name} mentioned in the text",
+                }
+        return list(seen.values())
+
+    def relations(self, text: str) -> List[Dict[str, Any]]:
+        relations = []
+        for sentence in SENTENCE_PATTERN.findall(text):
+            matches = list(ENTITY_PATTERN.finditer(sentence))
+            for head, tail in zip(matches, matches[1:]):
+                words = re.findall(r"[a-z]+", sentence[head.end():tail.start()])[:3]
+                if not words:
+                    continue
+                relation_name = "_".join(words)
+                head_entity = self.entities(head.group())[0]
+                tail_entity = self.entities(tail.group())[0]
+                relations.append({
+                    "head": head_entity,
+                    "relation": {"name": relation_name, "label": relation_name},
+                    "tail": tail_entity,
+                })
+        return relations
+
+    def answer(self, text: str, fields) -> Dict[str, Any]:
+        answer = {}
+        if "entities" in fields:
+            answer["entities"] = self.entities(text)
+        if "relations" in fields:
+            answer["relations"] = self.relations(text)
+        return answer
+
+    def __call__(self, messages: List[Dict[str, str]], response_format: Optional[Type] = None) -> str:
+        prompt = _last_user_prompt(messages)
+        fields = set(getattr(response_format, "model_fields", {}) or {"entities"})
+
+        if "chunks" in fields:
+            chunk_model = response_format.model_fields["chunks"].annotation.__args__[0]
+            chunk_fields = set(chunk_model.model_fields)
+            chunks = [
+                {"chunk_id": chunk_id, **self.answer(text, chunk_fields)}
+                for chunk_id, text in CHUNK_PATTERN.findall(prompt)
+            ]
+            return json.dumps({"chunks": chunks})
+
+        return json.dumps(self.answer(_prompt_text(prompt), fields))
+
+
+class FakeLLM:
+    """Offline ``llm`` stand-in with injectable latency and failures."""
+
+    def __init__(self,
+                 responder: Callable[[List[Dict[str, str]], Optional[Type]], str] = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 failure_rate: float = 0.0,
+                 malformed_rate: float = 0.0,
+                 seed: int = 0):
+        self.responder = responder or SyntheticResponder()
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.busy_time = 0.0
+
+    async def hallucinate(self, messages: List[Dict[str, str]], response_format: Optional[Type] = None, **kwargs) -> FakeLLMResponse:
+        start = time.perf_counter()
+        try:
+            return await self._hallucinate(messages, response_format)
+        finally:
+            self.busy_time += time.perf_counter() - start
+
+    async def _hallucinate(self, messages: List[Dict[str, str]], response_format: Optional[Type] = None) -> FakeLLMResponse:
+        self.calls += 1
+        delay = self.latency + self.jitter * self.random.random()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeLLMError("Injected LLM failure")
+
+        content = self.responder(messages, response_format)
+        if self.random.random() < self.malformed_rate:
+            content = content[:max(len(content) // 2, 1)]
+
+        usage = {
+            "prompt_tokens": estimate_tokens(_message_text(messages)),
+            "completion_tokens": estimate_tokens(content),
+        }
+        self.prompt_tokens += usage["prompt_tokens"]
+        self.completion_tokens += usage["completion_tokens"]
+        return FakeLLMResponse(message=FakeMessage(content=content), usage=usage)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "busy_time": self.busy_time,
+        }
+
+
+def request_key(messages: List[Dict[str, str]], response_format: Optional[Type] = None) -> str:
+    payload = json.dumps(
+        {"messages": messages, "response_format": getattr(response_format, "__name__", None)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordingLLM:
+    """Wraps a real ``llm`` and appends every response to a JSONL file that
+    ``ReplayLLM`` can serve later."""
+
+    def __init__(self, llm, path: str):
+        self.llm = llm
+        self.path = path
+
+    async def hallucinate(self, messages: List[Dict[str, str]], response_format: Optional[Type] = None, **kwargs):
+        result = await self.llm.hallucinate(messages=messages, response_format=response_format, **kwargs)
+
+        usage = getattr(result, "usage", None)
+        if usage is not None and not isinstance(usage, dict):
+            usage = {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+                "completion_tokens": getattr(usage, "completion_tokens", 0),
+            }
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps({
+                "key": request_key(messages, response_format),
+                "content": result.message.content,
+                "usage": usage or {},
+            }) + "\n")
+        return result
+
+
+class ReplayLLM:
+    """Serves responses recorded by ``RecordingLLM``. Unknown requests go to
+    ``fallback`` when given and raise ``KeyError`` otherwise."""
+
+    def __init__(self, path: str, fallback=None, latency: float = 0.0):
+        self.fallback = fallback
+        self.latency = latency
+        self.responses: Dict[str, List[Dict[str, Any]]] = {}
+        self.calls = 0
+        self.misses = 0
+
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses.setdefault(record["key"], []).append(record)
+        self._positions = {key: 0 for key in self.responses}
+
+    async def hallucinate(self, messages: List[Dict[str, str]], response_format: Optional[Type] = None, **kwargs):
+        self.calls += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        key = request_key(messages, response_format)
+        records = self.responses.get(key)
+        if not records:
+            self.misses += 1
+            if self.fallback is None:
+                raise KeyError(f"No recorded response for request {key[:12]}")
+            return await self.fallback.hallucinate(messages=messages, response_format=response_format, **kwargs)
+
+        position = self._positions[key]
+        self._positions[key] = (position + 1) % len(records)
+        record = records[position]
+        return FakeLLMResponse(message=FakeMessage(content=record["content"]), usage=record.get("usage", {}))
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "misses": self.misses}
@@ -0,0 +1,112 @@
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+
+from hyperpipe_core import AsyncStep
+
+from .models import GraphBuilderResult
+
+
+class ChunkStream:
+    """Runs per-chunk extraction for the whole corpus ahead of the merge
+    batches and hands results out in completion order.
+
+    ``units`` are chunk index groups (single chunks or packs) that
+    ``run_unit`` extracts into a fresh ``GraphBuilderResult``. Units are
+    started largest first, and at most ``max_buffered_chunks`` chunks are
+    started but not yet taken by a batch, so extraction cannot run
+    arbitrarily far ahead of merging and export.
+    """
+
+    def __init__(self,
+                 units: List[List[int]],
+                 run_unit: Callable[[List[int]], Awaitable[GraphBuilderResult]],
+                 unit_sizes: Optional[List[int]] = None,
+                 max_buffered_chunks: int = 64):
+        order = range(len(units))
+        if unit_sizes is not None:
+            order = sorted(order, key=lambda position: -unit_sizes[position])
+        self.units = [units[position] for position in order]
+        self.run_unit = run_unit
+        self.max_buffered_chunks = max_buffered_chunks
+        self.remaining = len(self.units)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._credits: Optional[asyncio.Semaphore] = None
+        self._producer: Optional[asyncio.Task] = None
+        self._tasks = set()
+
+    def _start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._credits = asyncio.Semaphore(self.max_buffered_chunks)
+        self._producer = asyncio.get_running_loop().create_task(self._produce())
+
+    async def _produce(self) -> None:
+        for unit in self.units:
+            # A unit larger than the whole buffer still runs on its own
+            for _ in range(min(len(unit), self.max_buffered_chunks)):
+                await self._credits.acquire()
+            task = asyncio.get_running_loop().create_task(self._run(unit))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, unit: List[int]) -> None:
+        try:
+            result = await self.run_unit(unit)
+            await self._queue.put((unit, result, None))
+        except Exception as e:
+            await self._queue.put((unit, None, e))
+
+    async def take(self, num_chunks: int) -> List[Tuple[List[int], Optional[GraphBuilderResult], Optional[Exception]]]:
+        """Waits for the next finished units covering at least ``num_chunks``
+        chunks, or for everything left."""
+        if self._queue is None:
+            self._start()
+        taken = []
+        covered = 0
+        while self.remaining and covered < num_chunks:
+            unit, result, error = await self._queue.get()
+            self.remaining -= 1
+            covered += len(unit)
+            for _ in range(min(len(unit), self.max_buffered_chunks)):
+                self._credits.release()
+            taken.append((unit, result, error))
+        return taken
+
+    async def close(self) -> None:
+        tasks = [task for task in [self._producer, *self._tasks] if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class StreamedExtractionStep(AsyncStep[GraphBuilderResult, List[GraphBuilderResult]]):
+    """First step of a merge batch in streaming mode: collects the next
+    ``batch_size`` finished chunks from a shared ``ChunkStream``."""
+
+    def __init__(self, stream: ChunkStream, batch_size: int,
+                 on_taken: Optional[Callable[[List[List[int]]], None]] = None,
+                 name: str = "StreamedExtraction"):
+        self.name = name
+        self.stream = stream
+        self.batch_size = batch_size
+        self.on_taken = on_taken
+
+    async def execute(self, result: GraphBuilderResult) -> List[GraphBuilderResult]:
+        chunk_results = []
+        taken = await self.stream.take(self.batch_size)
+        if self.on_taken is not None:
+            self.on_taken([unit for unit, _, _ in taken])
+        for unit, chunk_result, error in taken:
+            if error is not None:
+                self.log.error(f"Extraction failed for chunks {unit}: {str(error)}")
+                continue
+            chunk_results.append(chunk_result)
+        self.log.info(f"Collected {len(chunk_results)} extracted chunk groups")
+        return chunk_results
+
+    def save_result(self, step_result: List[GraphBuilderResult], result: GraphBuilderResult) -> None:
+        for chunk_result in step_result:
+            result.entity_extraction.extend(chunk_result.entity_extraction)
+            result.relation_extraction.extend(chunk_result.relation_extraction)
+            result.metrics.merge(chunk_result.metrics)
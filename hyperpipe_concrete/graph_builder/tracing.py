@@ -0,0 +1,270 @@
+from typing import Optional, List, Dict, Any
+from itertools import count
+import functools
+import inspect
+import json
+import os
+import time
+import tracemalloc
+
+from hyperpipe_core import Step
+
+from .metrics import Span
+
+
+def count_items(value) -> Optional[int]:
+    """Number of entities + triplets in a step input or output."""
+    if value is None:
+        return None
+    if hasattr(value, "entity_extraction") and hasattr(value, "relation_extraction"):
+        return len(value.entity_extraction) + len(value.relation_extraction)
+    if isinstance(value, tuple):
+        return sum(len(part) for part in value if isinstance(part, list))
+    if isinstance(value, list):
+        return len(value)
+    return None
+
+
+def _assign_lanes(spans: List[Span]) -> Dict[str, int]:
+    """Greedy interval packing so overlapping spans land on separate rows."""
+    lane_ends = []
+    lanes = {}
+    for span in sorted(spans, key=lambda span: span.start_ns):
+        end = span.end_ns or span.start_ns
+        for lane, lane_end in enumerate(lane_ends):
+            if lane_end <= span.start_ns:
+                lane_ends[lane] = end
+                lanes[span.span_id] = lane
+                break
+        else:
+            lanes[span.span_id] = len(lane_ends)
+            lane_ends.append(end)
+    return lanes
+
+
+def _otel_value(value) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otel_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """Records a timing span for every instrumented step execution plus one
+    span per pipeline batch.
+
+    Steps are instrumented by wrapping ``execute`` on the instance, so shared
+    steps (cleaners, mergers) are wrapped once and attributed to whichever
+    batch is currently running. Memory deltas come from tracemalloc and are
+    approximate when spans overlap.
+    """
+
+    def __init__(self, trace_memory: bool = False, service_name: str = "graph_builder"):
+        self.trace_memory = trace_memory
+        self.service_name = service_name
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.current_batch: Optional[Span] = None
+        self._ids = count(1)
+        self._started_tracemalloc = False
+        self._epoch_offset = time.time_ns() - time.perf_counter_ns()
+
+    def _now(self) -> int:
+        return time.perf_counter_ns() + self._epoch_offset
+
+    def _new_span_id(self) -> str:
+        return f"{next(self._ids):016x}"
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def finish(self) -> None:
+        self.end_batch()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def begin_batch(self, batch: int, chunk_ids: List[str] = None) -> None:
+        self.end_batch()
+        self.current_batch = Span(
+            name=f"batch {batch}",
+            span_id=self._new_span_id(),
+            kind="batch",
+            batch=batch,
+            chunk_ids=list(chunk_ids or []),
+            start_ns=self._now(),
+        )
+        self.spans.append(self.current_batch)
+
+    def add_batch_chunks(self, chunk_ids: List[str]) -> None:
+        if self.current_batch is not None:
+            self.current_batch.chunk_ids.extend(chunk_ids)
+
+    def end_batch(self) -> None:
+        if self.current_batch is not None:
+            self.current_batch.end_ns = self._now()
+            self.current_batch = None
+
+    def _memory(self) -> Optional[int]:
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return None
+
+    def _open(self, name: str, chunk_ids: List[str], data) -> Span:
+        batch = self.current_batch
+        span = Span(
+            name=name,
+            span_id=self._new_span_id(),
+            parent_id=batch.span_id if batch else None,
+            batch=batch.batch if batch else None,
+            chunk_ids=list(chunk_ids or []),
+            start_ns=self._now(),
+            input_items=count_items(data),
+        )
+        self.spans.append(span)
+        return span
+
+    def _close(self, span: Span, output, memory_before: Optional[int], error: Exception = None) -> None:
+        span.end_ns = self._now()
+        span.output_items = count_items(output)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        memory_after = self._memory()
+        if memory_before is not None and memory_after is not None:
+            span.memory_delta = memory_after - memory_before
+
+    def instrument(self, step, name: str = None, chunk_ids: List[str] = None):
+        """Wraps ``step.execute`` in a span. Safe to call more than once."""
+        if getattr(step, "_traced", False):
+            return step
+
+        execute = step.execute
+        span_name = name or getattr(step, "name", None) or type(step).__name__
+
+        if inspect.iscoroutinefunction(execute):
+            @functools.wraps(execute)
+            async def traced_execute(data):
+                span = self._open(span_name, chunk_ids, data)
+                memory_before = self._memory()
+                try:
+                    output = await execute(data)
+                except Exception as e:
+                    self._close(span, None, memory_before, e)
+                    raise
+                self._close(span, output, memory_before)
+                return output
+        else:
+            @functools.wraps(execute)
+            def traced_execute(data):
+                span = self._open(span_name, chunk_ids, data)
+                memory_before = self._memory()
+                try:
+                    output = execute(data)
+                except Exception as e:
+                    self._close(span, None, memory_before, e)
+                    raise
+                self._close(span, output, memory_before)
+                return output
+
+        step.execute = traced_execute
+        step._traced = True
+        return step
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format, loadable in chrome://tracing or Perfetto."""
+        finished = [span for span in self.spans if span.end_ns is not None]
+        lanes = _assign_lanes([span for span in finished if span.kind != "batch"])
+        origin = min((span.start_ns for span in finished), default=0)
+        events = []
+        for span in finished:
+            args = {
+                "batch": span.batch,
+                "chunk_ids": span.chunk_ids,
+                "input_items": span.input_items,
+                "output_items": span.output_items,
+            }
+            if span.memory_delta is not None:
+                args["memory_delta"] = span.memory_delta
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": (span.start_ns - origin) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": 1,
+                "tid": 0 if span.kind == "batch" else lanes[span.span_id] + 1,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otel(self) -> Dict[str, Any]:
+        """OTLP/JSON ``ExportTraceServiceRequest`` payload."""
+        spans = []
+        for span in self.spans:
+            attributes = {"graph_builder.kind": span.kind}
+            if span.batch is not None:
+                attributes["graph_builder.batch"] = span.batch
+            if span.chunk_ids:
+                attributes["graph_builder.chunk_ids"] = span.chunk_ids
+            if span.input_items is not None:
+                attributes["graph_builder.input_items"] = span.input_items
+            if span.output_items is not None:
+                attributes["graph_builder.output_items"] = span.output_items
+            if span.memory_delta is not None:
+                attributes["graph_builder.memory_delta"] = span.memory_delta
+
+            otel_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                "attributes": [{"key": key, "value": _otel_value(value)} for key, value in attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otel_span["parentSpanId"] = span.parent_id
+            spans.append(otel_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "hyperpipe_concrete.graph_builder"}, "spans": spans}],
+            }]
+        }
+
+    def export(self, path: str, format: str = "chrome") -> None:
+        if format == "chrome":
+            payload = self.to_chrome_trace()
+        elif format == "otel":
+            payload = self.to_otel()
+        else:
+            raise ValueError(f"Unknown trace format: {format}")
+        with open(path, "w") as f:
+            json.dump(payload, f)
+
+
+class BatchSpanStep(Step):
+    """Marks the start of a batch so following step spans are attributed to it."""
+
+    def __init__(self, tracer: Tracer, batch: int, chunk_ids: List[str] = None, name: str = "BatchSpan"):
+        self.name = name
+        self.tracer = tracer
+        self.batch = batch
+        self.chunk_ids = chunk_ids or []
+
+    def execute(self, data) -> None:
+        self.tracer.begin_batch(self.batch, self.chunk_ids)
+
+    def save_result(self, step_result, result) -> None:
+        pass
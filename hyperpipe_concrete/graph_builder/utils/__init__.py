@@ -1,19 +1,42 @@
 
-from .prompts import EntityExtractionPrompts, RelationExtractionPrompts
+from .prompts import EntityExtractionPrompts, RelationExtractionPrompts, JointExtractionPrompts
 from .extraction_models import (
     EntityLLMOutput, 
     RelationshipLLMOutput, 
     TripletLLMOutput,
     EntitiesListResponse,
-    RelationsListResponse
+    RelationsListResponse,
+    ChunkEntitiesOutput,
+    ChunkRelationsOutput,
+    PackedEntitiesResponse,
+    PackedRelationsResponse,
+    JointExtractionResponse,
+    ChunkJointOutput,
+    PackedJointResponse
 )
+from .packing import estimate_tokens, pack_chunks
+from .naming import normalize_node_name
+from .json_repair import parse_model, repair_json
 
 __all__ = [
     'EntityExtractionPrompts',
     'RelationExtractionPrompts',
+    'JointExtractionPrompts',
     'EntityLLMOutput',
     'RelationshipLLMOutput', 
     'TripletLLMOutput',
     'EntitiesListResponse',
-    'RelationsListResponse'
+    'RelationsListResponse',
+    'ChunkEntitiesOutput',
+    'ChunkRelationsOutput',
+    'PackedEntitiesResponse',
+    'PackedRelationsResponse',
+    'JointExtractionResponse',
+    'ChunkJointOutput',
+    'PackedJointResponse',
+    'estimate_tokens',
+    'pack_chunks',
+    'normalize_node_name',
+    'parse_model',
+    'repair_json'
 ]
\ No newline at end of file
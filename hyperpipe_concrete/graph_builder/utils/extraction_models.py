@@ -24,4 +24,36 @@ class EntitiesListResponse(BaseModel):
 
 
 class RelationsListResponse(BaseModel):
-    relations: List[TripletLLMOutput]
\ No newline at end of file
+    relations: List[TripletLLMOutput]
+
+class ChunkEntitiesOutput(BaseModel):
+    chunk_id: str
+    entities: List[EntityLLMOutput]
+
+
+class ChunkRelationsOutput(BaseModel):
+    chunk_id: str
+    relations: List[TripletLLMOutput]
+
+
+class PackedEntitiesResponse(BaseModel):
+    chunks: List[ChunkEntitiesOutput]
+
+
+class PackedRelationsResponse(BaseModel):
+    chunks: List[ChunkRelationsOutput]
+
+
+class JointExtractionResponse(BaseModel):
+    entities: List[EntityLLMOutput]
+    relations: List[TripletLLMOutput]
+
+
+class ChunkJointOutput(BaseModel):
+    chunk_id: str
+    entities: List[EntityLLMOutput]
+    relations: List[TripletLLMOutput]
+
+
+class PackedJointResponse(BaseModel):
+    chunks: List[ChunkJointOutput]
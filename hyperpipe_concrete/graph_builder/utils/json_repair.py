@@ -0,0 +1,186 @@
+from typing import Any, List, Optional, Tuple, Type, TypeVar, get_args, get_origin
+import json
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar('M', bound=BaseModel)
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+def strip_code_fence(content: str) -> str:
+    if '```' not in content:
+        return content
+    if '```json' in content:
+        content = content.split('```json', 1)[1]
+    else:
+        content = content.split('```', 1)[1]
+    return content.split('```', 1)[0].strip()
+
+
+def repair_json(content: str) -> Optional[str]:
+    """Best-effort cleanup of LLM JSON output.
+
+    Drops prose around the first JSON value, removes trailing commas and, if
+    the output was cut off, truncates it after the last complete value and
+    closes the open containers. Returns ``None`` when no JSON value starts
+    in ``content``.
+    """
+    starts = [position for position in (content.find('{'), content.find('[')) if position >= 0]
+    if not starts:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    # (length of out, open containers) at which out ends in a complete value
+    safe_cut: Tuple[int, Tuple[str, ...]] = (0, ())
+
+    for char in content[min(starts):]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in CLOSERS:
+            stack.append(char)
+            out.append(char)
+            safe_cut = (len(out), tuple(stack))
+        elif char in '}]':
+            if not stack or CLOSERS[stack[-1]] != char:
+                break
+            while out and out[-1] in ' \t\r\n,':
+                out.pop()
+            stack.pop()
+            out.append(char)
+            if not stack:
+                return ''.join(out)
+            safe_cut = (len(out), tuple(stack))
+        elif char == ',':
+            while out and out[-1] in ' \t\r\n':
+                out.pop()
+            if out and out[-1] not in ',[{':
+                safe_cut = (len(out), tuple(stack))
+                out.append(char)
+        else:
+            out.append(char)
+
+    length, open_containers = safe_cut
+    if not open_containers:
+        return None
+    kept = out[:length]
+    while kept and kept[-1] in ' \t\r\n,':
+        kept.pop()
+    if kept and kept[-1] == ':':
+        return None
+    return ''.join(kept) + ''.join(CLOSERS[opener] for opener in reversed(open_containers))
+
+
+def _list_item_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+            return args[0]
+    return None
+
+
+def count_items(instance: BaseModel) -> int:
+    total = 0
+    for name in type(instance).model_fields:
+        value = getattr(instance, name)
+        if isinstance(value, list):
+            total += len(value) + sum(count_items(item) for item in value if isinstance(item, BaseModel))
+        elif isinstance(value, BaseModel):
+            total += count_items(value)
+    return total
+
+
+def salvage_model(data: Any, model: Type[M]) -> Tuple[Optional[M], int]:
+    """Validates ``data`` against ``model``, dropping list items that do not
+    validate on their own. Returns the model (or ``None``) and the number of
+    dropped items."""
+    if not isinstance(data, dict):
+        return None, 0
+    cleaned = dict(data)
+    dropped = 0
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        value = cleaned.get(key)
+        item_model = _list_item_model(field.annotation)
+        if item_model is not None and isinstance(value, list):
+            kept = []
+            for item in value:
+                try:
+                    kept.append(item_model.model_validate(item))
+                    continue
+                except ValidationError:
+                    pass
+                salvaged, item_dropped = salvage_model(item, item_model)
+                dropped += item_dropped
+                if salvaged is None:
+                    dropped += 1
+                else:
+                    kept.append(salvaged)
+            cleaned[key] = kept
+        elif isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel) and isinstance(value, dict):
+            salvaged, item_dropped = salvage_model(value, field.annotation)
+            dropped += item_dropped
+            if salvaged is not None:
+                cleaned[key] = salvaged
+    try:
+        return model.model_validate(cleaned), dropped
+    except ValidationError:
+        return None, dropped
+
+
+def parse_model(content: str, model: Type[M]) -> Tuple[M, str, int]:
+    """Parses an LLM response into ``model``.
+
+    Returns ``(instance, mode, dropped_items)`` where ``mode`` is ``direct``
+    (validated in one pass), ``repaired`` (valid after ``repair_json``) or
+    ``salvaged`` (invalid items dropped). Raises ``json.JSONDecodeError`` or
+    ``ValidationError`` when nothing can be recovered.
+    """
+    text = strip_code_fence(content)
+    try:
+        return model.model_validate_json(text), 'direct', 0
+    except ValidationError as e:
+        error = e
+
+    # Recovered answers without a single item are treated as failures, so
+    # the caller still retries them
+    truncated = any(detail['type'] == 'json_invalid' for detail in error.errors())
+    if not truncated:
+        data = json.loads(text)
+    else:
+        repaired = repair_json(text)
+        data = None
+        if repaired is not None:
+            try:
+                data = json.loads(repaired)
+            except json.JSONDecodeError:
+                data = None
+        if data is None:
+            raise json.JSONDecodeError("Unrecoverable JSON in LLM response", text, 0)
+        try:
+            instance = model.model_validate(data)
+        except ValidationError:
+            instance = None
+        if instance is not None and count_items(instance):
+            return instance, 'repaired', 0
+
+    instance, dropped = salvage_model(data, model)
+    if instance is None or not count_items(instance):
+        if truncated:
+            raise json.JSONDecodeError("Unrecoverable JSON in LLM response", text, 0)
+        raise error
+    return instance, 'salvaged', dropped
@@ -0,0 +1,5 @@
+def normalize_node_name(name: str) -> str:
+    """Name as stored on graph nodes by ``Neo4jExporter``."""
+    if not name:
+        return name
+    return name.strip().title()
@@ -0,0 +1,55 @@
+from typing import List, Sequence
+from functools import lru_cache
+
+
+CHUNK_TAG_OVERHEAD_TOKENS = 12
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    # Roughly four characters per token for English prose
+    return len(text) // 4 + 1
+
+
+def chunk_tag(position: int) -> str:
+    return f"c{position + 1}"
+
+
+def pack_chunks(chunks: Sequence, max_tokens: int = 3000, max_chunks: int = 8) -> List[List[int]]:
+    """Greedily group consecutive chunks into packs that fit the token budget.
+
+    Returns lists of positions into ``chunks``. A chunk larger than the budget
+    is placed in a pack of its own.
+    """
+    packs = []
+    current = []
+    current_tokens = 0
+
+    for position, chunk in enumerate(chunks):
+        chunk_tokens = estimate_tokens(chunk.text) + CHUNK_TAG_OVERHEAD_TOKENS
+
+        if current and (current_tokens + chunk_tokens > max_tokens or len(current) >= max_chunks):
+            packs.append(current)
+            current = []
+            current_tokens = 0
+
+        current.append(position)
+        current_tokens += chunk_tokens
+
+    if current:
+        packs.append(current)
+
+    return packs
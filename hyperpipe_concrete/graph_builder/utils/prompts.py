@@ -36,6 +36,25 @@ class EntityExtractionPrompts:
     
     USER_TEMPLATE = "Extract entities from this text:\n\n{text}"
 
+    PACKED_SYSTEM = SYSTEM.split("OUTPUT FORMAT:")[0] + """OUTPUT FORMAT:
+    The input contains several text chunks, each wrapped in <chunk id="..."> tags.
+    Extract entities from every chunk independently and return ONLY valid JSON in this exact format:
+    {
+        "chunks": [
+            {
+                "chunk_id": "c1",
+                "entities": [
+                    {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+                ]
+            }
+        ]
+    }
+    Include every chunk id exactly once, with an empty "entities" list when a chunk has no entities."""
+
+    PACKED_USER_TEMPLATE = "Extract entities from each of these text chunks:\n\n{chunks}"
+
+    CHUNK_TEMPLATE = "<chunk id=\"{chunk_id}\">\n{text}\n</chunk>"
+
 
 class RelationExtractionPrompts:
     
@@ -175,8 +194,110 @@ INSTRUCTIONS:
 7. Return complete triplets with specific entity labels and summaries as specified in the format
 
 Find relationships between these entities that are present in the text."""
+
+    PACKED_SYSTEM = SYSTEM.split("OUTPUT FORMAT:")[0] + """OUTPUT FORMAT:
+The input contains several text chunks, each wrapped in <chunk id="..."> tags. Extract relations from every chunk independently; a triplet must be supported by the text of the chunk it is reported under.
+Return ONLY a single, valid JSON object in the exact format specified below. Do not add any commentary or explanation outside the JSON structure.
+
+{
+"chunks": [
+{
+"chunk_id": "c1",
+"relations": [
+{
+"head": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"},
+"relation": {"name": "relation_name"},
+"tail": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+}
+]
+}
+]
+}
+
+Include every chunk id exactly once, with an empty "relations" list when a chunk has no relations.
+"""
+
+    PACKED_USER_TEMPLATE = """Extract relations from each of these text chunks:
+
+{chunks}
+
+Available entities: {entity_list}
+
+INSTRUCTIONS:
+1. Find relationships between entities present in the same chunk
+2. For each entity in head/tail, determine its appropriate, specific label/type and provide a brief summary
+3. Use entities from the available list when possible, but always provide meaningful labels and summaries
+4. DO NOT use generic labels like "Entity", "Entity Type", "Generic", or "Unknown"
+5. Use specific, descriptive labels like "Person", "Company", "Location", "Product", etc.
+6. Provide brief summaries (max 150 characters) for each entity in English
+7. Report the triplets of each chunk under that chunk's id
+
+Find relationships between these entities that are present in each chunk."""
     
     ISOLATED_ENTITIES_TEMPLATE = """Context: {context}
 
 1. Focus on connecting the isolated entities: {isolated_entity_list}
-2. Connect them to any of these entities: {entity_list}"""
\ No newline at end of file
+2. Connect them to any of these entities: {entity_list}"""
+
+class JointExtractionPrompts:
+
+    SYSTEM = """You are an expert in Named Entity Recognition and Knowledge Graph construction.
+From the given text, extract the key entities AND the directed, semantic relationships between them in a single pass.
+
+LANGUAGE REQUIREMENT: Extract entities and relations ONLY in English. If the text is in another language, translate entity names and relation names to English while preserving their meaning.
+
+ENTITIES:
+    - name: The entity text in English (MAX 100 characters)
+    - label: A single, concise, specific entity type in English (MAX 20 characters), e.g. "Person", "Company", "Location", "Product"
+    - summary: A brief description of what this entity represents (MAX 150 characters)
+    - Focus on entities that would be meaningful in a knowledge graph
+    - Do NOT repeat entity types in the name and do NOT use generic labels like "Entity", "Entity Type", "Generic", or "Unknown"
+
+RELATIONS:
+    - Each relation is a triplet (Head, Relation, Tail) where Head and Tail are entities from your entity list
+    - The relationship must be clearly and directly stated in the text
+    - Relation names are short snake_case verbs in active voice, directional from Head to Tail (e.g. founded_by, located_in, ceo_of), max 25 characters and 1-3 words
+    - The relation name must NOT contain entity names, entity types, numbers or dates
+    - AVOID generic relationships like "related_to", "is_part_of", "associated_with" or "connected_to"
+    - Each triplet must represent a single, atomic fact
+
+OUTPUT FORMAT:
+Return ONLY a single, valid JSON object in this exact format, without commentary:
+{
+"entities": [
+{"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+],
+"relations": [
+{
+"head": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"},
+"relation": {"name": "relation_name", "label": "relation_name"},
+"tail": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+}
+]
+}"""
+
+    USER_TEMPLATE = "Extract entities and the relations between them from this text:\n\n{text}"
+
+    PACKED_SYSTEM = SYSTEM.split("OUTPUT FORMAT:")[0] + """OUTPUT FORMAT:
+The input contains several text chunks, each wrapped in <chunk id="..."> tags. Extract entities and relations from every chunk independently.
+Return ONLY a single, valid JSON object in this exact format, without commentary:
+{
+"chunks": [
+{
+"chunk_id": "c1",
+"entities": [
+{"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+],
+"relations": [
+{
+"head": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"},
+"relation": {"name": "relation_name", "label": "relation_name"},
+"tail": {"name": "Entity Name", "label": "Entity Type", "summary": "Brief description of the entity"}
+}
+]
+}
+]
+}
+Include every chunk id exactly once, with empty lists when a chunk has no entities or relations."""
+
+    PACKED_USER_TEMPLATE = "Extract entities and the relations between them from each of these text chunks:\n\n{chunks}"
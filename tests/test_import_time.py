@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from hyperpipe_concrete.graph_builder.benchmarks.import_time import TARGETS, measure_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def package_on_path(monkeypatch):
+    # The probe runs in a fresh interpreter, which must find this checkout
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+
+
+def test_graph_builder_import_stays_lazy():
+    _, _, loaded = measure_import('hyperpipe_concrete.graph_builder')
+    for module in ('dateparser', 'price_parser', 'rapidfuzz', 'neo4j'):
+        assert module not in loaded, f"{module} is imported by hyperpipe_concrete.graph_builder"
+
+
+@pytest.mark.parametrize('target', TARGETS, ids=lambda target: target.module)
+def test_targets_do_not_load_forbidden_modules(target):
+    _, _, loaded = measure_import(target.module)
+    assert sorted(name for name in target.forbidden if name in loaded) == []